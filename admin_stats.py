@@ -24,35 +24,9 @@ def _conn():
     return c
 
 def _read_df(sql: str, params: tuple = ()):
-    from db import get_connection
-    with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute(sql, params)
-        rows = cur.fetchall()
-    if not rows:
-        return pd.DataFrame()
-
-    df = pd.DataFrame(rows)
-
-    # --- NUEVO: autocast numérico en columnas mayormente numéricas ---
-    def _mostly_numeric(s: pd.Series, thresh: float = 0.7) -> bool:
-        nn = s.dropna()
-        if len(nn) == 0:
-            return False
-        ok = 0
-        for v in nn:
-            try:
-                float(str(v).replace(",", "."))  # por si vinieran comas
-                ok += 1
-            except Exception:
-                pass
-        return ok / len(nn) >= thresh
-
-    for c in df.columns:
-        if df[c].dtype == object and _mostly_numeric(df[c]):
-            df[c] = pd.to_numeric(df[c].astype(str).str.replace(",", ".", regex=False), errors="coerce")
-
-    return df
+    # DataFrame armado por columnas con tipos del esquema (ver db.read_df)
+    from db import read_df
+    return read_df(sql, params)
 
 def _season_labels() -> List[str]:
     try:
@@ -98,9 +72,9 @@ def _season_clause(sel: Optional[str], alias: str = "p") -> Tuple[str, tuple]:
         return "", ()
     rng = _season_range(sel)
     if rng:
-        return (f"AND date({alias}.fecha) BETWEEN date(?) AND date(?)", (rng[0], rng[1]))
+        return (f"AND {alias}.fecha_dia BETWEEN date(?) AND date(?)", (rng[0], rng[1]))
     if len(sel) == 4 and sel.isdigit():
-        return (f"AND strftime('%Y', {alias}.fecha) = ?", (sel,))
+        return (f"AND {alias}.fecha_dia BETWEEN ? AND ?", (f"{sel}-01-01", f"{sel}-12-31"))
     return "", ()
 
 def _result_cond(alias="p"):
@@ -291,7 +265,7 @@ def _detalle_partidos_jugador(jid: int, temporada_sel: Optional[str]) -> pd.Data
       FROM partidos p
       JOIN partido_jugadores pj ON pj.partido_id = p.id
       WHERE pj.jugador_id = ? {(' ' + where if where else '')}
-      ORDER BY date(p.fecha) ASC, p.id ASC
+      ORDER BY p.fecha_dia ASC, p.id ASC
     """
     params2 = (jid,) + params
     return _read_df(sql, params2)
@@ -399,27 +373,26 @@ def _render_streak_list(items: List[Dict[str, Any]], kind: str):
 # Paridad y checks ELO
 # -----------------------
 def _matches_with_team_elo(temporada_sel: Optional[str]) -> pd.DataFrame:
+    # ELO de equipo previo (suma de elo_antes) desde el snapshot de historial_elo
+    import snapshot_elo
     cond = _result_cond("p")
     where, params = _season_clause(temporada_sel, "p")
     sql = f"""
-      WITH t AS (
-        SELECT p.id AS partido_id, p.fecha, p.ganador, p.diferencia_gol,
-               pj.equipo, SUM(he.elo_antes) AS elo_pre
-        FROM partidos p
-        JOIN partido_jugadores pj ON pj.partido_id = p.id
-        JOIN historial_elo he ON he.partido_id = p.id AND he.jugador_id = pj.jugador_id
-        WHERE {cond} {(' ' + where if where else '')}
-        GROUP BY p.id, pj.equipo
-      )
-      SELECT a.partido_id, a.fecha, a.elo_pre AS team1_elo, b.elo_pre AS team2_elo,
-             p.ganador, p.diferencia_gol
-      FROM t a
-      JOIN t b ON b.partido_id = a.partido_id AND b.equipo <> 1
-      JOIN partidos p ON p.id = a.partido_id
-      WHERE a.equipo = 1
-      ORDER BY date(p.fecha) ASC, p.id ASC
+      SELECT p.id AS partido_id, p.fecha, p.ganador, p.diferencia_gol
+      FROM partidos p
+      WHERE {cond} {(' ' + where if where else '')}
+      ORDER BY p.fecha_dia ASC, p.id ASC
     """
-    df = _read_df(sql, params)
+    dfp = _read_df(sql, params)
+    if dfp.empty:
+        return dfp
+    snap = snapshot_elo.snapshot()
+    teams = [snap.team_elo_at(pid) for pid in dfp["partido_id"].tolist()]
+    dfp["team1_elo"] = [t.get(1) for t in teams]
+    dfp["team2_elo"] = [t.get(2) for t in teams]
+    df = dfp.loc[dfp["team1_elo"].notna() & dfp["team2_elo"].notna(),
+                 ["partido_id", "fecha", "team1_elo", "team2_elo", "ganador", "diferencia_gol"]]
+    df = df.reset_index(drop=True).copy()
     if df.empty:
         return df
     df["elo_diff"] = (df["team1_elo"] - df["team2_elo"]).astype(float)
@@ -502,34 +475,22 @@ def _player_overperf(temporada_sel: Optional[str], min_pj: int = 15) -> Tuple[pd
 # Resumen de jugadores
 # -----------------------
 def _resumen_jugadores(temporada_sel: Optional[str]) -> pd.DataFrame:
-    cond = _result_cond("p")
-    where, params = _season_clause(temporada_sel, "p")
-    sql = f"""
-      WITH base AS (
-        SELECT pj.jugador_id,
-               SUM(CASE WHEN p.ganador = pj.equipo THEN 1 ELSE 0 END) AS W,
-               SUM(CASE WHEN p.ganador IS NULL AND IFNULL(p.diferencia_gol,0)=0 THEN 1 ELSE 0 END) AS E,
-               SUM(CASE WHEN p.ganador IS NOT NULL AND p.ganador <> pj.equipo THEN 1 ELSE 0 END) AS L
-        FROM partidos p
-        JOIN partido_jugadores pj ON pj.partido_id = p.id
-        WHERE {cond} {(' ' + where if where else '')}
-        GROUP BY pj.jugador_id
-      )
+    # W/E/L del período desde player_stats (mantenida al registrar/corregir resultados)
+    import player_stats
+    sql = """
       SELECT
         j.nombre AS Jugador,
         COALESCE(j.elo_actual, 1000) AS ELO_actual,
-        (b.W+b.E+b.L) AS PJ,
-        b.W, b.E, b.L,
-        CASE WHEN (b.W+b.E+b.L)=0 THEN 0.0
-             ELSE ROUND(100.0 * b.W / (b.W+b.E+b.L), 1)
-        END AS WR_pct,
-        CASE WHEN (b.W+b.E+b.L)=0 THEN 0.0
-             ELSE ROUND(100.0 * (3.0*b.W + 1.0*b.E) / (3.0*(b.W+b.E+b.L)), 1)
-        END AS Rend_3_1_0_pct
-      FROM base b
-      JOIN jugadores j ON j.id = b.jugador_id
+        s.pj AS PJ,
+        s.w AS W, s.e AS E, s.l AS L,
+        ROUND(100.0 * s.w / s.pj, 1) AS WR_pct,
+        ROUND(100.0 * (3.0*s.w + 1.0*s.e) / (3.0*s.pj), 1) AS Rend_3_1_0_pct
+      FROM player_stats s
+      JOIN jugadores j ON j.id = s.jugador_id
+      WHERE s.periodo = ? AND s.pj > 0
       ORDER BY PJ DESC, j.nombre ASC
     """
+    params = (player_stats.periodo_de(temporada_sel),)
     df = _read_df(sql, params)
     if df.empty:
         return df
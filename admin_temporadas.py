@@ -8,6 +8,8 @@ import streamlit as st
 import sqlite3
 from datetime import date, datetime
 
+import player_stats
+
 DB_NAME = "elo_futbol.db"
 
 def _conn():
@@ -16,111 +18,55 @@ def _conn():
 
     return c
 
-def _ensure_tables():
-    with _conn() as conn:
-        cur = conn.cursor()
-        # seasons
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS seasons (
-          id INTEGER PRIMARY KEY AUTOINCREMENT,
-          label TEXT NOT NULL UNIQUE,     -- ej: '2025', '2026'
-          start_date TEXT NOT NULL,       -- 'YYYY-MM-DD'
-          end_date   TEXT,                -- NULL hasta finalizar
-          finalized  INTEGER NOT NULL DEFAULT 0
-        )
-        """)
-        # season_awards (por si aún no existe)
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS season_awards (
-          season TEXT NOT NULL,
-          category TEXT NOT NULL,     -- 'most_matches' | 'best_points' | 'most_improved' | 'best_duo'
-          place INTEGER NOT NULL,     -- 1,2,3
-          jugador_id INTEGER NOT NULL,
-          value REAL,
-          meta TEXT,
-          finalized INTEGER NOT NULL DEFAULT 0,
-          awarded_at TEXT,
-          PRIMARY KEY (season, category, place, jugador_id)
-        )
-        """)
-        conn.commit()
-
 def _result_condition_sql(alias="p"):
     a = alias
     return f"(({a}.ganador IS NOT NULL) OR ({a}.ganador IS NULL AND IFNULL({a}.diferencia_gol,0)=0))"
 
 # ---------- Cómputo de podios en rango ----------
-def _rank_most_matches_range(cur, start, end, top=3):
-    cond = _result_condition_sql("p")
-    cur.execute(f"""
-      SELECT pj.jugador_id, j.nombre, COUNT(*) AS pj
-      FROM partido_jugadores pj
-      JOIN partidos p ON p.id = pj.partido_id
-      JOIN jugadores j ON j.id = pj.jugador_id
-      WHERE {cond} AND date(p.fecha) BETWEEN date(?) AND date(?)
-      GROUP BY pj.jugador_id
-      ORDER BY pj DESC, j.nombre ASC
-      LIMIT {top}
-    """, (start, end))
+# Partidos y W/E/L salen de player_stats (período 'temporada:<label>', ver _finalize).
+def _rank_most_matches_range(cur, periodo, top=3):
+    cur.execute("""
+      SELECT s.jugador_id, j.nombre, s.pj
+      FROM player_stats s
+      JOIN jugadores j ON j.id = s.jugador_id
+      WHERE s.periodo = ? AND s.pj > 0
+      ORDER BY s.pj DESC, j.nombre ASC
+      LIMIT ?
+    """, (periodo, top))
     return [dict(r) for r in cur.fetchall()]
 
-def _rank_best_points_range(cur, start, end, min_pj=15, top=3):
-    cond = _result_condition_sql("p")
-    cur.execute(f"""
-      WITH base AS (
-        SELECT pj.jugador_id,
-               SUM(CASE WHEN p.ganador = pj.equipo THEN 1 ELSE 0 END) AS w,
-               SUM(CASE WHEN p.ganador IS NULL AND IFNULL(p.diferencia_gol,0)=0 THEN 1 ELSE 0 END) AS e,
-               SUM(CASE WHEN p.ganador IS NOT NULL AND p.ganador <> pj.equipo THEN 1 ELSE 0 END) AS l
-        FROM partido_jugadores pj
-        JOIN partidos p ON p.id = pj.partido_id
-        WHERE {cond} AND date(p.fecha) BETWEEN date(?) AND date(?)
-        GROUP BY pj.jugador_id
-      ), elig AS (
-        SELECT jugador_id, w, e, l, (w+e+l) AS pj,
-               (3.0*w + 1.0*e) / NULLIF(3.0*(w+e+l),0) AS puntos_pct
-        FROM base
-        WHERE (w+e+l) >= ?
-      )
-      SELECT e.jugador_id, j.nombre, e.pj, e.puntos_pct, e.w, e.e, e.l
-      FROM elig e JOIN jugadores j ON j.id = e.jugador_id
-      ORDER BY e.puntos_pct DESC, e.pj DESC, e.w DESC, j.nombre ASC
-      LIMIT {top}
-    """, (start, end, min_pj))
+def _rank_best_points_range(cur, periodo, min_pj=15, top=3):
+    cur.execute("""
+      SELECT s.jugador_id, j.nombre, s.pj,
+             (3.0*s.w + 1.0*s.e) / (3.0*s.pj) AS puntos_pct,
+             s.w, s.e, s.l
+      FROM player_stats s
+      JOIN jugadores j ON j.id = s.jugador_id
+      WHERE s.periodo = ? AND s.pj > 0 AND s.pj >= ?
+      ORDER BY puntos_pct DESC, s.pj DESC, s.w DESC, j.nombre ASC
+      LIMIT ?
+    """, (periodo, min_pj, top))
     return [dict(r) for r in cur.fetchall()]
 
-def _rank_most_improved_range(cur, start, end, min_pj=15, top=3):
-    cond = _result_condition_sql("p")
-    cur.execute(f"""
-      SELECT pj.jugador_id, COUNT(*) AS pj
-      FROM partido_jugadores pj
-      JOIN partidos p ON p.id = pj.partido_id
-      WHERE {cond} AND date(p.fecha) BETWEEN date(?) AND date(?)
-      GROUP BY pj.jugador_id
-      HAVING COUNT(*) >= ?
-    """, (start, end, min_pj))
-    candidatos = [r["jugador_id"] for r in cur.fetchall()]
+def _rank_most_improved_range(cur, periodo, start, end, min_pj=15, top=3):
+    import snapshot_elo
+    cur.execute("""
+      SELECT s.jugador_id, j.nombre
+      FROM player_stats s
+      JOIN jugadores j ON j.id = s.jugador_id
+      WHERE s.periodo = ? AND s.pj > 0 AND s.pj >= ?
+    """, (periodo, min_pj))
+    candidatos = [(r["jugador_id"], r["nombre"]) for r in cur.fetchall()]
 
+    # ELO al entrar y al salir del rango (snapshot de historial_elo, bisect por jugador)
+    snap = snapshot_elo.snapshot()
     results = []
-    for jid in candidatos:
-        cur.execute(f"""
-          SELECT p.fecha, h.elo_antes, h.elo_despues
-          FROM historial_elo h
-          JOIN partidos p ON p.id = h.partido_id
-          WHERE h.jugador_id = ? AND date(p.fecha) BETWEEN date(?) AND date(?)
-          ORDER BY date(p.fecha), p.id
-        """, (jid, start, end))
-        rows = cur.fetchall()
-        if not rows:
-            continue
-        start_elo = rows[0]["elo_antes"] if rows[0]["elo_antes"] is not None else rows[0]["elo_despues"]
-        end_elo   = rows[-1]["elo_despues"] if rows[-1]["elo_despues"] is not None else rows[-1]["elo_antes"]
-        if start_elo is None or end_elo is None:
+    for jid, nombre in candidatos:
+        r = snap.rango(jid, start, end)
+        if r is None:
             continue
-        delta = float(end_elo) - float(start_elo)
-        cur.execute("SELECT nombre FROM jugadores WHERE id=?", (jid,))
-        nombre = (cur.fetchone() or {"nombre":"?"})["nombre"]
-        results.append({"jugador_id": jid, "nombre": nombre, "delta": delta})
+        start_elo, end_elo = r
+        results.append({"jugador_id": jid, "nombre": nombre, "delta": float(end_elo) - float(start_elo)})
 
     results.sort(key=lambda x: (x["delta"], x["nombre"]), reverse=True)
     return results[:top]
@@ -139,7 +85,7 @@ def _rank_best_duo_range(cur, start, end, min_juntos=10, top=3):
          AND b.equipo = a.equipo
          AND b.jugador_id > a.jugador_id
         JOIN partidos p ON p.id = a.partido_id
-        WHERE {cond} AND date(p.fecha) BETWEEN date(?) AND date(?)
+        WHERE {cond} AND p.fecha_dia BETWEEN date(?) AND date(?)
       ),
       agg AS (
         SELECT j1, j2,
@@ -198,9 +144,11 @@ def _finalize(label, start_date, end_date):
         cur = conn.cursor()
         now_iso = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
 
-        mm = _rank_most_matches_range(cur, start_date, end_date, top=3)
-        bp = _rank_best_points_range(cur, start_date, end_date, min_pj=15, top=3)
-        mi = _rank_most_improved_range(cur, start_date, end_date, min_pj=15, top=3)
+        # agregados de la temporada con el rango final (misma transacción que el cierre)
+        periodo = player_stats.reconstruir_temporada(cur, label, start_date, end_date)
+        mm = _rank_most_matches_range(cur, periodo, top=3)
+        bp = _rank_best_points_range(cur, periodo, min_pj=15, top=3)
+        mi = _rank_most_improved_range(cur, periodo, start_date, end_date, min_pj=15, top=3)
         bd = _rank_best_duo_range(cur, start_date, end_date, min_juntos=10, top=3)
 
         _persist_awards(cur, label, "most_matches", mm, now_iso)
@@ -218,7 +166,6 @@ def _finalize(label, start_date, end_date):
 
 # ---------- UI ----------
 def panel_temporadas():
-    _ensure_tables()
     st.subheader("Temporadas (Admin)")
 
     # Crear / editar temporada
@@ -244,6 +191,9 @@ def panel_temporadas():
                 else:
                     cur.execute("INSERT INTO seasons(label, start_date, finalized) VALUES(?, ?, 0)",
                                 (label, start_date.strftime("%Y-%m-%d")))
+                cur.execute("SELECT end_date FROM seasons WHERE label=?", (label,))
+                player_stats.reconstruir_temporada(cur, label, start_date.strftime("%Y-%m-%d"),
+                                                   cur.fetchone()[0])
                 conn.commit()
             st.success(f"Temporada '{label}' guardada/actualizada.")
 
@@ -0,0 +1,598 @@
+# balanceo.py
+# Motor de partición balanceada para armar equipos de N por lado (sin UI).
+# - Jugadores como índices 0..n-1 con su ELO; bloques (duplas/tríos) como listas de
+#   índices que van enteros a un mismo equipo. Los singles son bloques de 1.
+# - Cada opción es (diff, elo1, elo2, mask): mask = bitmask de los índices del Equipo 1.
+#   El bloque "ancla" va siempre al Equipo 1 para no repetir opciones espejadas.
+# - Estrategia según tamaño (mejores_particiones):
+#   * enumeración completa si las combinaciones son pocas (vectorizada con NumPy si son
+#     todos singles). Resultado exacto y empates en orden de enumeración.
+#   * meet-in-the-middle exacto hasta MAX_JUGADORES_EXACTO jugadores.
+#   * heurística más allá: diferencias de Karmarkar–Karp balanceado (pares consecutivos)
+#     + búsqueda local por intercambios, con reinicios para juntar N opciones distintas.
+# - repartir_en_partidos: pool de varios partidos simultáneos en M partidos x 2 equipos
+#   (semilla greedy + intercambios), minimizando el peor ΔELO.
+
+import bisect
+import heapq
+import itertools
+import random
+from collections import defaultdict
+from math import comb
+from operator import itemgetter
+
+import numpy as np
+
+MAX_JUGADORES_EXACTO = 24       # hasta acá, meet-in-the-middle exacto
+LIMITE_ENUMERACION = 50_000     # combinaciones factibles a enumerar completas (singles: n <= 18)
+REINICIOS_HEURISTICA = 60
+
+_DIFF = itemgetter(0)
+
+
+# -------------------------
+# Enumeración vectorizada (singles)
+# -------------------------
+_MASKS_CACHE = {}
+
+
+def _team1_masks(n: int, k: int):
+    """
+    Matriz 0/1 (C(n-1, k-1) x n): una fila por cada Equipo 1 posible de k jugadores
+    que incluye al jugador 0 (ancla, evita espejadas). Mismo orden que
+    itertools.combinations, así los empates se resuelven igual que antes.
+    """
+    masks = _MASKS_CACHE.get((n, k))
+    if masks is None:
+        combs = np.array(list(itertools.combinations(range(1, n), k - 1)), dtype=np.intp).reshape(-1, k - 1)
+        masks = np.zeros((len(combs), n), dtype=np.int64)
+        masks[:, 0] = 1
+        masks[np.arange(len(combs))[:, None], combs] = 1
+        masks.flags.writeable = False
+        _MASKS_CACHE[(n, k)] = masks
+    return masks
+
+
+def _top_k_indices(diffs, k):
+    """
+    Índices de los k menores diffs ordenados por (diff, índice): mismo resultado que
+    un sort estable completo, pero con partición parcial.
+    """
+    k = min(int(k), len(diffs))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k == len(diffs):
+        return np.argsort(diffs, kind="stable")
+    kth = diffs[np.argpartition(diffs, k - 1)[k - 1]]
+    menores = np.flatnonzero(diffs < kth)
+    empatados = np.flatnonzero(diffs == kth)[:k - len(menores)]
+    sel = np.concatenate([menores, empatados])
+    return sel[np.argsort(diffs[sel], kind="stable")]
+
+
+def _enumerar_singles(elos, anchor, k, n_opciones):
+    n = len(elos)
+    # el ancla pasa a la columna 0 (las máscaras fijan al jugador 0 en el Equipo 1)
+    orden = [anchor] + [i for i in range(n) if i != anchor]
+    e = np.array([elos[i] for i in orden], dtype=np.int64)
+    masks = _team1_masks(n, k)
+    elo1 = masks @ e
+    total = int(e.sum())
+    diffs = np.abs(2 * elo1 - total)
+    top = _top_k_indices(diffs, n_opciones)
+    bits = np.array([1 << j for j in orden], dtype=np.int64)
+    mask_ints = (masks[top] @ bits).tolist()
+    return [(d, e1, total - e1, m) for d, e1, m in zip(diffs[top].tolist(), elo1[top].tolist(), mask_ints)]
+
+
+# -------------------------
+# Bloques como bitmasks
+# -------------------------
+def mascaras_bloques(bloques):
+    """Bitmask (sobre índices de jugador) de cada bloque de más de un jugador."""
+    out = []
+    for b in bloques:
+        if len(b) > 1:
+            m = 0
+            for i in b:
+                m |= 1 << i
+            out.append(m)
+    return out
+
+
+def rompe_bloques(mask1, block_masks) -> bool:
+    """True si algún bloque queda repartido entre los dos equipos (un AND por bloque)."""
+    return any(0 != (mask1 & m) != m for m in block_masks)
+
+
+# -------------------------
+# Enumeración completa por bloques (sólo combinaciones factibles)
+# -------------------------
+def _tabla_factibles(sizes, rest, need):
+    """
+    Subset-sum por tamaño: tabla[j][(r, s)] = cuántas formas hay de elegir r bloques de
+    rest[j:] que sumen s jugadores (s <= need).
+    """
+    m = len(rest)
+    tabla = [None] * (m + 1)
+    tabla[m] = {(0, 0): 1}
+    for j in range(m - 1, -1, -1):
+        sz = sizes[rest[j]]
+        t = dict(tabla[j + 1])
+        for (r, s), c in tabla[j + 1].items():
+            if s + sz <= need:
+                t[(r + 1, s + sz)] = t.get((r + 1, s + sz), 0) + c
+        tabla[j] = t
+    return tabla
+
+
+def _combinaciones_factibles(sizes, rest, need, tabla):
+    """
+    Combinaciones de 'rest' cuyos tamaños suman exactamente 'need', en el mismo orden que
+    recorrer r = 0.. con itertools.combinations, pero visitando sólo las factibles.
+    """
+    m = len(rest)
+
+    def rec(j, r, s, pref):
+        if r == 0:
+            yield tuple(pref)
+            return
+        for jj in range(j, m):
+            sz = sizes[rest[jj]]
+            if sz <= s and (r - 1, s - sz) in tabla[jj + 1]:
+                pref.append(rest[jj])
+                yield from rec(jj + 1, r - 1, s - sz, pref)
+                pref.pop()
+
+    for r in range(m + 1):
+        if (r, need) in tabla[0]:
+            yield from rec(0, r, need, [])
+
+
+def _candidatos_items(items, anchor, k, rest, tabla):
+    """Genera (diff, elo1, elo2, mask) de cada combinación factible, sin materializarlas."""
+    sizes = [it[0] for it in items]
+    total = sum(it[1] for it in items)
+    for combo in _combinaciones_factibles(sizes, rest, k - sizes[anchor], tabla):
+        elo1 = items[anchor][1]
+        mask = items[anchor][2]
+        for i in combo:
+            elo1 += items[i][1]
+            mask |= items[i][2]
+        yield (abs(2 * elo1 - total), elo1, total - elo1, mask)
+
+
+def _top_n(candidatos, n_opciones, key=_DIFF):
+    """
+    Los n_opciones menores por 'key' de un stream de candidatos, con heap acotado
+    (memoria O(n_opciones)). Estable: a igual key gana el que llegó antes, igual que
+    el sort completo que reemplaza.
+    """
+    return heapq.nsmallest(max(0, n_opciones), candidatos, key=key)
+
+
+def _enumerar_items(items, anchor, k, n_opciones, rest, tabla):
+    """Top n_opciones entre todas las combinaciones factibles (ancla en el Equipo 1)."""
+    return _top_n(_candidatos_items(items, anchor, k, rest, tabla), n_opciones)
+
+
+# -------------------------
+# Meet-in-the-middle exacto
+# -------------------------
+def _subconjuntos(items):
+    """Lista de (tamaño, elo, mask) para todos los subconjuntos de items."""
+    subs = [(0, 0, 0)]
+    for size, elo, mask in items:
+        subs += [(s + size, e + elo, m | mask) for s, e, m in subs]
+    return subs
+
+
+def _meet_in_the_middle(items, anchor, k, n_opciones):
+    total = sum(it[1] for it in items)
+    rest = [items[i] for i in range(len(items)) if i != anchor]
+    mitad = len(rest) // 2
+    a_size, a_elo, a_mask = items[anchor]
+    izq = [(s + a_size, e + a_elo, m | a_mask) for s, e, m in _subconjuntos(rest[:mitad]) if s + a_size <= k]
+
+    # derecha agrupada por tamaño y ordenada por ELO
+    der = {}
+    for s, e, m in _subconjuntos(rest[mitad:]):
+        if s <= k:
+            der.setdefault(s, []).append((e, m))
+    der_elos = {}
+    for s, lst in der.items():
+        lst.sort()
+        der_elos[s] = [e for e, _ in lst]
+
+    # k mejores pares (izq, der) por |2*(eL+eR) - total| con dos punteros por elemento izquierdo
+    heap = []
+    for li, (s, e, _m) in enumerate(izq):
+        falta = k - s
+        if falta not in der:
+            continue
+        objetivo = total / 2.0 - e
+        pos = bisect.bisect_left(der_elos[falta], objetivo)
+        for j, paso in ((pos, 1), (pos - 1, -1)):
+            if 0 <= j < len(der[falta]):
+                e1 = e + der[falta][j][0]
+                heap.append((abs(2 * e1 - total), izq[li][2] | der[falta][j][1], li, j, paso))
+    heapq.heapify(heap)
+
+    out = []
+    while heap and len(out) < n_opciones:
+        diff, mask, li, j, paso = heapq.heappop(heap)
+        s, e, _m = izq[li]
+        e1 = e + der[k - s][j][0]
+        out.append((diff, e1, total - e1, mask))
+        j2 = j + paso
+        lst = der[k - s]
+        if 0 <= j2 < len(lst):
+            e2 = e + lst[j2][0]
+            heapq.heappush(heap, (abs(2 * e2 - total), izq[li][2] | lst[j2][1], li, j2, paso))
+    return out
+
+
+# -------------------------
+# Heurística: Karmarkar–Karp balanceado + búsqueda local
+# -------------------------
+def _kk_balanceado(valores, offset=0):
+    """
+    Reparte los índices de 'valores' (cantidad par) en dos mitades de igual tamaño
+    minimizando |offset + suma(A) - suma(B)|: se ordena, se arman pares consecutivos
+    (uno a cada lado) y se combinan sus diferencias con Karmarkar–Karp.
+    Devuelve (A, B) con A del lado que suma al offset.
+    """
+    orden = sorted(range(len(valores)), key=lambda i: -valores[i])
+    heap, t = [], 0
+    for j in range(0, len(orden) - 1, 2):
+        a, b = orden[j], orden[j + 1]
+        heap.append((-(valores[a] - valores[b]), t, [a], [b]))
+        t += 1
+    if offset:
+        # nodo fijo: el lado "A" representa al Equipo 1 (marcador -1)
+        heap.append((-abs(offset), t, [-1] if offset > 0 else [], [] if offset > 0 else [-1]))
+        t += 1
+    if not heap:
+        return [], []
+    heapq.heapify(heap)
+    while len(heap) > 1:
+        v1, _, a1, b1 = heapq.heappop(heap)
+        v2, _, a2, b2 = heapq.heappop(heap)
+        heapq.heappush(heap, (v1 - v2, t, a1 + b2, b1 + a2))  # |L1 - L2|, pesado1 con liviano2
+        t += 1
+    _, _, a, b = heap[0]
+    if offset and -1 in b:
+        a, b = b, a
+    return [i for i in a if i >= 0], [i for i in b if i >= 0]
+
+
+def _repartir_bloques(multis, k):
+    """Elige qué bloques multi-jugador van al Equipo 1 (DP de tamaños) para que ningún lado pase de k."""
+    tot = sum(len(b) for b in multis)
+    alcanzable = {0: []}
+    for bi, b in enumerate(multis):
+        for s, sel in list(alcanzable.items()):
+            s2 = s + len(b)
+            if s2 <= k and s2 not in alcanzable:
+                alcanzable[s2] = sel + [bi]
+    validos = [s for s in alcanzable if tot - s <= k]
+    if not validos:
+        return None
+    s1 = min(validos, key=lambda s: abs(2 * s - tot))
+    return set(alcanzable[s1])
+
+
+def _busqueda_local(t1, t2, elos, bloques_de):
+    """
+    Intercambios que bajan |ELO1 - ELO2| hasta no poder mejorar: single<->single
+    (mejor par vía bisect) y bloque<->bloque del mismo tamaño.
+    """
+    def suma(ts):
+        return sum(elos[i] for i in ts)
+
+    while True:
+        d = suma(t1) - suma(t2)
+        mejor = (abs(d), None)
+        s1 = [i for i in t1 if len(bloques_de[i]) == 1]
+        s2 = sorted((elos[j], j) for j in t2 if len(bloques_de[j]) == 1)
+        e2 = [e for e, _ in s2]
+        for i in s1:
+            # d' = d - 2*(ei - ej): buscar ej ~ ei - d/2
+            pos = bisect.bisect_left(e2, elos[i] - d / 2.0)
+            for p in (pos - 1, pos):
+                if 0 <= p < len(s2):
+                    nd = abs(d - 2 * (elos[i] - s2[p][0]))
+                    if nd < mejor[0]:
+                        mejor = (nd, ([i], [s2[p][1]]))
+        vistos1 = {bloques_de[i] for i in t1 if len(bloques_de[i]) > 1}
+        vistos2 = {bloques_de[j] for j in t2 if len(bloques_de[j]) > 1}
+        for b1 in vistos1:
+            for b2 in vistos2:
+                if len(b1) != len(b2):
+                    continue
+                nd = abs(d - 2 * (sum(elos[i] for i in b1) - sum(elos[j] for j in b2)))
+                if nd < mejor[0]:
+                    mejor = (nd, (list(b1), list(b2)))
+        if mejor[1] is None:
+            return t1, t2
+        sale, entra = mejor[1]
+        t1 = (t1 - set(sale)) | set(entra)
+        t2 = (t2 - set(entra)) | set(sale)
+
+
+def _heuristica(elos, bloques, anchor, k, n_opciones, seed=0):
+    n = len(elos)
+    bloques_de = {}
+    for b in bloques:
+        tb = tuple(b)
+        for i in b:
+            bloques_de[i] = tb
+    multis = [b for b in bloques if len(b) > 1]
+    singles = [b[0] for b in bloques if len(b) == 1]
+    en_t1 = _repartir_bloques(multis, k)
+    if en_t1 is None:
+        return []
+    rng = random.Random(seed)
+    full = (1 << n) - 1
+    anchor_bit = 1 << bloques[anchor][0]
+    total = sum(elos)
+
+    def arranque(perturbar):
+        t1 = {i for bi, b in enumerate(multis) if bi in en_t1 for i in b}
+        t2 = {i for bi, b in enumerate(multis) if bi not in en_t1 for i in b}
+        libres = singles[:]
+        if perturbar:
+            rng.shuffle(libres)
+            c1 = k - len(t1)
+            return t1 | set(libres[:c1]), t2 | set(libres[c1:])
+        # los singles que sobran por tamaños desparejos van primero (los de menor ELO)
+        libres.sort(key=lambda i: elos[i])
+        while len(libres) > 0 and (k - len(t1)) != (k - len(t2)):
+            (t1 if len(t1) < len(t2) else t2).add(libres.pop(0))
+        off = sum(elos[i] for i in t1) - sum(elos[i] for i in t2)
+        a, b = _kk_balanceado([elos[i] for i in libres], offset=off)
+        t1 |= {libres[i] for i in a}
+        t2 |= {libres[i] for i in b}
+        return t1, t2
+
+    vistas = {}
+
+    def agregar(t1):
+        mask = 0
+        for i in t1:
+            mask |= 1 << i
+        if not mask & anchor_bit:
+            mask = full ^ mask
+        if mask not in vistas:
+            e1 = sum(elos[i] for i in range(n) if mask >> i & 1)
+            vistas[mask] = (abs(2 * e1 - total), e1, total - e1, mask)
+
+    for intento in range(REINICIOS_HEURISTICA):
+        t1, t2 = _busqueda_local(*arranque(intento > 0), elos, bloques_de)
+        agregar(t1)
+        # vecinos a un intercambio de singles: alternativas cercanas al óptimo local
+        for i in [x for x in t1 if len(bloques_de[x]) == 1]:
+            for j in [y for y in t2 if len(bloques_de[y]) == 1]:
+                agregar((t1 - {i}) | {j})
+
+    return _top_n(vistas.values(), n_opciones, key=lambda c: (c[0], c[3]))
+
+
+# -------------------------
+# API
+# -------------------------
+def mejores_particiones(elos, bloques, jugadores_por_equipo, n_opciones=12, anchor=0):
+    """
+    Top n_opciones particiones en dos equipos de 'jugadores_por_equipo' ordenadas por ΔELO.
+
+    elos: ELO (int) por índice de jugador.
+    bloques: listas de índices indivisibles (cada jugador en exactamente un bloque).
+    anchor: índice (en 'bloques') del bloque que va fijo al Equipo 1.
+    Devuelve lista de (diff, elo1, elo2, mask_equipo1).
+    """
+    k = int(jugadores_por_equipo)
+    n = len(elos)
+    if n == 0 or n != 2 * k or not bloques or len(bloques[anchor]) > k or n_opciones <= 0:
+        return []
+    elos = [int(e) for e in elos]
+
+    if all(len(b) == 1 for b in bloques):
+        if len(bloques) == n and comb(n - 1, k - 1) <= LIMITE_ENUMERACION:
+            if [b[0] for b in bloques] == list(range(n)):
+                return _enumerar_singles(elos, anchor, k, n_opciones)
+
+    items = []
+    for b in bloques:
+        mask = 0
+        for i in b:
+            mask |= 1 << i
+        items.append((len(b), sum(elos[i] for i in b), mask))
+
+    rest = [i for i in range(len(items)) if i != anchor]
+    need = k - items[anchor][0]
+    tabla = _tabla_factibles([it[0] for it in items], rest, need)
+    factibles = sum(c for (r, s), c in tabla[0].items() if s == need)
+    if factibles == 0:
+        return []
+    if factibles <= LIMITE_ENUMERACION:
+        return _enumerar_items(items, anchor, k, n_opciones, rest, tabla)
+    if n <= MAX_JUGADORES_EXACTO:
+        return _meet_in_the_middle(items, anchor, k, n_opciones)
+    return _heuristica(elos, [list(b) for b in bloques], anchor, k, n_opciones)
+
+
+# -------------------------
+# Varios partidos simultáneos (pool compartido)
+# -------------------------
+REINICIOS_MULTI = 20
+
+
+def _objetivo_multi(sumas):
+    diffs = [abs(sumas[2 * m] - sumas[2 * m + 1]) for m in range(len(sumas) // 2)]
+    return (max(diffs), sum(diffs))
+
+
+def _semilla_multi(valores, tamaños_b, caps, orden, limite=None):
+    """
+    Greedy: cada bloque (en 'orden') al equipo con menor suma que tenga lugar y cuyo
+    partido no haya llegado a limite[tamaño] bloques de ese tamaño.
+    """
+    limite = limite or {}
+    eq = [None] * len(valores)
+    sumas = [0] * len(caps)
+    libres = list(caps)
+    usados = defaultdict(int)  # (partido, tamaño) -> bloques
+    for b in orden:
+        s = tamaños_b[b]
+        cand = [t for t in range(len(caps))
+                if libres[t] >= s and usados[(t // 2, s)] < limite.get(s, len(valores))]
+        if not cand:
+            return None, None
+        t = min(cand, key=lambda t: (sumas[t], -libres[t]))
+        eq[b] = t
+        sumas[t] += valores[b]
+        libres[t] -= s
+        usados[(t // 2, s)] += 1
+    return eq, sumas
+
+
+def _local_multi(valores, tamaños_b, eq, sumas):
+    """Mejor intercambio de bloques del mismo tamaño entre equipos, hasta no mejorar."""
+    B = len(valores)
+    actual = _objetivo_multi(sumas)
+    while True:
+        mejor = None
+        for a in range(B):
+            for b in range(a + 1, B):
+                ta, tb = eq[a], eq[b]
+                if ta == tb or tamaños_b[a] != tamaños_b[b] or valores[a] == valores[b]:
+                    continue
+                d = valores[a] - valores[b]
+                sumas[ta] -= d
+                sumas[tb] += d
+                obj = _objetivo_multi(sumas)
+                sumas[ta] += d
+                sumas[tb] -= d
+                if obj < actual and (mejor is None or obj < mejor[0]):
+                    mejor = (obj, a, b, d)
+        if mejor is None:
+            return eq, sumas, actual
+        actual, a, b, d = mejor
+        sumas[eq[a]] -= d
+        sumas[eq[b]] += d
+        eq[a], eq[b] = eq[b], eq[a]
+
+
+def repartir_en_partidos(elos, bloques, tamaños, seed=0, reinicios=REINICIOS_MULTI, limite=None):
+    """
+    Reparte el pool en len(tamaños) partidos de 2 equipos (tamaños[m] jugadores por lado)
+    minimizando el peor ΔELO entre partidos (desempate: suma de ΔELO).
+    - semilla greedy: bloques de mayor a menor (tamaño, ELO) al equipo con menor suma;
+      limite = {tamaño: máximo de bloques de ese tamaño por partido} (p. ej. {2: 2, 3: 2})
+    - búsqueda local: intercambios de bloques del mismo tamaño entre equipos distintos
+      (no cambia cuántos bloques de cada tamaño tiene cada partido)
+    - reinicios con el orden de la semilla perturbado
+    Devuelve (equipos, (peor_diff, suma_diffs)): equipos[2m] y equipos[2m+1] son el
+    partido m (listas de índices). (None, None) si los bloques no encajan en los tamaños.
+    """
+    elos = [int(e) for e in elos]
+    caps = [int(k) for k in tamaños for _ in (0, 1)]
+    if not bloques or sum(caps) != len(elos):
+        return None, None
+    valores = [sum(elos[i] for i in b) for b in bloques]
+    tamaños_b = [len(b) for b in bloques]
+    base = sorted(range(len(bloques)), key=lambda b: (-tamaños_b[b], -valores[b]))
+    rng = random.Random(seed)
+
+    mejor = None
+    for intento in range(max(1, reinicios)):
+        orden = base[:]
+        if intento:
+            # perturba dentro de cada tamaño (los grandes siguen primero para que encajen)
+            for s in set(tamaños_b):
+                pos = [i for i, b in enumerate(orden) if tamaños_b[b] == s]
+                vals = [orden[i] for i in pos]
+                rng.shuffle(vals)
+                for i, b in zip(pos, vals):
+                    orden[i] = b
+        eq, sumas = _semilla_multi(valores, tamaños_b, caps, orden, limite)
+        if eq is None:
+            continue
+        eq, sumas, obj = _local_multi(valores, tamaños_b, eq, sumas)
+        if mejor is None or obj < mejor[0]:
+            mejor = (obj, eq[:])
+        if mejor[0][0] == 0:
+            break
+    if mejor is None:
+        return None, None
+
+    obj, eq = mejor
+    equipos = [[] for _ in caps]
+    for b, t in enumerate(eq):
+        equipos[t].extend(bloques[b])
+    return [sorted(e) for e in equipos], obj
+
+
+# -------------------------
+# Sugerencias de intercambio (equipos ya armados)
+# -------------------------
+def _grupos_de_unidades(unidades, valores, dobles):
+    """(tamaño, valor, índices de unidad) de cada unidad sola y, si 'dobles', de cada par."""
+    out = [(len(u), valores[i], (i,)) for i, u in enumerate(unidades)]
+    if dobles:
+        for a, b in itertools.combinations(range(len(unidades)), 2):
+            out.append((len(unidades[a]) + len(unidades[b]), valores[a] + valores[b], (a, b)))
+    return out
+
+
+def sugerir_intercambios(elos, equipo1, bloques, n_sugerencias=5, dobles=True):
+    """
+    Mejores intercambios (simples: una unidad por otra; dobles: dos por dos o un bloque
+    por dos singles) que bajan el ΔELO de una formación ya armada, sin romper bloques.
+
+    elos: ELO por índice de jugador; equipo1: índices del Equipo 1 (el resto es el 2);
+    bloques: listas de índices indivisibles (las "unidades" que se intercambian).
+    Con D = S1 - S2, cambiar A (Equipo 1) por B (Equipo 2) deja D - 2·(A - B): se busca
+    B ≈ A - D/2 con bisect sobre los grupos del Equipo 2 ordenados (O(n² log n) con dobles).
+    Devuelve [(nuevo_diff, sale_de_1, sale_de_2)] (tuplas de índices de jugador), ordenadas.
+    """
+    t1 = set(equipo1)
+    elos = [int(e) for e in elos]
+    D = sum(elos[i] for i in t1) - sum(elos[i] for i in range(len(elos)) if i not in t1)
+    u1 = [list(b) for b in bloques if b and b[0] in t1]
+    u2 = [list(b) for b in bloques if b and b[0] not in t1]
+    v1 = [sum(elos[i] for i in u) for u in u1]
+    v2 = [sum(elos[i] for i in u) for u in u2]
+
+    por_tamaño = defaultdict(list)
+    for size, val, us in _grupos_de_unidades(u2, v2, dobles):
+        por_tamaño[size].append((val, us))
+    for lst in por_tamaño.values():
+        lst.sort()
+    claves = {s: [v for v, _ in lst] for s, lst in por_tamaño.items()}
+
+    n_sug = max(0, n_sugerencias)
+    heap = []  # max-heap acotado por -nuevo_diff
+    vistos = set()
+    for size, a, us1 in _grupos_de_unidades(u1, v1, dobles):
+        lst = por_tamaño.get(size)
+        if not lst:
+            continue
+        # objetivo B = A - D/2  ->  2B = 2A - D (enteros)
+        pos = bisect.bisect_left(claves[size], (2 * a - D) / 2)
+        for j in range(max(0, pos - n_sug), min(len(lst), pos + n_sug)):
+            b, us2 = lst[j]
+            nuevo = abs(D - 2 * (a - b))
+            if nuevo >= abs(D):
+                continue
+            sale1 = tuple(sorted(i for u in us1 for i in u1[u]))
+            sale2 = tuple(sorted(i for u in us2 for i in u2[u]))
+            if (sale1, sale2) in vistos:
+                continue
+            vistos.add((sale1, sale2))
+            item = (-nuevo, -len(sale1), sale1, sale2)
+            if len(heap) < n_sug:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+    return [(-d, s1, s2) for d, _l, s1, s2 in sorted(heap, reverse=True)]
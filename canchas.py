@@ -40,38 +40,6 @@ def _render_flash():
 # NÚMERO PÚBLICO para canchas
 # =====================
 
-def _ensure_schema():
-    """Asegura columna numero_publico y la completa si está vacía.
-    También crea un índice único para evitar duplicados.
-    """
-    with get_connection() as conn:
-        cur = conn.cursor()
-        # ¿Existe la columna numero_publico?
-        cur.execute("PRAGMA table_info('canchas')")
-        cols = {r[1] for r in cur.fetchall()}  # r[1] = name
-        if "numero_publico" not in cols:
-            cur.execute("ALTER TABLE canchas ADD COLUMN numero_publico INTEGER")
-            conn.commit()
-        # Índice único para el número público
-        cur.execute(
-            "CREATE UNIQUE INDEX IF NOT EXISTS idx_canchas_numero_publico ON canchas(numero_publico)"
-        )
-        conn.commit()
-        # Completar números faltantes (sin renumerar existentes)
-        cur.execute("SELECT numero_publico FROM canchas WHERE numero_publico IS NOT NULL")
-        used = {r[0] for r in cur.fetchall()}
-        cur.execute("SELECT id FROM canchas WHERE numero_publico IS NULL ORDER BY id ASC")
-        to_assign = [r[0] for r in cur.fetchall()]
-        for cid in to_assign:
-            n = _next_public_number_from_set(used)
-            cur.execute(
-                "UPDATE canchas SET numero_publico = ? WHERE id = ?",
-                (n, cid),
-            )
-            used.add(n)
-        conn.commit()
-
-
 def _next_public_number_from_set(used: set) -> int:
     n = 1
     while n in used:
@@ -103,7 +71,6 @@ def _listar_canchas():
 # =====================
 
 def panel_canchas():
-    _ensure_schema()
     st.subheader("Gestión de canchas 🏟️")
     _render_flash()  # muestra mensajes persistentes si existen
 
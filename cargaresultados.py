@@ -2,8 +2,10 @@ from db import get_connection
 # cargaresultados.py
 import streamlit as st
 import sqlite3
-from datetime import datetime
 import equipos
+import elo_service  # reglas de ELO y registro de resultados (sin UI)
+import motores_rating
+from scheduler import JUGADORES_POR_EQUIPO
 
 DB_NAME = "elo_futbol.db"
 
@@ -15,15 +17,6 @@ def get_connection():
     return conn
 
 
-# --- ELO: cálculo a nivel equipo (sin redondear aquí) ---
-def calcular_elo(elo_a, elo_b, score_a, score_b, K):
-    exp_a = 1 / (1 + 10 ** ((elo_b - elo_a) / 400))
-    exp_b = 1 - exp_a
-    new_a = elo_a + K * (score_a - exp_a)
-    new_b = elo_b + K * (score_b - exp_b)
-    return new_a, new_b  # floats
-
-
 def _flash_show_and_clear():
     msg = st.session_state.pop("_flash_msg", None)
     typ = st.session_state.pop("_flash_type", "info") if msg else None
@@ -42,39 +35,37 @@ def _get_partidos_listos():
     """
     Partidos listos para registrar:
     - tipo = 'abierto'
-    - equipos confirmados (10 jugadores asignados a equipo 1/2)
-    - camisetas asignadas y uniformes por equipo
+    - equipos confirmados (2 x jugadores_por_equipo asignados a equipo 1/2)
+    - camisetas asignadas en los dos equipos
     - SIN resultado (ganador y diferencia_gol NULL)
+    Una sola consulta agregada (ver tools/check_partidos_listos.py).
     """
     conn = get_connection()
     cur = conn.cursor()
     cur.execute(
         """
-        SELECT DISTINCT p.id,
-                        p.fecha,
-                        IFNULL(c.nombre,'Sin asignar') AS cancha,
-                        p.ganador,
-                        p.diferencia_gol
+        SELECT p.id,
+               p.fecha,
+               IFNULL(c.nombre,'Sin asignar') AS cancha
           FROM partidos p
           JOIN partido_jugadores pj ON pj.partido_id = p.id
      LEFT JOIN canchas c ON c.id = p.cancha_id
          WHERE p.tipo = 'abierto'
+           AND p.ganador IS NULL
+           AND p.diferencia_gol IS NULL
+      GROUP BY p.id
+        HAVING SUM(pj.equipo IN (1, 2)) =
+               2 * (CASE WHEN p.jugadores_por_equipo > 0 THEN p.jugadores_por_equipo ELSE ? END)
+           AND SUM(pj.equipo = 1 AND lower(pj.camiseta) IN ('clara', 'oscura')) > 0
+           AND SUM(pj.equipo = 2 AND lower(pj.camiseta) IN ('clara', 'oscura')) > 0
       ORDER BY p.fecha DESC, p.id DESC
-    """
+    """,
+        (JUGADORES_POR_EQUIPO,),
     )
     rows = cur.fetchall()
     conn.close()
 
-    opciones = []
-    for p in rows:
-        conf, _, _, _, _ = equipos.equipos_ya_confirmados(p["id"])
-        cam1 = equipos.obtener_camiseta_equipo(p["id"], 1)
-        cam2 = equipos.obtener_camiseta_equipo(p["id"], 2)
-        sin_resultado = (p["ganador"] is None) and (p["diferencia_gol"] is None)
-        if conf and cam1 and cam2 and sin_resultado:
-            etiqueta = "ID %s - %s - %s" % (p["id"], p["fecha"], p["cancha"])
-            opciones.append((p["id"], etiqueta))
-    return opciones
+    return [(p["id"], "ID %s - %s - %s" % (p["id"], p["fecha"], p["cancha"])) for p in rows]
 
 
 def _ultimo_partido_con_resultado():
@@ -99,65 +90,13 @@ def _ultimo_partido_con_resultado():
 
 def _deshacer_partido(partido_id: int):
     """
-    Deshace resultado:
-    - si fue oficial: restaura ELOs desde historial_elo y borra historial del partido
-    - limpia ganador/diferencia_gol
-    - deja es_oficial = 0 (por NOT NULL)
-    - reabre el partido: tipo = 'abierto'
+    Deshace resultado (elo_service.deshacer_resultado):
+    - limpia ganador/diferencia_gol, deja es_oficial = 0 y reabre el partido
+    - si fue oficial: recalcula el ELO de ese partido en adelante (no sólo el
+      elo_antes de este partido), así los oficiales posteriores quedan consistentes
     """
-    conn = get_connection()
-    cur = conn.cursor()
-
-    cur.execute("SELECT es_oficial FROM partidos WHERE id = ?", (partido_id,))
-    row = cur.fetchone()
-    if not row:
-        conn.close()
-        raise RuntimeError("Partido inexistente.")
-    es_oficial = row["es_oficial"]
-
-    # Si fue oficial, revertimos ELO y borramos historial de ese partido
-    if es_oficial == 1:
-        cur.execute(
-            "SELECT jugador_id, elo_antes FROM historial_elo WHERE partido_id = ?",
-            (partido_id,),
-        )
-        for r in cur.fetchall():
-            cur.execute(
-                "UPDATE jugadores SET elo_actual = ? WHERE id = ?",
-                (r["elo_antes"], r["jugador_id"]),
-            )
-        cur.execute(
-            "DELETE FROM historial_elo WHERE partido_id = ?",
-            (partido_id,),
-        )
-
-    # En todos los casos limpiamos el resultado y reabrimos el partido
-    cur.execute(
-        """
-        UPDATE partidos
-           SET ganador = NULL,
-               diferencia_gol = NULL,
-               es_oficial = 0,
-               resultado_cargado_por = NULL,
-               tipo = 'abierto'
-         WHERE id = ?
-        """,
-        (partido_id,),
-    )
-    conn.commit()
-    conn.close()
-
-
-# --- helper: cuenta partidos oficiales jugados de un jugador ---
-def _partidos_oficiales_jugador(conn, jugador_id: int) -> int:
-    cur = conn.cursor()
-    # historial_elo sólo se llena en oficiales
-    cur.execute(
-        "SELECT COUNT(*) AS c FROM historial_elo WHERE jugador_id = ?",
-        (jugador_id,),
-    )
-    row = cur.fetchone()
-    return int(row["c"] if row and row["c"] is not None else 0)
+    elo_service.deshacer_resultado(partido_id)
+    motores_rating.actualizar_motor_configurado()
 
 
 def panel_resultados():
@@ -237,11 +176,7 @@ def panel_resultados():
 
         if clicked:
             try:
-                conn = get_connection()
-                cur = conn.cursor()
-
-                # Determinar ganador y ajustar diferencia para empate
-                is_empate = "Empate" in resultado
+                # Determinar ganador (empate: dif 0)
                 if "Equipo 1" in resultado:
                     ganador = 1
                 elif "Equipo 2" in resultado:
@@ -250,8 +185,6 @@ def panel_resultados():
                     ganador = None
                     dif_goles = 0
 
-                es_oficial_flag = 1 if oficial == "Oficial" else 0
-
                 # Registrar quién cargó el resultado
                 admin_username = "desconocido"
                 try:
@@ -264,92 +197,17 @@ def panel_resultados():
                 except:
                     pass
 
-                # Actualizar partidos
-                cur.execute(
-                    """
-                    UPDATE partidos
-                       SET ganador = ?,
-                           diferencia_gol = ?,
-                           es_oficial = ?,
-                           resultado_cargado_por = ?
-                     WHERE id = ?
-                    """,
-                    (ganador, dif_goles, es_oficial_flag, admin_username, partido_id),
+                # partido + cierre + (si es oficial) ELO e historial_elo, en una transacción
+                elo_service.registrar_resultado(
+                    partido_id,
+                    ganador,
+                    dif_goles,
+                    oficial == "Oficial",
+                    cargado_por=admin_username,
+                    regla=elo_service.reglas(k=st.session_state.get("K_val", elo_service.REGLAS_DEFAULT["k"])),
                 )
-                conn.commit()
-
-                # Cerrar partido
-                cur.execute("UPDATE partidos SET tipo = 'cerrado' WHERE id = ?", (partido_id,))
-                conn.commit()
-
-                # SOLO si es oficial → calcular ELO + historial_elo
                 if oficial == "Oficial":
-                    jugadores = equipos.obtener_jugadores_partido_full(partido_id)
-                    team1 = [j for j in jugadores if j["equipo"] == 1]
-                    team2 = [j for j in jugadores if j["equipo"] == 2]
-                    n1 = max(1, len(team1))
-                    n2 = max(1, len(team2))
-
-                    # promedios
-                    elo1 = sum(j["elo"] for j in team1) / n1
-                    elo2 = sum(j["elo"] for j in team2) / n2
-
-                    # scores
-                    if is_empate:
-                        score1, score2 = 0.5, 0.5
-                    elif ganador == 1:
-                        score1, score2 = 1.0, 0.0
-                    else:
-                        score1, score2 = 0.0, 1.0
-
-                    # factor multiplicador por diferencia de gol
-                    K_base = st.session_state.get("K_val", 80)
-                    factor = 1.0
-                    if dif_goles >= 6:
-                        factor = 1.8
-                    elif dif_goles >= 3:
-                        factor = 1.3
-                    K_team = float(K_base) * factor
-
-                    # cálculo ELO de equipos
-                    new1, new2 = calcular_elo(elo1, elo2, score1, score2, K_team)
-                    diff1, diff2 = new1 - elo1, new2 - elo2
-
-                    # reparto por jugador
-                    delta1 = diff1 / n1
-                    delta2 = diff2 / n2
-
-                    # actualizar ELO jugador x jugador
-                    for j in team1 + team2:
-                        elo_pre = j["elo"]
-                        delta = delta1 if j in team1 else delta2
-
-                        prev_oficiales = _partidos_oficiales_jugador(conn, j["jugador_id"])
-                        if prev_oficiales < 5:
-                            delta *= 1.25
-
-                        elo_post = round(elo_pre + delta)
-
-                        cur.execute(
-                            "UPDATE jugadores SET elo_actual = ? WHERE id = ?",
-                            (elo_post, j["jugador_id"]),
-                        )
-                        cur.execute(
-                            """
-                            INSERT INTO historial_elo (jugador_id, partido_id, elo_antes, elo_despues, fecha)
-                            VALUES (?, ?, ?, ?, ?)
-                            """,
-                            (
-                                j["jugador_id"],
-                                partido_id,
-                                elo_pre,
-                                elo_post,
-                                datetime.now().isoformat(),
-                            ),
-                        )
-                    conn.commit()
-
-                conn.close()
+                    motores_rating.actualizar_motor_configurado()
 
                 st.session_state["_last_registered_id"] = partido_id
                 st.session_state["_flash_msg"] = (
@@ -14,18 +14,6 @@ def ensure_admin_user():
 
     with get_connection() as conn:
         cur = conn.cursor()
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS usuarios (
-              id INTEGER PRIMARY KEY AUTOINCREMENT,
-              username TEXT UNIQUE,
-              password_hash TEXT,
-              rol TEXT,
-              jugador_id INTEGER,
-              grupos INTEGER
-            )
-        """)
-        conn.commit()
-
         cur.execute("SELECT id, password_hash, rol, grupos FROM usuarios WHERE username = ? LIMIT 1", (username,))
         row = cur.fetchone()
 
@@ -1,6 +1,8 @@
 # db.py (reemplazo de get_connection + helpers)
 
-import os, sqlite3
+import logging, os, re, sqlite3, threading, time
+
+_log = logging.getLogger(__name__)
 
 def _get_secret(name: str):
     v = os.getenv(name)
@@ -11,86 +13,648 @@ def _get_secret(name: str):
     except Exception:
         return None
 
-# --- NUEVO: filas dict-like que también aceptan índice numérico ---
-class RowLike(dict):
-    __slots__ = ("_values",)
-    def __init__(self, cols, values):
-        super().__init__(zip(cols, values))
-        self._values = tuple(values)
-    def __getitem__(self, key):
-        if isinstance(key, int):
-            return self._values[key]
-        return super().__getitem__(key)
-
-def _to_rowlike(cur, row):
-    if row is None:
-        return None
-    cols = [d[0] for d in cur.description]
-    # sqlite3.Row o dict ya mapeable
+def _int_secret(name: str, default: int) -> int:
     try:
-        d = dict(row)
-        # asegurar orden de columnas para índice numérico
-        vals = [d.get(c) for c in cols]
-        return RowLike(cols, vals)
+        v = _get_secret(name)
+        return int(v) if v not in (None, "") else default
     except Exception:
-        # tupla: mapear por descripción
-        return RowLike(cols, row)
+        return default
 
-def _to_rowlikes(cur, rows):
-    cols = [d[0] for d in cur.description]
-    out = []
-    for r in rows:
+# --- NUEVO: filas livianas que aceptan r["col"] y r[0] ---
+# El mapa columna -> índice se arma una vez por resultado y lo comparten todas
+# las filas; cada fila es sólo la tupla que devolvió el driver (sin dict ni copia).
+class RowLike:
+    __slots__ = ("_index", "_values")
+    def __init__(self, index, values):
+        self._index = index
+        self._values = values
+    def __getitem__(self, key):
+        if isinstance(key, (int, slice)):
+            return self._values[key]
+        return self._values[self._index[key]]
+    def get(self, key, default=None):
+        i = self._index.get(key)
+        return default if i is None else self._values[i]
+    def keys(self):
+        return list(self._index)
+    def values(self):
+        return list(self._values)
+    def items(self):
+        return list(zip(self._index, self._values))
+    def __len__(self):
+        return len(self._values)
+    # como sqlite3.Row: iterar/desempaquetar da valores; `in` pregunta por columna
+    def __iter__(self):
+        return iter(self._values)
+    def __contains__(self, key):
+        return key in self._index
+    def __eq__(self, other):
+        if isinstance(other, RowLike):
+            return self._index.keys() == other._index.keys() and self._values == other._values
+        return NotImplemented
+    __hash__ = None
+    def __repr__(self):
+        return "RowLike(%r)" % dict(self.items())
+
+# sqlite3.Row nativo (lo arma el driver en C) + .get() para compatibilidad
+class SqliteRow(sqlite3.Row):
+    def get(self, key, default=None):
         try:
-            d = dict(r)
-            vals = [d.get(c) for c in cols]
-            out.append(RowLike(cols, vals))
-        except Exception:
-            out.append(RowLike(cols, r))
-    return out
+            return self[key]
+        except (IndexError, KeyError):
+            return default
+
+def _column_index(cur):
+    return {d[0]: i for i, d in enumerate(cur.description or ())}
 
 class DictCursor:
-    def __init__(self, inner):
+    def __init__(self, inner, owner=None):
         self._cur = inner
+        self._owner = owner  # el ConnProxy sigue vivo (y prestado) mientras viva el cursor
+        self._desc = None
+        self._index = None
     # delegación
     def __getattr__(self, name):
         return getattr(self._cur, name)
+    def _row_index(self):
+        desc = self._cur.description
+        if desc is not self._desc:
+            self._desc = desc
+            self._index = _column_index(self._cur)
+        return self._index
+    def _wrap(self, rows):
+        if not rows or isinstance(rows[0], sqlite3.Row):
+            return rows  # fast path SQLite: ya son filas nativas
+        index = self._row_index()
+        return [RowLike(index, r) for r in rows]
     # envoltorio de fetch*
     def fetchone(self):
-        return _to_rowlike(self._cur, self._cur.fetchone())
+        row = self._cur.fetchone()
+        if row is None or isinstance(row, sqlite3.Row):
+            return row
+        return RowLike(self._row_index(), row)
     def fetchall(self):
-        return _to_rowlikes(self._cur, self._cur.fetchall())
+        return self._wrap(self._cur.fetchall())
+    def fetchmany(self, *a):
+        return self._wrap(self._cur.fetchmany(*a))
+    def __iter__(self):
+        return iter(self.fetchall())
+
+# --- NUEVO: pool de conexiones por proceso ---
+# Streamlit re-ejecuta el script en cada interacción y cada helper pide su propia
+# conexión; abrir una nueva (o un embedded replica de libsql) por query es caro.
+# El pool mantiene hasta `size` conexiones vivas y las reparte con checkout/checkin.
+# Config (env o st.secrets): DB_POOL_SIZE (5), DB_POOL_TIMEOUT seg. (10),
+# DB_POOL_PING_AFTER seg. de inactividad antes de validar con SELECT 1 (30).
+class ConnectionPool:
+    def __init__(self, factory, size=5, timeout=10.0, ping_after=30.0):
+        self._factory = factory
+        self.size = max(1, int(size))
+        self.timeout = float(timeout)
+        self.ping_after = float(ping_after)
+        self._idle = []          # [(conn, último uso)]
+        self._open = 0           # conexiones del pool (ociosas + prestadas)
+        self._overflow = set()   # ids de conexiones fuera de cupo (se cierran al devolver)
+        self._cond = threading.Condition()
+
+    def _healthy(self, conn) -> bool:
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def checkout(self):
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._open < self.size:
+                    self._open += 1
+                    conn, last_used = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    # pool agotado (p.ej. conexiones que nadie cerró): no trabamos la UI,
+                    # damos una conexión extra que se cierra al devolverla
+                    _log.warning("pool agotado (%d) más de %.0fs: conexión extra", self.size, self.timeout)
+                    conn = self._factory()
+                    self._overflow.add(id(conn))
+                    return conn
+                self._cond.wait(remaining)
+
+        if conn is None:
+            try:
+                return self._factory()
+            except Exception:
+                with self._cond:
+                    self._open -= 1
+                    self._cond.notify()
+                raise
+
+        # health check sólo si estuvo ociosa un rato
+        if time.monotonic() - last_used > self.ping_after and not self._healthy(conn):
+            self._discard(conn)
+            try:
+                return self._factory()
+            except Exception:
+                with self._cond:
+                    self._open -= 1
+                    self._cond.notify()
+                raise
+        return conn
+
+    def checkin(self, conn):
+        if id(conn) in self._overflow:
+            self._overflow.discard(id(conn))
+            self._discard(conn)
+            return
 
+        # lo que no se commiteó se descarta (igual que al cerrar una conexión)
+        ok = True
+        try:
+            if getattr(conn, "in_transaction", False):
+                conn.rollback()
+        except Exception:
+            ok = False
+
+        with self._cond:
+            if ok:
+                self._idle.append((conn, time.monotonic()))
+            else:
+                self._open -= 1
+            self._cond.notify()
+        if not ok:
+            self._discard(conn)
+
+    def dispose(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+        for conn, _ in idle:
+            self._discard(conn)
+
+# Préstamo anidado (ReplicaManager: la misma conexión para toda la sesión) con una
+# transacción abierta por el préstamo externo: el anidado trabaja dentro de un
+# SAVEPOINT. commit() lo libera (queda en la transacción externa, que es la que
+# commitea) y rollback()/cerrar sin commit vuelven al savepoint; nunca se commitea
+# ni se descarta la transacción del préstamo externo.
 class ConnProxy:
-    def __init__(self, inner):
+    def __init__(self, inner, pool=None):
         self._conn = inner
+        self._pool = pool
+        self._savepoint = None
+        self._open_savepoint()
+    def _inner(self):
+        # si ya se devolvió al pool y se sigue usando, pedimos otra
+        if self._conn is None and self._pool is not None:
+            self._conn = self._pool.checkout()
+            self._open_savepoint()
+        return self._conn
+    def _open_savepoint(self):
+        joined = getattr(self._pool, "joined", None)
+        if self._conn is not None and joined is not None and joined(self._conn):
+            self._savepoint = "conn_proxy_%d" % id(self)
+            self._conn.execute("SAVEPOINT " + self._savepoint)
+    def _end_savepoint(self, keep: bool):
+        sp, self._savepoint = self._savepoint, None
+        if not keep:
+            self._conn.execute("ROLLBACK TO " + sp)
+        self._conn.execute("RELEASE " + sp)
     def __getattr__(self, name):
-        return getattr(self._conn, name)
+        return getattr(self._inner(), name)
     def cursor(self, *a, **k):
-        return DictCursor(self._conn.cursor(*a, **k))
+        return DictCursor(self._inner().cursor(*a, **k), self)
+    def commit(self):
+        if self._savepoint is not None:
+            self._end_savepoint(keep=True)
+            self._open_savepoint()
+            return
+        self._inner().commit()
+        self._note_write()
+    def rollback(self):
+        if self._savepoint is not None:
+            self._end_savepoint(keep=False)
+            self._open_savepoint()
+            return
+        self._inner().rollback()
+    def _note_write(self):
+        if self._pool is not None and hasattr(self._pool, "note_write"):
+            self._pool.note_write()
+    def close(self):
+        inner = self._conn
+        if inner is None:
+            return
+        try:
+            if self._savepoint is not None:
+                self._end_savepoint(keep=False)  # lo no commiteado se descarta
+        except Exception:
+            pass
+        finally:
+            self._conn = None
+            if self._pool is not None:
+                self._pool.checkin(inner)
+            else:
+                inner.close()
+    def __del__(self):
+        # sólo corre cuando ya no queda ningún cursor suyo (cada DictCursor lo referencia)
+        try:
+            self.close()
+        except Exception:
+            pass
     # compatibilidad con with get_connection() as conn:
     def __enter__(self):
-        self._conn.__enter__() if hasattr(self._conn, "__enter__") else None
+        inner = self._inner()
+        inner.__enter__() if hasattr(inner, "__enter__") else None
         return self
     def __exit__(self, *exc):
-        return self._conn.__exit__(*exc) if hasattr(self._conn, "__exit__") else self._conn.close()
+        inner = self._conn
+        try:
+            if self._savepoint is not None:
+                if exc[0] is None:
+                    self._end_savepoint(keep=True)
+                return False
+            if inner is not None and hasattr(inner, "__exit__"):
+                if exc[0] is None and getattr(inner, "in_transaction", False):
+                    self._note_write()  # el __exit__ va a commitear
+                return inner.__exit__(*exc)
+        finally:
+            self.close()
 
-def get_connection():
-    libsql_url   = _get_secret("LIBSQL_URL") or _get_secret("TURSO_DATABASE_URL")
-    libsql_token = _get_secret("LIBSQL_AUTH_TOKEN") or _get_secret("TURSO_AUTH_TOKEN")
+# --- NUEVO: embedded replica de libsql con política de sync controlada ---
+# Un único replica por proceso (archivo local + conexión larga) en lugar de un
+# libsql.connect(...) por query. Las lecturas son locales; la sincronización con
+# Turso ocurre:
+#   - al abrir el replica,
+#   - cada LIBSQL_SYNC_INTERVAL segundos en un thread de fondo (60; 0 = apagado),
+#   - explícitamente con sync_now() después de escrituras importantes,
+#   - antes de la próxima lectura de una sesión que commiteó (read-your-writes).
+# Expone checkout/checkin como el pool, así ConnProxy funciona igual. El préstamo no
+# retiene la conexión: cada sentencia la toma y la suelta (las filas se leen ahí mismo)
+# y sólo una transacción abierta la deja tomada hasta su commit/rollback, así una
+# pantalla que guarda su conexión entre renders no frena a las demás sesiones. Si la
+# compartida no se libera en DB_POOL_TIMEOUT, ese préstamo sigue con una conexión
+# propia y temporal (se loguea). Un préstamo anidado de la misma sesión comparte el
+# externo y usa un SAVEPOINT (ver ConnProxy), sin commitear al externo.
+class ReplicaManager:
+    def __init__(self, url, token, path="replica.db", sync_interval=60, timeout=10.0):
+        self.url = url
+        self.token = token
+        self.path = path
+        self.sync_interval = max(0, int(sync_interval))
+        self.timeout = float(timeout)
+        self.last_sync = None          # time.time() del último sync OK
+        self._conn = None
+        self._lock = threading.Lock()  # una sentencia o una transacción a la vez
+        self._owner = None             # _ReplicaConn con una transacción abierta (retiene el lock)
+        self._local = threading.local()  # préstamo del thread y su profundidad
+        self._thread = None
 
-    if libsql_url:
-        libsql_url = str(libsql_url).strip().strip("'\"")
-        if not libsql_url.startswith("libsql://"):
-            raise RuntimeError(f"LIBSQL_URL inválida: {libsql_url!r}. Debe empezar con 'libsql://'.")
+    def _connect(self):
         import libsql
-        base = libsql.connect("replica.db", sync_url=libsql_url, auth_token=libsql_token)
-        return ConnProxy(base)
+        return libsql.connect(self.path, sync_url=self.url, auth_token=self.token)
+
+    def _connect_overflow(self):
+        _log.warning("replica ocupado más de %.0fs: conexión temporal aparte", self.timeout)
+        return self._connect()
+
+    def _ensure(self):
+        if self._conn is None:
+            self._conn = self._connect()
+            self._sync_locked()
+            self._start_background()
+        return self._conn
+
+    def _sync_locked(self):
+        self._conn.sync()
+        self.last_sync = time.time()
+
+    def _release(self, owner):
+        # fin de una sentencia (lock tomado): queda del dueño sólo si abrió una transacción
+        if self._conn is not None and getattr(self._conn, "in_transaction", False):
+            self._owner = owner
+        else:
+            self._owner = None
+            self._lock.release()
+
+    def sync_now(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._owner is conn:
+            return  # transacción abierta de esta sesión: sincroniza después de su commit
+        if not self._lock.acquire(timeout=self.timeout):
+            _log.warning("replica ocupado más de %.0fs: sync postergado", self.timeout)
+            return  # queda pendiente para la próxima lectura de la sesión
+        try:
+            self._ensure()
+            self._sync_locked()
+        finally:
+            self._lock.release()
+        _session_set("_db_pending_sync", False)
+
+    def note_write(self):
+        # la sesión que escribió re-sincroniza antes de volver a leer
+        _session_set("_db_pending_sync", True)
+
+    def _start_background(self):
+        if self.sync_interval <= 0 or self._thread is not None:
+            return
+        def _loop():
+            while True:
+                time.sleep(self.sync_interval)
+                try:
+                    with self._lock:
+                        if self._conn is not None and not getattr(self._conn, "in_transaction", False):
+                            self._sync_locked()
+                except Exception:
+                    pass  # reintenta en la próxima vuelta
+        self._thread = threading.Thread(target=_loop, name="libsql-sync", daemon=True)
+        self._thread.start()
 
+    def checkout(self):
+        depth = getattr(self._local, "depth", 0)
+        if depth == 0:
+            self._local.conn = _ReplicaConn(self)
+            if _session_get("_db_pending_sync"):
+                self.sync_now()
+        self._local.depth = depth + 1
+        return self._local.conn
+
+    def joined(self, conn) -> bool:
+        # préstamo anidado dentro de una transacción abierta (ver ConnProxy)
+        return (conn is getattr(self._local, "conn", None) and getattr(self._local, "depth", 0) > 1
+                and conn.in_transaction)
+
+    def checkin(self, conn):
+        if conn is getattr(self._local, "conn", None):
+            self._local.depth = max(0, getattr(self._local, "depth", 1) - 1)
+            if self._local.depth > 0:
+                return  # los anidados comparten la transacción del externo
+            self._local.conn = None
+        # lo no commiteado se descarta (también si lo devuelve otro thread)
+        conn._discard()
+
+    def dispose(self):
+        with self._lock:
+            conn, self._conn = self._conn, None
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+class _ReplicaConn:
+    """Préstamo del replica: corre cada sentencia con el lock del manager (ver ReplicaManager)."""
+    def __init__(self, manager):
+        self._m = manager
+        self._own = None  # conexión temporal si la compartida no se liberó a tiempo
+
+    @property
+    def in_transaction(self) -> bool:
+        if self._own is not None:
+            return bool(getattr(self._own, "in_transaction", False))
+        return self._m._owner is self
+
+    def _run(self, fn):
+        m = self._m
+        if self._own is not None:
+            return fn(self._own)
+        if m._owner is not self and not m._lock.acquire(timeout=m.timeout):
+            self._own = m._connect_overflow()
+            return fn(self._own)
+        try:
+            return fn(m._ensure())
+        finally:
+            m._release(self)
+
+    def cursor(self):
+        return _ReplicaCursor(self)
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+    def executemany(self, sql, seq):
+        return self.cursor().executemany(sql, seq)
+    def commit(self):
+        if self.in_transaction:
+            self._run(lambda c: c.commit())
+    def rollback(self):
+        if self.in_transaction:
+            self._run(lambda c: c.rollback())
+    def __enter__(self):
+        return self
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
+    def _discard(self):
+        own, self._own = self._own, None
+        if own is not None:
+            try:
+                own.close()
+            except Exception:
+                pass
+        elif self._m._owner is self:
+            try:
+                self._m._conn.rollback()
+            except Exception:
+                pass
+            finally:
+                self._m._owner = None
+                self._m._lock.release()
+
+class _ReplicaCursor:
+    """Cursor de _ReplicaConn: ejecuta y lee las filas sin soltar el lock en el medio."""
+    arraysize = 1
+    def __init__(self, conn):
+        self._conn = conn
+        self._rows = []
+        self._pos = 0
+        self.description = None
+        self.rowcount = -1
+        self.lastrowid = None
+
+    def _run(self, method, *args):
+        def fn(conn):
+            cur = conn.cursor()
+            getattr(cur, method)(*args)
+            self.description = cur.description
+            self.rowcount = getattr(cur, "rowcount", -1)
+            self.lastrowid = getattr(cur, "lastrowid", None)
+            self._rows = list(cur.fetchall()) if cur.description else []
+            self._pos = 0
+        self._conn._run(fn)
+        return self
+
+    def execute(self, sql, params=()):
+        return self._run("execute", sql, params)
+    def executemany(self, sql, seq):
+        return self._run("executemany", sql, list(seq))
+    def executescript(self, script):
+        return self._run("executescript", script)
+    def fetchone(self):
+        if self._pos >= len(self._rows):
+            return None
+        self._pos += 1
+        return self._rows[self._pos - 1]
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        rows = self._rows[self._pos:self._pos + size]
+        self._pos += len(rows)
+        return rows
+    def fetchall(self):
+        rows = self._rows[self._pos:]
+        self._pos = len(self._rows)
+        return rows
+    def close(self):
+        self._rows, self._pos = [], 0
+
+def _session_get(key):
+    try:
+        import streamlit as st
+        return st.session_state.get(key)
+    except Exception:
+        return None
+
+def _session_set(key, value):
+    try:
+        import streamlit as st
+        st.session_state[key] = value
+    except Exception:
+        pass
+
+def _libsql_config():
+    libsql_url   = _get_secret("LIBSQL_URL") or _get_secret("TURSO_DATABASE_URL")
+    libsql_token = _get_secret("LIBSQL_AUTH_TOKEN") or _get_secret("TURSO_AUTH_TOKEN")
+    if not libsql_url:
+        return None, None
+    libsql_url = str(libsql_url).strip().strip("'\"")
+    if not libsql_url.startswith("libsql://"):
+        raise RuntimeError(f"LIBSQL_URL inválida: {libsql_url!r}. Debe empezar con 'libsql://'.")
+    return libsql_url, libsql_token
+
+def _sqlite_factory():
     # Fallback local (SQLite)
     for candidate in ("elo_futbol.db", "elo-futbol.db"):
         if os.path.exists(candidate):
-            conn = sqlite3.connect(candidate)
-            conn.row_factory = sqlite3.Row  # por si corrés local
-            return ConnProxy(conn)
+            path = os.path.abspath(candidate)
+            def _sqlite():
+                # el pool comparte conexiones entre threads de Streamlit (nunca en simultáneo)
+                conn = sqlite3.connect(path, check_same_thread=False)
+                conn.row_factory = SqliteRow  # filas nativas (fast path)
+                return conn
+            return _sqlite
 
     raise RuntimeError("No hay LIBSQL_URL y no se encontró base local (elo_futbol.db / elo-futbol.db).")
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+def get_pool():
+    """Pool del proceso: ReplicaManager si hay Turso/libsql, ConnectionPool si es SQLite local."""
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                url, token = _libsql_config()
+                if url:
+                    _POOL = ReplicaManager(
+                        url, token,
+                        path=_get_secret("LIBSQL_REPLICA_PATH") or "replica.db",
+                        sync_interval=_int_secret("LIBSQL_SYNC_INTERVAL", 60),
+                        timeout=_int_secret("DB_POOL_TIMEOUT", 10),
+                    )
+                else:
+                    _POOL = ConnectionPool(
+                        _sqlite_factory(),
+                        size=_int_secret("DB_POOL_SIZE", 5),
+                        timeout=_int_secret("DB_POOL_TIMEOUT", 10),
+                        ping_after=_int_secret("DB_POOL_PING_AFTER", 30),
+                    )
+    return _POOL
+
+def reset_pool():
+    """Cierra las conexiones ociosas y fuerza a recrear el pool (tests / scripts)."""
+    global _POOL
+    with _POOL_LOCK:
+        pool, _POOL = _POOL, None
+    if pool is not None:
+        pool.dispose()
+
+def get_connection():
+    pool = get_pool()
+    return ConnProxy(pool.checkout(), pool)
+
+def sync_now():
+    """Fuerza un sync del replica con Turso (no-op con SQLite local).
+    Llamar después de escrituras que otras sesiones tienen que ver ya."""
+    pool = get_pool()
+    if hasattr(pool, "sync_now"):
+        pool.sync_now()
+
+# --- NUEVO: lectura columnar para pandas ---
+# Arma el DataFrame columna por columna a partir de cursor.description. Las
+# columnas declaradas en init_db.SCHEMA_SQL usan su tipo (INTEGER/REAL -> un único
+# pd.to_numeric; TEXT/DATETIME -> texto tal cual); las calculadas o con alias
+# desconocido se infieren de forma vectorizada (numéricas si >=70% parsea).
+_NUMERIC_TYPES = ("INT", "REAL", "FLOA", "DOUB", "NUMERIC", "DECIMAL")
+_SCHEMA_TYPES = None
+
+def _schema_column_types() -> dict:
+    global _SCHEMA_TYPES
+    if _SCHEMA_TYPES is None:
+        from init_db import SCHEMA_SQL
+        types = {}
+        for m in re.finditer(r"^\s*([A-Za-z_]\w*)\s+([A-Za-z]+)", SCHEMA_SQL, re.M):
+            name, decl = m.group(1), m.group(2).upper()
+            if name.upper() in ("CREATE", "FOREIGN", "PRIMARY", "UNIQUE", "CHECK"):
+                continue
+            kind = "num" if any(t in decl for t in _NUMERIC_TYPES) else "text"
+            # mismo nombre con tipos distintos en dos tablas -> se infiere
+            types[name] = kind if types.get(name, kind) == kind else None
+        _SCHEMA_TYPES = types
+    return _SCHEMA_TYPES
+
+def fetch_columns(sql: str, params=()):
+    """Ejecuta la query y devuelve (columnas, valores por columna, tipo declarado por columna).
+    El tipo es 'num', 'text' o None (sin declarar en el esquema)."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(sql, params)
+        rows = cur.fetchall()
+        cols = [d[0] for d in cur.description] if cur.description else []
+    data = list(zip(*rows)) if rows else [() for _ in cols]
+    declared = _schema_column_types()
+    return cols, data, [declared.get(c) for c in cols]
+
+def _column_series(pd, values, kind):
+    if kind == "text":
+        return pd.Series(values, dtype=object)
+    s = pd.Series(values)
+    if kind == "num":
+        return pd.to_numeric(s, errors="coerce")
+    if s.dtype != object and not pd.api.types.is_string_dtype(s):
+        return s
+    present = int(s.notna().sum())
+    if present == 0:
+        return s
+    num = pd.to_numeric(s.astype(str).str.replace(",", ".", regex=False), errors="coerce")
+    return num if int(num.notna().sum()) >= 0.7 * present else s
+
+def read_df(sql: str, params=()):
+    """DataFrame de la query armado por columnas (DataFrame vacío si no hay filas)."""
+    import pandas as pd
+    cols, data, kinds = fetch_columns(sql, params)
+    if not data or not data[0]:
+        return pd.DataFrame()
+    df = pd.DataFrame({i: _column_series(pd, v, k) for i, (v, k) in enumerate(zip(data, kinds))})
+    df.columns = cols
+    return df
@@ -0,0 +1,683 @@
+# elo_service.py
+# Reglas de ELO y registro de resultados, sin Streamlit.
+# - Lo usa cargaresultados (UI) y se puede correr por línea de comandos:
+#     python elo_service.py registrar <partido_id> <ganador 1|2|0> <dif_goles> [--amistoso] [--k 80]
+#     python elo_service.py replay [--k 80] [--dry-run]
+# - Un resultado se registra en UNA transacción: partido cerrado + (si es oficial)
+#   jugadores.elo_actual e historial_elo con executemany. Cada partido guarda su K
+#   (partidos.k_elo) y los recálculos lo respetan. Un oficial con fecha anterior a otros
+#   ya registrados se registra como corrección (recalcula los posteriores).
+# - replay() recalcula todo el historial oficial desde cero, en orden de fecha.
+# - editar_resultado / deshacer_resultado / eliminar_partido corrigen un partido
+#   cualquiera y recalculan sólo los partidos posteriores alcanzados por el cambio.
+# - simular() evalúa una grilla de reglas sobre el historial (ver tools/simular_reglas.py).
+# - Registro y correcciones mantienen player_stats (W/E/L por período) en la misma transacción.
+
+import itertools
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from itertools import groupby
+from operator import itemgetter
+
+import numpy as np
+
+import player_stats
+import snapshot_elo
+from db import get_connection, sync_now
+
+# -------------------------
+# Reglas
+# -------------------------
+# k: K base del partido (el admin lo cambia en el panel de resultados)
+# tramos: (diferencia de gol mínima, multiplicador de K), de mayor a menor
+# provisional_*: los primeros partidos oficiales de cada jugador mueven más
+# promedio: ELO de equipo = promedio (True) o suma (False) de sus jugadores
+REGLAS_DEFAULT = {
+    "k": 80,
+    "tramos": ((6, 1.8), (3, 1.3)),
+    "provisional_partidos": 5,
+    "provisional_boost": 1.25,
+    "promedio": True,
+}
+
+
+def reglas(**cambios) -> dict:
+    """REGLAS_DEFAULT con cambios puntuales (p.ej. reglas(k=60))."""
+    out = dict(REGLAS_DEFAULT)
+    for k, v in cambios.items():
+        if k not in out:
+            raise KeyError(f"Regla desconocida: {k}")
+        if v is not None:
+            out[k] = v
+    return out
+
+
+def calcular_elo(elo_a, elo_b, score_a, score_b, K):
+    exp_a = 1 / (1 + 10 ** ((elo_b - elo_a) / 400))
+    exp_b = 1 - exp_a
+    new_a = elo_a + K * (score_a - exp_a)
+    new_b = elo_b + K * (score_b - exp_b)
+    return new_a, new_b  # floats
+
+
+def factor_diferencia(dif_goles, tramos=REGLAS_DEFAULT["tramos"]) -> float:
+    d = int(dif_goles or 0)
+    for minimo, factor in tramos:
+        if d >= minimo:
+            return float(factor)
+    return 1.0
+
+
+def scores(ganador):
+    """(score1, score2) según ganador 1 / 2 / None (empate)."""
+    if ganador == 1:
+        return 1.0, 0.0
+    if ganador == 2:
+        return 0.0, 1.0
+    return 0.5, 0.5
+
+
+def elos_despues(elos1, elos2, previos1, previos2, ganador, dif_goles, regla=None):
+    """
+    ELO (redondeado) de cada jugador después del partido.
+    elos*: ELO previo por jugador; previos*: partidos oficiales previos por jugador.
+    El delta del equipo se reparte en partes iguales; x provisional_boost a los que
+    tienen menos de provisional_partidos oficiales.
+    """
+    r = regla or REGLAS_DEFAULT
+    n1 = max(1, len(elos1))
+    n2 = max(1, len(elos2))
+    if r["promedio"]:
+        elo1, elo2 = sum(elos1) / n1, sum(elos2) / n2
+    else:
+        elo1, elo2 = float(sum(elos1)), float(sum(elos2))
+    s1, s2 = scores(ganador)
+    K_team = float(r["k"]) * factor_diferencia(dif_goles, r["tramos"])
+    new1, new2 = calcular_elo(elo1, elo2, s1, s2, K_team)
+    delta1 = (new1 - elo1) / n1
+    delta2 = (new2 - elo2) / n2
+
+    def _post(elos, previos, delta):
+        return [round(e + (delta * r["provisional_boost"] if p < r["provisional_partidos"] else delta))
+                for e, p in zip(elos, previos)]
+
+    return _post(elos1, previos1, delta1), _post(elos2, previos2, delta2)
+
+
+# -------------------------
+# Registro de resultados
+# -------------------------
+def _roster_con_oficiales(cur, partido_id: int):
+    """Una consulta: (jugador_id, equipo, elo, oficiales_previos) del roster con equipo."""
+    cur.execute("""
+        SELECT pj.jugador_id,
+               pj.equipo,
+               COALESCE(j.elo_actual, 1000) AS elo,
+               (SELECT COUNT(*) FROM historial_elo h WHERE h.jugador_id = pj.jugador_id) AS oficiales
+        FROM partido_jugadores pj
+        JOIN jugadores j ON j.id = pj.jugador_id
+        WHERE pj.partido_id = ?
+          AND pj.equipo IN (1, 2)
+        ORDER BY pj.id
+    """, (partido_id,))
+    return [(int(r[0]), int(r[1]), float(r[2]), int(r[3] or 0)) for r in cur.fetchall()]
+
+
+def registrar_resultado(partido_id: int, ganador, dif_goles: int, es_oficial: bool,
+                        cargado_por: str = "desconocido", regla=None, ahora=None) -> dict:
+    """
+    Registra el resultado y cierra el partido; si es oficial aplica ELO e historial_elo.
+    ganador: 1 / 2 / None (empate, fuerza dif_goles = 0). Todo en una transacción.
+    Si ya hay oficiales posteriores (fecha anterior, p.ej. tras deshacer) o el partido
+    ya tenía ELO aplicado, se registra como corrección y se recalculan los partidos
+    alcanzados (ver _corregir).
+    Devuelve {jugador_id: (elo_antes, elo_despues)} (vacío si es amistoso).
+    """
+    if ganador not in (1, 2):
+        ganador, dif_goles = None, 0
+    k = float((regla or REGLAS_DEFAULT)["k"])
+    ahora = ahora or datetime.now().isoformat()
+    cambios = {}
+
+    def _cerrar(cur):
+        cur.execute("""
+            UPDATE partidos
+               SET ganador = ?,
+                   diferencia_gol = ?,
+                   es_oficial = ?,
+                   resultado_cargado_por = ?,
+                   k_elo = ?,
+                   tipo = 'cerrado'
+             WHERE id = ?
+        """, (ganador, int(dif_goles), 1 if es_oficial else 0, cargado_por, k, partido_id))
+
+    if _requiere_recalculo(partido_id, es_oficial):
+        _corregir(partido_id, _cerrar, regla)
+        conn = get_connection()
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT jugador_id, elo_antes, elo_despues FROM historial_elo WHERE partido_id = ?",
+                        (partido_id,))
+            return {int(j): (a, d) for j, a, d in cur.fetchall()}
+        finally:
+            conn.close()
+
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        player_stats.aplicar_partido(cur, partido_id, -1)  # por si ya tenía resultado
+        _cerrar(cur)
+        player_stats.aplicar_partido(cur, partido_id, +1)
+
+        if es_oficial:
+            roster = _roster_con_oficiales(cur, partido_id)
+            t1 = [r for r in roster if r[1] == 1]
+            t2 = [r for r in roster if r[1] == 2]
+            post1, post2 = elos_despues(
+                [r[2] for r in t1], [r[2] for r in t2],
+                [r[3] for r in t1], [r[3] for r in t2],
+                ganador, dif_goles, regla,
+            )
+            for r, post in zip(t1 + t2, post1 + post2):
+                cambios[r[0]] = (r[2], post)
+
+            cur.executemany(
+                "UPDATE jugadores SET elo_actual = ? WHERE id = ?",
+                [(post, jid) for jid, (_pre, post) in cambios.items()],
+            )
+            cur.executemany("""
+                INSERT INTO historial_elo (jugador_id, partido_id, elo_antes, elo_despues, fecha)
+                VALUES (?, ?, ?, ?, ?)
+            """, [(jid, partido_id, pre, post, ahora) for jid, (pre, post) in cambios.items()])
+        conn.commit()
+    finally:
+        conn.close()  # sin commit, el pool descarta lo escrito
+    snapshot_elo.persistir()
+    sync_now()
+    return cambios
+
+
+# -------------------------
+# Replay (recalcular todo el historial)
+# -------------------------
+# partido que cuenta para el ELO: oficial, cerrado y con resultado cargado
+_OFICIAL = ("p.es_oficial = 1 AND p.tipo = 'cerrado' "
+            "AND (p.ganador IS NOT NULL OR p.diferencia_gol IS NOT NULL)")
+# orden del historial: (fecha, id); "desde" un partido incluye a ese partido
+_DESDE = "(p.fecha > ? OR (p.fecha = ? AND p.id >= ?))"
+
+
+def _requiere_recalculo(partido_id: int, es_oficial: bool) -> bool:
+    """
+    ¿El registro tiene que pasar por _corregir? Sí si el partido ya tiene historial_elo
+    (se vuelve a registrar) o si es oficial y hay oficiales después de él (fecha, id).
+    """
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT 1 FROM historial_elo WHERE partido_id = ? LIMIT 1", (partido_id,))
+        if cur.fetchone() is not None:
+            return True
+        if not es_oficial:
+            return False
+        cur.execute(f"""
+            SELECT 1
+            FROM partidos p, partidos x
+            WHERE x.id = ?
+              AND p.id <> x.id
+              AND {_OFICIAL}
+              AND (p.fecha > x.fecha OR (p.fecha = x.fecha AND p.id > x.id))
+            LIMIT 1
+        """, (partido_id,))
+        return cur.fetchone() is not None
+    finally:
+        conn.close()
+
+
+def _ks(cur, desde=None) -> dict:
+    """{partido_id: K guardado} de los oficiales (desde (fecha, partido_id))."""
+    cur.execute(f"""
+        SELECT p.id, p.k_elo
+        FROM partidos p
+        WHERE {_OFICIAL}
+          AND p.k_elo IS NOT NULL
+          {"AND " + _DESDE if desde else ""}
+    """, (desde[0], desde[0], desde[1]) if desde else ())
+    return {int(r[0]): float(r[1]) for r in cur.fetchall()}
+
+
+def _regla_partido(regla, ks: dict, pid: int, cache: dict) -> dict:
+    """Reglas del partido: las dadas, con el K que tenía guardado (si tiene)."""
+    k = ks.get(pid)
+    if k is None:
+        return regla
+    if k not in cache:
+        cache[k] = dict(regla or REGLAS_DEFAULT, k=k)
+    return cache[k]
+
+
+def _partidos_oficiales(cur, lote: int = 500, desde=None):
+    """
+    Genera (partido_id, fecha, ganador, dif_goles, ids_equipo1, ids_equipo2) de los
+    partidos oficiales con resultado, en orden de fecha. Una consulta, leída por lotes.
+    desde: (fecha, partido_id) -> sólo ese partido y los posteriores.
+    """
+    cur.execute(f"""
+        SELECT p.id, p.fecha, p.ganador, p.diferencia_gol, pj.jugador_id, pj.equipo
+        FROM partidos p
+        JOIN partido_jugadores pj ON pj.partido_id = p.id
+        WHERE {_OFICIAL}
+          AND pj.equipo IN (1, 2)
+          {"AND " + _DESDE if desde else ""}
+        ORDER BY p.fecha, p.id, pj.id
+    """, (desde[0], desde[0], desde[1]) if desde else ())
+
+    def _filas():
+        while True:
+            filas = cur.fetchmany(lote)
+            if not filas:
+                return
+            for r in filas:
+                yield tuple(r)
+
+    for pid, filas in groupby(_filas(), key=itemgetter(0)):
+        filas = list(filas)
+        _, fecha, ganador, dif, _, _ = filas[0]
+        yield (int(pid), fecha, ganador, int(dif or 0),
+               [int(r[4]) for r in filas if r[5] == 1],
+               [int(r[4]) for r in filas if r[5] == 2])
+
+
+def _elos_base(cur):
+    """
+    {jugador_id: (elo_inicial, elo_actual)}. El inicial es el elo_antes de su primer
+    registro en historial_elo; sin historial, su elo_actual.
+    """
+    cur.execute("""
+        SELECT j.id,
+               COALESCE(h.elo_antes, j.elo_actual, 1000) AS inicial,
+               COALESCE(j.elo_actual, 1000) AS actual
+        FROM jugadores j
+        LEFT JOIN historial_elo h
+               ON h.id = (SELECT MIN(h2.id) FROM historial_elo h2 WHERE h2.jugador_id = j.id)
+    """)
+    return {int(r[0]): (int(r[1]), int(r[2])) for r in cur.fetchall()}
+
+
+def reproducir(partidos, base: dict, regla=None, ks=None):
+    """
+    Replay en memoria: estado por jugador en listas indexadas (elo, oficiales jugados).
+    partidos: iterable de (partido_id, fecha, ganador, dif_goles, ids1, ids2) en orden.
+    base: {jugador_id: elo_inicial}. ks: {partido_id: K} que pisa el K de `regla`.
+    Devuelve (filas [(jugador_id, partido_id, elo_antes, elo_despues, fecha)],
+              {jugador_id: elo_final}).
+    """
+    idx = {jid: i for i, jid in enumerate(base)}
+    ids = list(base)
+    elo = [int(base[j]) for j in ids]
+    jugados = [0] * len(ids)
+    filas = []
+    ks, por_k = ks or {}, {}
+
+    for pid, fecha, ganador, dif, ids1, ids2 in partidos:
+        for jid in ids1 + ids2:
+            if jid not in idx:  # jugador sin fila en jugadores: arranca en 1000
+                idx[jid] = len(ids)
+                ids.append(jid)
+                elo.append(1000)
+                jugados.append(0)
+        i1 = [idx[j] for j in ids1]
+        i2 = [idx[j] for j in ids2]
+        post1, post2 = elos_despues(
+            [elo[i] for i in i1], [elo[i] for i in i2],
+            [jugados[i] for i in i1], [jugados[i] for i in i2],
+            ganador, dif, _regla_partido(regla, ks, pid, por_k),
+        )
+        for i, post in zip(i1 + i2, post1 + post2):
+            filas.append((ids[i], pid, elo[i], post, fecha))
+            elo[i] = post
+            jugados[i] += 1
+
+    return filas, dict(zip(ids, elo))
+
+
+def replay(regla=None, escribir: bool = True) -> dict:
+    """
+    Recalcula elo_antes/elo_despues de todos los partidos oficiales (orden de fecha)
+    y jugadores.elo_actual. Sin `regla`, cada partido con su K guardado; con `regla`, esas
+    reglas para todos (y queda como K de cada oficial). Reescribe historial_elo completo
+    y los ELO que cambian en una transacción (escribir=False: sólo calcula).
+    historial_elo conserva la fecha de registro de cada (jugador, partido) existente.
+    Ojo: ajustes manuales de ELO entre partidos no quedan en historial_elo y se pierden.
+    """
+    t0 = time.perf_counter()
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        base = _elos_base(cur)
+        cur.execute("SELECT jugador_id, partido_id, fecha FROM historial_elo")
+        registrado = {(int(r[0]), int(r[1])): r[2] for r in cur.fetchall()}
+
+        ks = _ks(cur) if regla is None else None
+        filas, finales = reproducir(
+            _partidos_oficiales(cur), {j: b[0] for j, b in base.items()}, regla, ks,
+        )
+        filas = [(jid, pid, pre, post, registrado.get((jid, pid), fecha))
+                 for jid, pid, pre, post, fecha in filas]
+        cambios = [(e, jid) for jid, e in finales.items()
+                   if jid in base and base[jid][1] != e]
+
+        if escribir:
+            cur.execute("DELETE FROM historial_elo")
+            cur.executemany("""
+                INSERT INTO historial_elo (jugador_id, partido_id, elo_antes, elo_despues, fecha)
+                VALUES (?, ?, ?, ?, ?)
+            """, filas)
+            cur.executemany("UPDATE jugadores SET elo_actual = ? WHERE id = ?", cambios)
+            if regla is not None:
+                cur.execute(f"""
+                    UPDATE partidos SET k_elo = ?
+                    WHERE id IN (SELECT p.id FROM partidos p WHERE {_OFICIAL})
+                """, (float(regla["k"]),))
+            conn.commit()
+    finally:
+        conn.close()
+    if escribir:
+        snapshot_elo.persistir()
+        sync_now()
+    return {
+        "partidos": len({f[1] for f in filas}),
+        "filas": len(filas),
+        "jugadores_cambiados": len(cambios),
+        "segundos": time.perf_counter() - t0,
+    }
+
+
+# -------------------------
+# Correcciones (editar / deshacer / eliminar un partido)
+# -------------------------
+def _replay_sufijo(cur, fecha, partido_id, afectados, viejo, regla=None):
+    """
+    Recalcula los partidos oficiales desde (fecha, partido_id) que alcanza el cambio:
+    los que comparten algún jugador con el componente conexo que crece desde `afectados`
+    (el roster del partido corregido). El resto del sufijo no cambia.
+    viejo: {jugador_id: [((fecha, partido_id), elo_antes, fecha_registro)]} del historial
+    anterior al cambio, desde ese partido; da el ELO de entrada de cada jugador.
+    Cada partido se recalcula con su K guardado (regla: el resto de las reglas y el K
+    de los que no tienen). Reescribe historial_elo de esos partidos y elo_actual de
+    esos jugadores (sin commit).
+    """
+    sufijo = list(_partidos_oficiales(cur, desde=(fecha, partido_id)))
+    ks, por_k = _ks(cur, desde=(fecha, partido_id)), {}
+    jugadores = sorted({j for p in sufijo for j in p[4] + p[5]} | set(afectados))
+    previos = defaultdict(int)
+    actual = {}
+    if jugadores:
+        ph = ",".join("?" * len(jugadores))
+        cur.execute(f"""
+            SELECT pj.jugador_id, COUNT(*)
+            FROM partidos p
+            JOIN partido_jugadores pj ON pj.partido_id = p.id
+            WHERE {_OFICIAL}
+              AND pj.equipo IN (1, 2)
+              AND NOT {_DESDE}
+              AND pj.jugador_id IN ({ph})
+            GROUP BY pj.jugador_id
+        """, (fecha, fecha, partido_id, *jugadores))
+        previos.update({int(r[0]): int(r[1]) for r in cur.fetchall()})
+        cur.execute(f"SELECT id, COALESCE(elo_actual, 1000) FROM jugadores WHERE id IN ({ph})", jugadores)
+        actual = {int(r[0]): int(r[1]) for r in cur.fetchall()}
+
+    def _elo_en(jid, clave):
+        # ELO con el que el jugador llegaba a `clave` según el historial anterior
+        for k, antes, _reg in viejo.get(jid, ()):
+            if k >= clave:
+                return antes
+        return actual.get(jid, 1000)
+
+    registrado = {(jid, k[1]): reg for jid, filas in viejo.items() for k, _a, reg in filas}
+    elo = {j: _elo_en(j, (fecha, partido_id)) for j in afectados}
+    recalculados, filas = [partido_id], []
+    for pid, pf, ganador, dif, ids1, ids2 in sufijo:
+        todos = ids1 + ids2
+        if any(j in elo for j in todos):
+            for j in todos:
+                if j not in elo:
+                    elo[j] = _elo_en(j, (pf, pid))
+            post1, post2 = elos_despues(
+                [elo[j] for j in ids1], [elo[j] for j in ids2],
+                [previos[j] for j in ids1], [previos[j] for j in ids2],
+                ganador, dif, _regla_partido(regla, ks, pid, por_k),
+            )
+            for j, post in zip(todos, post1 + post2):
+                filas.append((j, pid, elo[j], post, registrado.get((j, pid), pf)))
+                elo[j] = post
+            if pid != partido_id:
+                recalculados.append(pid)
+        for j in todos:
+            previos[j] += 1
+
+    cur.executemany("DELETE FROM historial_elo WHERE partido_id = ?", [(p,) for p in recalculados])
+    cur.executemany("""
+        INSERT INTO historial_elo (jugador_id, partido_id, elo_antes, elo_despues, fecha)
+        VALUES (?, ?, ?, ?, ?)
+    """, filas)
+    cur.executemany("UPDATE jugadores SET elo_actual = ? WHERE id = ?",
+                    [(e, j) for j, e in elo.items() if actual.get(j) != e])
+    return {"partidos": len(recalculados), "jugadores": len(elo), "filas": len(filas)}
+
+
+def _corregir(partido_id: int, cambio, regla=None) -> dict:
+    """
+    Aplica `cambio(cur)` sobre el partido y recalcula el sufijo alcanzado, todo en una
+    transacción. Lee antes del cambio el historial desde el partido y su roster.
+    """
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT fecha FROM partidos WHERE id = ?", (partido_id,))
+        row = cur.fetchone()
+        if not row:
+            raise RuntimeError("Partido inexistente.")
+        fecha = row[0]
+
+        cur.execute(f"""
+            SELECT h.jugador_id, p.fecha, p.id, h.elo_antes, h.fecha
+            FROM historial_elo h
+            JOIN partidos p ON p.id = h.partido_id
+            WHERE {_DESDE}
+            ORDER BY p.fecha, p.id
+        """, (fecha, fecha, partido_id))
+        viejo = defaultdict(list)
+        for jid, pf, pid, antes, reg in cur.fetchall():
+            viejo[int(jid)].append(((pf, int(pid)), int(antes), reg))
+        cur.execute(
+            "SELECT jugador_id FROM partido_jugadores WHERE partido_id = ? AND equipo IN (1, 2)",
+            (partido_id,),
+        )
+        afectados = {int(r[0]) for r in cur.fetchall()}
+        afectados |= {j for j, filas in viejo.items() if any(k[1] == partido_id for k, _a, _r in filas)}
+
+        player_stats.aplicar_partido(cur, partido_id, -1)
+        cambio(cur)
+        player_stats.aplicar_partido(cur, partido_id, +1)  # no-op si se borró o quedó sin resultado
+        res = _replay_sufijo(cur, fecha, partido_id, afectados, viejo, regla)
+        conn.commit()
+    finally:
+        conn.close()
+    snapshot_elo.persistir()
+    sync_now()
+    return res
+
+
+def editar_resultado(partido_id: int, ganador, dif_goles, es_oficial=None, regla=None) -> dict:
+    """Cambia el resultado (y opcionalmente si es oficial) y recalcula el ELO de ahí en adelante."""
+    def _cambio(cur):
+        cur.execute("UPDATE partidos SET ganador = ?, diferencia_gol = ? WHERE id = ?",
+                    (ganador, dif_goles, partido_id))
+        if es_oficial is not None:
+            cur.execute("UPDATE partidos SET es_oficial = ? WHERE id = ?",
+                        (1 if es_oficial else 0, partido_id))
+    return _corregir(partido_id, _cambio, regla)
+
+
+def deshacer_resultado(partido_id: int, regla=None) -> dict:
+    """Borra el resultado, reabre el partido y recalcula el ELO de ahí en adelante."""
+    def _cambio(cur):
+        cur.execute("""
+            UPDATE partidos
+               SET ganador = NULL,
+                   diferencia_gol = NULL,
+                   es_oficial = 0,
+                   resultado_cargado_por = NULL,
+                   k_elo = NULL,
+                   tipo = 'abierto'
+             WHERE id = ?
+        """, (partido_id,))
+    return _corregir(partido_id, _cambio, regla)
+
+
+def eliminar_partido(partido_id: int, regla=None) -> dict:
+    """Borra el partido (y su roster) y recalcula el ELO de ahí en adelante."""
+    def _cambio(cur):
+        cur.execute("DELETE FROM historial_elo WHERE partido_id = ?", (partido_id,))
+        cur.execute("DELETE FROM partido_jugadores WHERE partido_id = ?", (partido_id,))
+        cur.execute("DELETE FROM partidos WHERE id = ?", (partido_id,))
+    return _corregir(partido_id, _cambio, regla)
+
+
+# -------------------------
+# Simulador de reglas (what-if)
+# -------------------------
+def cargar_historial():
+    """(partidos oficiales en orden, {jugador_id: elo_inicial}) para reproducir/simular."""
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        base = {j: b[0] for j, b in _elos_base(cur).items()}
+        partidos = list(_partidos_oficiales(cur))
+    finally:
+        conn.close()
+    return partidos, base
+
+
+def grilla(**valores) -> list:
+    """Producto cartesiano de reglas: grilla(k=(40, 80), promedio=(True, False))."""
+    claves = list(valores)
+    return [reglas(**dict(zip(claves, combo))) for combo in itertools.product(*valores.values())]
+
+
+def simular(partidos, base: dict, configs, desde=None) -> list:
+    """
+    Replay del historial con todas las reglas de `configs` a la vez: el estado es una
+    matriz (config x jugador) y cada partido se aplica a todas las filas con NumPy.
+    Métricas de la predicción previa al partido (prob. de que gane el equipo 1):
+      log_loss / brier (empate = 0.5) y acierto_favorito (% en partidos con ganador,
+      favorito = equipo con más ELO, como admin_stats._elo_expected_metrics).
+    desde: 'YYYY-MM-DD' — sólo se miden partidos desde esa fecha (el replay es completo).
+    Devuelve una lista de dicts (reglas + métricas), en el orden de `configs`.
+    """
+    partidos = list(partidos)
+    configs = [reglas(**c) for c in configs]
+    ids = list(base)
+    for p in partidos:
+        ids.extend(j for j in p[4] + p[5] if j not in base)
+    ids = list(dict.fromkeys(ids))
+    idx = {jid: i for i, jid in enumerate(ids)}
+
+    C = len(configs)
+    elo = np.tile(np.array([float(base.get(j, 1000)) for j in ids]), (C, 1))
+    jugados = np.zeros(len(ids), dtype=np.int64)
+    k = np.array([float(c["k"]) for c in configs])
+    boost = np.array([float(c["provisional_boost"]) for c in configs])[:, None]
+    prov = np.array([int(c["provisional_partidos"]) for c in configs])[:, None]
+    promedio = np.array([bool(c["promedio"]) for c in configs])
+    # factor de K por (config, diferencia de gol)
+    dmax = max([p[3] for p in partidos] + [0])
+    factor = np.array([[factor_diferencia(d, c["tramos"]) for d in range(dmax + 1)] for c in configs])
+
+    log_loss = np.zeros(C)
+    brier = np.zeros(C)
+    aciertos = np.zeros(C)
+    medidos = decididos = 0
+
+    for _pid, fecha, ganador, dif, ids1, ids2 in partidos:
+        i1 = np.array([idx[j] for j in ids1], dtype=np.int64)
+        i2 = np.array([idx[j] for j in ids2], dtype=np.int64)
+        n1, n2 = max(1, len(i1)), max(1, len(i2))
+        e1, e2 = elo[:, i1], elo[:, i2]
+        t1 = np.where(promedio, e1.sum(axis=1) / n1, e1.sum(axis=1))
+        t2 = np.where(promedio, e2.sum(axis=1) / n2, e2.sum(axis=1))
+        p1 = 1 / (1 + 10 ** ((t2 - t1) / 400))
+        s1, s2 = scores(ganador)
+
+        if desde is None or str(fecha)[:10] >= desde:
+            q = np.clip(p1, 1e-12, 1 - 1e-12)
+            log_loss -= s1 * np.log(q) + (1 - s1) * np.log(1 - q)
+            brier += (p1 - s1) ** 2
+            medidos += 1
+            if ganador in (1, 2):
+                aciertos += (t1 >= t2) == (ganador == 1)
+                decididos += 1
+
+        # mismas operaciones que elos_despues, por fila
+        K = k * factor[:, dif]
+        d1 = ((t1 + K * (s1 - p1)) - t1) / n1
+        d2 = ((t2 + K * (s2 - (1 - p1))) - t2) / n2
+        elo[:, i1] = np.round(e1 + np.where(jugados[i1] < prov, d1[:, None] * boost, d1[:, None]))
+        elo[:, i2] = np.round(e2 + np.where(jugados[i2] < prov, d2[:, None] * boost, d2[:, None]))
+        jugados[i1] += 1
+        jugados[i2] += 1
+
+    out = []
+    for c in range(C):
+        out.append(dict(
+            configs[c],
+            partidos=medidos,
+            log_loss=float(log_loss[c] / medidos) if medidos else None,
+            brier=float(brier[c] / medidos) if medidos else None,
+            acierto_favorito=round(float(aciertos[c] / decididos) * 100.0, 1) if decididos else None,
+        ))
+    return out
+
+
+# -------------------------
+# CLI
+# -------------------------
+def _main(argv) -> int:
+    import argparse
+    ap = argparse.ArgumentParser(prog="elo_service.py")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    reg = sub.add_parser("registrar", help="registrar resultado de un partido")
+    reg.add_argument("partido_id", type=int)
+    reg.add_argument("ganador", type=int, choices=(0, 1, 2), help="1, 2 o 0 (empate)")
+    reg.add_argument("dif_goles", type=int)
+    reg.add_argument("--amistoso", action="store_true")
+    reg.add_argument("--k", type=float, default=None)
+    reg.add_argument("--por", default="cli")
+    rep = sub.add_parser("replay", help="recalcular todo el historial de ELO")
+    rep.add_argument("--k", type=float, default=None)
+    rep.add_argument("--dry-run", action="store_true", help="calcular sin escribir")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "registrar":
+        cambios = registrar_resultado(
+            args.partido_id, args.ganador or None, args.dif_goles, not args.amistoso,
+            cargado_por=args.por, regla=reglas(k=args.k),
+        )
+        for jid, (pre, post) in cambios.items():
+            print(f"jugador {jid}: {pre:.0f} -> {post}")
+        print(f"Partido {args.partido_id} registrado.")
+    elif args.cmd == "replay":
+        res = replay(regla=reglas(k=args.k) if args.k is not None else None,
+                     escribir=not args.dry_run)
+        print(f"{res['partidos']} partidos, {res['filas']} filas de historial_elo, "
+              f"{res['jugadores_cambiados']} jugadores con ELO distinto "
+              f"({res['segundos']:.3f} s{', sin escribir' if args.dry_run else ''}).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
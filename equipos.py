@@ -1,11 +1,18 @@
-from db import get_connection as db_get_connection
+from db import get_connection as db_get_connection, sync_now
 # equipos.py
 import streamlit as st
 from datetime import datetime, timedelta
 import unicodedata
 import random
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 import itertools
+import threading
+
+import numpy as np
+
+import balanceo
+import motores_rating
+from scheduler import jugadores_por_equipo as _jugadores_por_equipo
 
 DB_NAME = "elo_futbol.db"  # nombre exact
 
@@ -128,6 +135,18 @@ def obtener_jugadores_partido_full(partido_id: int):
     return jugadores
 
 
+def elos_para_balanceo(jugadores):
+    """
+    Con un motor de rating distinto de Elo (RATING_ENGINE), reemplaza "elo" por el
+    rating vigente de ese motor; quien todavía no jugó oficiales conserva elo_actual.
+    """
+    ratings = motores_rating.ratings_actuales([j["jugador_id"] for j in jugadores])
+    for j in jugadores:
+        if j["jugador_id"] in ratings:
+            j["elo"] = ratings[j["jugador_id"]]
+    return jugadores
+
+
 def obtener_partido_info(partido_id: int):
     """
     Devuelve (numero_publico, fecha_dt, hora_str, cancha_nombre) del partido.
@@ -155,7 +174,13 @@ def obtener_partido_info(partido_id: int):
 # =========================
 # (CAMBIO 1) Edición de roster desde "Generar equipos"
 # =========================
-CUPO_PARTIDO = 10
+def obtener_jugadores_por_equipo(partido_id: int) -> int:
+    conn = get_connection()
+    cur = conn.cursor()
+    k = _jugadores_por_equipo(cur, partido_id)
+    conn.close()
+    return k
+
 
 
 def obtener_jugadores_activos():
@@ -206,6 +231,7 @@ def agregar_jugadores_a_partido(partido_id: int, jugador_ids):
     conn.commit()
     conn.close()
     _reset_equipos_y_camisetas(partido_id)
+    sync_now()
 
 
 def quitar_jugador_de_partido(partido_id: int, jugador_id: int):
@@ -218,6 +244,7 @@ def quitar_jugador_de_partido(partido_id: int, jugador_id: int):
     conn.commit()
     conn.close()
     _reset_equipos_y_camisetas(partido_id)
+    sync_now()
 
 
 # -------------------------
@@ -261,14 +288,17 @@ def asignar_camiseta_equipo(partido_id: int, equipo: int, camiseta: str):
     if camiseta not in JERSEYS:
         return
     conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        UPDATE partido_jugadores
-           SET camiseta = ?
-         WHERE partido_id = ? AND equipo = ?
-    """, (camiseta, partido_id, equipo))
-    conn.commit()
-    conn.close()
+    try:
+        cur = conn.cursor()
+        cur.execute("""
+            UPDATE partido_jugadores
+               SET camiseta = ?
+             WHERE partido_id = ? AND equipo = ?
+        """, (camiseta, partido_id, equipo))
+        conn.commit()
+    finally:
+        conn.close()
+    sync_now()
 
 
 def limpiar_camiseta_equipo(partido_id: int, equipo: int):
@@ -289,19 +319,22 @@ def intercambiar_camisetas(partido_id: int):
     de ambos equipos (1 y 2) de ese partido.
     """
     conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        UPDATE partido_jugadores
-           SET camiseta = CASE
-                WHEN camiseta = 'clara' THEN 'oscura'
-                WHEN camiseta = 'oscura' THEN 'clara'
-                ELSE camiseta
-           END
-         WHERE partido_id = ?
-           AND equipo IN (1, 2)
-    """, (partido_id,))
-    conn.commit()
-    conn.close()
+    try:
+        cur = conn.cursor()
+        cur.execute("""
+            UPDATE partido_jugadores
+               SET camiseta = CASE
+                    WHEN camiseta = 'clara' THEN 'oscura'
+                    WHEN camiseta = 'oscura' THEN 'clara'
+                    ELSE camiseta
+               END
+             WHERE partido_id = ?
+               AND equipo IN (1, 2)
+        """, (partido_id,))
+        conn.commit()
+    finally:
+        conn.close()
+    sync_now()
 
 
 # -------------------------
@@ -347,23 +380,29 @@ def limpiar_bloques(partido_id: int):
     conn.close()
 
 
-def set_bloque_por_nombres(partido_id: int, nombres: list, bloque_id: int):
-    if not nombres:
-        return
+def set_bloques_por_ids(partido_id: int, grupos: dict):
+    """
+    Reemplaza los bloques del partido en una transacción: limpia y asigna
+    grupos = {bloque_id: [jugador_id, ...]}.
+    """
+    filas = [(bloque_id, partido_id, int(jid)) for bloque_id, ids in grupos.items() for jid in ids]
     conn = get_connection()
-    cur = conn.cursor()
-    for nombre in nombres:
-        cur.execute("""
-            UPDATE partido_jugadores
-               SET bloque = ?
-             WHERE partido_id = ?
-               AND jugador_id = (SELECT id FROM jugadores WHERE nombre = ? LIMIT 1)
-        """, (bloque_id, partido_id, nombre))
-    conn.commit()
-    conn.close()
-
-
-def _guardar_companeros_si_valido(partido_id, duo1, duo2, trio1, trio2):
+    try:
+        cur = conn.cursor()
+        cur.execute("UPDATE partido_jugadores SET bloque = NULL WHERE partido_id = ?", (partido_id,))
+        if filas:
+            cur.executemany("""
+                UPDATE partido_jugadores
+                   SET bloque = ?
+                 WHERE partido_id = ?
+                   AND jugador_id = ?
+            """, filas)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _guardar_companeros_si_valido(partido_id, duo1, duo2, trio1, trio2, nombre_de=None):
     ok_tamaños = (
         (len(duo1) in (0, 2)) and (len(duo2) in (0, 2)) and
         (len(trio1) in (0, 3)) and (len(trio2) in (0, 3))
@@ -373,37 +412,29 @@ def _guardar_companeros_si_valido(partido_id, duo1, duo2, trio1, trio2):
         return False
 
     seleccionados = [*duo1, *duo2, *trio1, *trio2]
-    solapados = [n for n in seleccionados if seleccionados.count(n) > 1]
+    solapados = [j for j in seleccionados if seleccionados.count(j) > 1]
     if solapados:
-        st.error(f"Jugadores repetidos en grupos: {sorted(set(solapados))}")
+        nombre_de = nombre_de or {}
+        st.error(f"Jugadores repetidos en grupos: {sorted({nombre_de.get(j, str(j)) for j in solapados})}")
         return False
 
-    limpiar_bloques(partido_id)
-    set_bloque_por_nombres(partido_id, duo1, 1)
-    set_bloque_por_nombres(partido_id, duo2, 2)
-    set_bloque_por_nombres(partido_id, trio1, 3)
-    set_bloque_por_nombres(partido_id, trio2, 4)
+    set_bloques_por_ids(partido_id, {1: duo1, 2: duo2, 3: trio1, 4: trio2})
     st.toast("Compañeros guardados.", icon="✅")
     return True
 
 
-def ui_definir_bloques(partido_id: int, jugadores_nombres: list):
+def ui_definir_bloques(partido_id: int, jugadores: list):
+    """jugadores: roster del partido (obtener_jugadores_partido_full); se elige por jugador_id."""
     st.markdown("### 🧩 Definir compañeros (opcional)")
     st.caption("Hasta **2 duplas** y **2 tríos**. No se permiten solapamientos. (Se guarda automáticamente)")
 
+    nombre_de = {j["jugador_id"]: j["nombre"] for j in jugadores}
+    jugador_ids = list(nombre_de)
+
     current = defaultdict(list)
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT j.nombre, pj.bloque
-        FROM partido_jugadores pj
-        JOIN jugadores j ON j.id = pj.jugador_id
-        WHERE pj.partido_id = ? AND pj.bloque IS NOT NULL
-        ORDER BY j.nombre
-    """, (partido_id,))
-    for nombre, b in cur.fetchall():
-        current[str(b).strip()].append(nombre)
-    conn.close()
+    for j in sorted(jugadores, key=lambda j: j["nombre"]):
+        if j["bloque"] is not None:
+            current[str(j["bloque"]).strip()].append(j["jugador_id"])
 
     if "bloques_ui" not in st.session_state:
         st.session_state.bloques_ui = {
@@ -412,225 +443,198 @@ def ui_definir_bloques(partido_id: int, jugadores_nombres: list):
             "trio1": current.get("3", []),
             "trio2": current.get("4", []),
         }
+    # lo guardado en sesión puede ser de otro partido: sólo ids de este roster
+    ui = {k: [j for j in v if j in nombre_de] for k, v in st.session_state.bloques_ui.items()}
 
     def _on_change_guardar():
         duo1 = st.session_state.get("duo1_ms", [])
         duo2 = st.session_state.get("duo2_ms", [])
         trio1 = st.session_state.get("trio1_ms", [])
         trio2 = st.session_state.get("trio2_ms", [])
-        if _guardar_companeros_si_valido(partido_id, duo1, duo2, trio1, trio2):
+        if _guardar_companeros_si_valido(partido_id, duo1, duo2, trio1, trio2, nombre_de):
             st.session_state.bloques_ui = {"duo1": duo1, "duo2": duo2, "trio1": trio1, "trio2": trio2}
             st.rerun()
 
+    def _fmt(jid):
+        return nombre_de.get(jid, str(jid))
+
     col1, col2 = st.columns(2)
     with col1:
         st.multiselect(
-            "Dupla 1 (2 jugadores)", jugadores_nombres,
-            default=st.session_state.bloques_ui["duo1"], key="duo1_ms",
+            "Dupla 1 (2 jugadores)", jugador_ids, format_func=_fmt,
+            default=ui["duo1"], key="duo1_ms",
             on_change=_on_change_guardar
         )
         st.multiselect(
-            "Trío 1 (3 jugadores)", jugadores_nombres,
-            default=st.session_state.bloques_ui["trio1"], key="trio1_ms",
+            "Trío 1 (3 jugadores)", jugador_ids, format_func=_fmt,
+            default=ui["trio1"], key="trio1_ms",
             on_change=_on_change_guardar
         )
     with col2:
         st.multiselect(
-            "Dupla 2 (2 jugadores)", jugadores_nombres,
-            default=st.session_state.bloques_ui["duo2"], key="duo2_ms",
+            "Dupla 2 (2 jugadores)", jugador_ids, format_func=_fmt,
+            default=ui["duo2"], key="duo2_ms",
             on_change=_on_change_guardar
         )
         st.multiselect(
-            "Trío 2 (3 jugadores)", jugadores_nombres,
-            default=st.session_state.bloques_ui["trio2"], key="trio2_ms",
+            "Trío 2 (3 jugadores)", jugador_ids, format_func=_fmt,
+            default=ui["trio2"], key="trio2_ms",
             on_change=_on_change_guardar
         )
 
 
 # -------------------------
-# Validación dura de bloques (nunca permitir romperlos)
+# Roster indexado (ids / ELO / bloque por índice de jugador)
 # -------------------------
-def _build_block_rules_from_bloques(bloques):
+def roster_desde_bloques(bloques):
     """
-    groups: key -> set(nombres) para bloques de tamaño > 1
+    Aplana los bloques a arrays paralelos por índice de jugador:
+    (ids, elos, idx_bloques), idx_bloques = índices de cada bloque.
+    El motor trabaja sobre índices / jugador_id; los nombres se resuelven al mostrar.
     """
-    groups = {}
-    for bi, bl in enumerate(bloques):
-        if len(bl) <= 1:
-            continue
-        names = [p["nombre"] for p in bl]
-        groups[f"G{bi}"] = set(names)
-    return groups
+    ids, elos, idx_bloques = [], [], []
+    for bl in bloques:
+        idx_bloques.append(list(range(len(ids), len(ids) + len(bl))))
+        for p in bl:
+            ids.append(int(p["jugador_id"]))
+            elos.append(int(p.get("elo", 0) or 0))
+    return ids, elos, idx_bloques
 
 
-def _violates_blocks(lista10, groups):
+# -------------------------
+# Validación dura de bloques (nunca permitir romperlos)
+# -------------------------
+def _build_block_rules_from_bloques(bloques):
     """
-    True si algún bloque (dupla/trío) queda partido entre Equipo 1 y Equipo 2.
+    Reglas de bloques como bitmasks sobre los jugadores (numerados en el orden de 'bloques'):
+    (bit_de_jugador_id, [mask de cada dupla/trío]). None si no hay bloques de tamaño > 1.
     """
-    if not groups:
-        return False
+    ids, _elos, idx_bloques = roster_desde_bloques(bloques)
+    masks = balanceo.mascaras_bloques(idx_bloques)
+    if not masks:
+        return None
+    return {jid: 1 << i for i, jid in enumerate(ids)}, masks
 
-    t1 = set([n for n in lista10[:5] if n])
-    t2 = set([n for n in lista10[5:] if n])
 
-    for members in groups.values():
-        in1 = len(members & t1)
-        in2 = len(members & t2)
-        if in1 > 0 and in2 > 0:
-            return True
-    return False
+def _mask_equipo(jugador_ids, bit_de):
+    m = 0
+    for jid in jugador_ids:
+        if jid is not None:
+            m |= bit_de.get(jid, 0)
+    return m
 
 
-def _filter_options_by_blocks(opciones, bloques):
-    groups = _build_block_rules_from_bloques(bloques)
+def _violates_blocks(lista, groups):
+    """
+    True si algún bloque (dupla/trío) queda partido entre Equipo 1 y Equipo 2.
+    lista = jugador_id de Equipo 1 + Equipo 2 (mitad y mitad).
+    """
     if not groups:
-        return opciones
-
-    out = []
-    seen = set()
-    for lista10 in opciones:
-        if _violates_blocks(lista10, groups):
-            continue
-        key = matchup_key(lista10)  # evita espejadas
-        if key in seen:
-            continue
-        seen.add(key)
-        out.append(lista10)
-    return out
+        return False
+    bit_de, masks = groups
+    return balanceo.rompe_bloques(_mask_equipo(lista[:len(lista) // 2], bit_de), masks)
 
 
 # -------------------------
 # Keys de match (evitar duplicados y espejadas)
 # -------------------------
-def equipos_set_key(lista10):
+def equipos_set_key(lista):
     """
-    Devuelve (team1, team2) como frozensets (ignora orden interno).
+    Devuelve (team1, team2) como frozensets de jugador_id (ignora orden interno).
     OJO: team1 y team2 siguen diferenciados por lado (1 vs 2).
     """
-    team1 = frozenset([n for n in lista10[:5] if n])
-    team2 = frozenset([n for n in lista10[5:] if n])
+    k = len(lista) // 2
+    team1 = frozenset([j for j in lista[:k] if j is not None])
+    team2 = frozenset([j for j in lista[k:] if j is not None])
     return (team1, team2)
 
 
-def matchup_key(lista10):
+def matchup_key(lista):
     """
     Key CANÓNICA del match:
     - ignora orden dentro de cada equipo
     - ignora swap Equipo1<->Equipo2
     => evita opciones idénticas o espejadas.
     """
-    t1, t2 = equipos_set_key(lista10)
+    t1, t2 = equipos_set_key(lista)
     return frozenset((t1, t2))
 
 
-def _name2elo_from_bloques(bloques):
-    m = {}
-    for b in bloques:
-        for p in b:
-            m[p["nombre"]] = int(p.get("elo", 0) or 0)
-    return m
+# -------------------------
+# Sugerencias de intercambio sobre una formación armada
+# -------------------------
+def sugerir_intercambios(lista, bloques, n_sugerencias=5, dobles=True):
+    """
+    Mejores intercambios (simples y dobles) que bajan el ΔELO de 'lista'
+    (jugador_id de Equipo 1 + Equipo 2) sin romper bloques.
+    Devuelve [(nuevo_diff, ids_que_salen_de_1, ids_que_salen_de_2)].
+    """
+    ids, elos, idx_bloques = roster_desde_bloques(bloques)
+    pos = {jid: i for i, jid in enumerate(ids)}
+    k = len(lista) // 2
+    if any(j not in pos for j in lista):
+        return []
+    equipo1 = [pos[j] for j in lista[:k]]
+    sug = balanceo.sugerir_intercambios(elos, equipo1, idx_bloques, n_sugerencias, dobles)
+    return [(d, [ids[i] for i in s1], [ids[i] for i in s2]) for d, s1, s2 in sug]
 
 
-def _diff_real(lista10, name2elo):
-    team1 = [n for n in lista10[:5] if n]
-    team2 = [n for n in lista10[5:] if n]
-    elo1 = int(sum(name2elo.get(n, 0) for n in team1))
-    elo2 = int(sum(name2elo.get(n, 0) for n in team2))
-    return abs(elo1 - elo2), elo1, elo2
+def aplicar_intercambio(lista, sale1, sale2):
+    """Nueva lista con sale1 (del Equipo 1) y sale2 (del Equipo 2) cambiados de equipo."""
+    k = len(lista) // 2
+    t1 = [j for j in lista[:k] if j not in sale1] + list(sale2)
+    t2 = [j for j in lista[k:] if j not in sale2] + list(sale1)
+    return t1 + t2
 
 
 # -------------------------
-# Enumeración EXACTA respetando bloques
+# Generación de opciones (motor en balanceo.py)
 # -------------------------
-def _enumerar_opciones_exactas_por_bloques(bloques, name2elo, n_opciones=12, diff_max=350):
+def generar_opciones_ids(bloques, n_opciones=12, diff_max=350, jugadores_por_equipo=None):
     """
-    Enumeración EXACTA de opciones respetando bloques (duplas/tríos).
-    Devuelve top N por ΔELO real.
+    Genera hasta n_opciones opciones distintas, priorizando las de menor ΔELO REAL.
+
+    - Equipos de jugadores_por_equipo (por defecto, la mitad de los jugadores).
+    - Cada bloque (dupla/trío) es indivisible; el bloque ancla (primer jugador si son
+      todos singles, si no el bloque con el menor jugador_id) va al Equipo 1 para no
+      repetir opciones espejadas.
+    - balanceo.mejores_particiones: exacto hasta 24 jugadores (enumeración completa o
+      meet-in-the-middle), heurística KK + búsqueda local para más.
+    - Cada opción es la lista de jugador_id de Equipo 1 + Equipo 2 (orden del roster).
 
-    - Cada bloque es indivisible (va entero al Equipo 1 o al 2).
-    - Equipo 1 debe sumar exactamente 5 jugadores.
-    - Para evitar duplicados por swap E1/E2, fijamos un bloque ancla en E1.
+    diff_max no cambia el resultado: si hay N opciones dentro de diff_max, son el top N.
     """
     if not bloques:
         return [], []
 
-    sizes = [len(b) for b in bloques]
-    total = sum(sizes)
-    if total != 10:
+    ids, elos, idx_bloques = roster_desde_bloques(bloques)
+    n = len(ids)
+    k = int(jugadores_por_equipo or n // 2)
+    if k <= 0 or n != 2 * k:
         return [], []
 
-    def bloque_min_nombre(bl):
-        return min(p["nombre"] for p in bl)
-
-    anchor_i = min(range(len(bloques)), key=lambda i: bloque_min_nombre(bloques[i]))
-    anchor_size = sizes[anchor_i]
-    if anchor_size > 5:
-        return [], []
-
-    need = 5 - anchor_size
-    indices_rest = [i for i in range(len(bloques)) if i != anchor_i]
-
-    bloque_names = []
-    for bl in bloques:
-        ns = [p["nombre"] for p in bl]
-        bloque_names.append(ns)
-
-    candidatos = []  # (diff, elo1, elo2, lista10)
-
-    if need == 0:
-        team1_names = sorted(bloque_names[anchor_i])
-        team2_names = []
-        for i in indices_rest:
-            team2_names.extend(bloque_names[i])
-        team2_names = sorted(team2_names)
-
-        if len(team1_names) != 5 or len(team2_names) != 5:
-            return [], []
-
-        elo1 = int(sum(name2elo.get(n, 0) for n in team1_names))
-        elo2 = int(sum(name2elo.get(n, 0) for n in team2_names))
-        diff = abs(elo1 - elo2)
-        candidatos.append((diff, elo1, elo2, team1_names + team2_names))
-
+    if all(len(b) == 1 for b in idx_bloques):
+        anchor = 0
     else:
-        for r in range(0, len(indices_rest) + 1):
-            for comb in itertools.combinations(indices_rest, r):
-                if sum(sizes[i] for i in comb) != need:
-                    continue
-
-                team1_indices = {anchor_i, *comb}
-                team2_indices = set(range(len(bloques))) - team1_indices
-
-                team1_names = []
-                for i in team1_indices:
-                    team1_names.extend(bloque_names[i])
-                team2_names = []
-                for i in team2_indices:
-                    team2_names.extend(bloque_names[i])
-
-                if len(team1_names) != 5 or len(team2_names) != 5:
-                    continue
-
-                team1_names = sorted(team1_names)
-                team2_names = sorted(team2_names)
-
-                elo1 = int(sum(name2elo.get(n, 0) for n in team1_names))
-                elo2 = int(sum(name2elo.get(n, 0) for n in team2_names))
-                diff = abs(elo1 - elo2)
-
-                candidatos.append((diff, elo1, elo2, team1_names + team2_names))
-
-    if not candidatos:
-        return [], []
+        anchor = min(range(len(idx_bloques)), key=lambda b: min(ids[i] for i in idx_bloques[b]))
 
-    candidatos.sort(key=lambda x: x[0])
+    particiones = balanceo.mejores_particiones(elos, idx_bloques, k, n_opciones, anchor=anchor)
 
-    dentro = [c for c in candidatos if c[0] <= diff_max]
-    base = dentro if len(dentro) >= n_opciones else candidatos
+    # blindaje extra (sobre las masks)
+    block_masks = balanceo.mascaras_bloques(idx_bloques)
+    full = (1 << n) - 1
+    seen = set()
 
-    base = base[:min(n_opciones, len(base))]
-    opciones = [c[3] for c in base]
-    diffs = [c[0] for c in base]
+    opciones = []
+    diffs = []
+    for diff, _elo1, _elo2, mask in particiones:
+        key = min(mask, full ^ mask)
+        if key in seen or balanceo.rompe_bloques(mask, block_masks):
+            continue
+        seen.add(key)
+        opciones.append([ids[i] for i in range(n) if mask >> i & 1] +
+                        [ids[i] for i in range(n) if not mask >> i & 1])
+        diffs.append(diff)
     return opciones, diffs
 
 
@@ -639,89 +643,268 @@ def generar_opciones_unicas(
     n_opciones=12,
     diff_max=350,
     max_busquedas=1200,
-    intentos_por_busqueda=3500
+    intentos_por_busqueda=3500,
+    jugadores_por_equipo=None,
 ):
     """
-    Genera hasta n_opciones opciones distintas, priorizando las de menor ΔELO REAL.
-
-    - Si NO hay duplas/tríos (10 singles): calcula TODAS las combinaciones únicas (126) y devuelve top N.
-    - Si SÍ hay duplas/tríos: enumeración EXACTA por bloques y devuelve top N.
-
+    generar_opciones_ids con nombres: cada opción es Equipo 1 (ordenado) + Equipo 2 (ordenado).
     max_busquedas/intentos_por_busqueda quedan por compatibilidad.
     """
-    if not bloques:
-        return [], []
+    opciones, diffs = generar_opciones_ids(bloques, n_opciones, diff_max, jugadores_por_equipo)
+    nombre_de = {p["jugador_id"]: p["nombre"] for bl in bloques for p in bl}
+    out = []
+    for lista in opciones:
+        k = len(lista) // 2
+        out.append(sorted(nombre_de[j] for j in lista[:k]) + sorted(nombre_de[j] for j in lista[k:]))
+    return out, diffs
+
+
+# -------------------------
+# Cache de opciones (LRU, compartido entre sesiones del proceso)
+# -------------------------
+OPCIONES_CACHE_MAX = 64
+_opciones_cache = OrderedDict()  # firma -> (opciones, diffs) como tuplas
+_opciones_cache_lock = threading.Lock()
 
-    name2elo = _name2elo_from_bloques(bloques)
 
-    # 10 singles -> 126 combinaciones únicas
-    if len(bloques) == 10 and all(len(b) == 1 for b in bloques):
-        names = [b[0]["nombre"] for b in bloques]
-        anchor = names[0]
-        others = names[1:]
+def _canon_bloques(bloques):
+    """Bloques en orden canónico (no depende del orden de inscripción)."""
+    out = [sorted(bl, key=lambda p: int(p["jugador_id"])) for bl in bloques]
+    out.sort(key=lambda bl: (-len(bl), -sum(int(p.get("elo", 0) or 0) for p in bl), int(bl[0]["jugador_id"])))
+    return out
+
 
-        candidatos = []
-        for comb in itertools.combinations(others, 4):
-            team1 = [anchor] + list(comb)
-            team2 = [n for n in names if n not in team1]
+def firma_opciones(bloques, n_opciones=12, diff_max=350, jugadores_por_equipo=None):
+    """
+    Firma canónica del pedido: jugadores (id, ELO) ordenados por id,
+    bloques de más de un jugador (por ids) y parámetros de generación.
+    """
+    jugadores = tuple(sorted(
+        (int(p["jugador_id"]), int(p.get("elo", 0) or 0)) for bl in bloques for p in bl
+    ))
+    grupos = tuple(sorted(
+        tuple(sorted(int(p["jugador_id"]) for p in bl)) for bl in bloques if len(bl) > 1
+    ))
+    return (jugadores, grupos, int(n_opciones), int(diff_max), int(jugadores_por_equipo or 0))
+
+
+def opciones_cacheadas(firma):
+    """(opciones, diffs) ya calculadas para esa firma, o None (no calcula)."""
+    with _opciones_cache_lock:
+        hit = _opciones_cache.get(firma)
+        if hit is None:
+            return None
+        _opciones_cache.move_to_end(firma)
+    return [list(o) for o in hit[0]], list(hit[1])
+
+
+def generar_opciones_cacheadas(bloques, n_opciones=12, diff_max=350, jugadores_por_equipo=None):
+    """generar_opciones_ids con memo LRU por firma del roster."""
+    firma = firma_opciones(bloques, n_opciones, diff_max, jugadores_por_equipo)
+    hit = opciones_cacheadas(firma)
+    if hit is not None:
+        return hit
+
+    opts, diffs = generar_opciones_ids(
+        _canon_bloques(bloques),
+        n_opciones=n_opciones,
+        diff_max=diff_max,
+        jugadores_por_equipo=jugadores_por_equipo,
+    )
+    with _opciones_cache_lock:
+        _opciones_cache[firma] = (tuple(tuple(o) for o in opts), tuple(diffs))
+        _opciones_cache.move_to_end(firma)
+        while len(_opciones_cache) > OPCIONES_CACHE_MAX:
+            _opciones_cache.popitem(last=False)
+    return [list(o) for o in opts], list(diffs)
 
-            team1 = sorted(team1)
-            team2 = sorted(team2)
 
-            elo1 = int(sum(name2elo.get(n, 0) for n in team1))
-            elo2 = int(sum(name2elo.get(n, 0) for n in team2))
-            diff = abs(elo1 - elo2)
+# -------------------------
+# Puntaje multiobjetivo (ELO + historial reciente + rachas de camiseta)
+# -------------------------
+# puntaje = elo·ΔELO + repetido·[mismo cruce que un partido reciente]
+#         + pareja·(veces que las parejas de cada equipo ya jugaron juntas)
+#         + camiseta·(partidos de racha que se estirarían con la camiseta asignada)
+PESOS_PUNTAJE = {"elo": 1.0, "repetido": 150.0, "pareja": 6.0, "camiseta": 15.0}
+PARTIDOS_HISTORIAL = 20  # últimos N oficiales jugados de cada jugador del roster
+POOL_PUNTAJE = 80        # candidatas (por ΔELO) que se re-puntúan
 
-            candidatos.append((diff, elo1, elo2, team1 + team2))
 
-        candidatos.sort(key=lambda x: x[0])
-        dentro = [c for c in candidatos if c[0] <= diff_max]
-        base = dentro if len(dentro) >= n_opciones else candidatos
+def contexto_puntaje(partido_id: int, jugador_ids, ultimos=PARTIDOS_HISTORIAL):
+    """
+    Matrices precalculadas sobre los índices del roster (jugador_ids), con una consulta.
+    La ventana es por jugador: sus últimos N oficiales con resultado (sin este partido).
+    - juntos[i, j]: veces que i y j jugaron en el mismo equipo en un partido reciente de ambos
+    - repetidos: masks canónicas (Equipo 1) de esos partidos que tuvieron exactamente este roster
+    - racha[i]: +largo si viene de 'clara', -largo si viene de 'oscura' (0 si es menor a 2)
+    """
+    ids = [int(j) for j in jugador_ids]
+    pos = {jid: i for i, jid in enumerate(ids)}
+    n = len(ids)
+    juntos = np.zeros((n, n), dtype=np.int64)
+    racha = np.zeros(n, dtype=np.int64)
+    repetidos = set()
+    if n == 0:
+        return {"ids": ids, "juntos": juntos, "repetidos": repetidos, "racha": racha}
+
+    ph = ",".join("?" * n)
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute(f"""
+        WITH mios AS (
+            SELECT pj.partido_id, pj.jugador_id,
+                   ROW_NUMBER() OVER (PARTITION BY pj.jugador_id
+                                      ORDER BY p.fecha_dia DESC, p.id DESC) AS nro
+            FROM partido_jugadores pj
+            JOIN partidos p ON p.id = pj.partido_id
+            WHERE pj.jugador_id IN ({ph})
+              AND pj.equipo IN (1, 2)
+              AND p.id <> ?
+              AND p.es_oficial = 1
+              AND p.tipo = 'cerrado'
+              AND (p.ganador IS NOT NULL OR p.diferencia_gol IS NOT NULL)
+        ), ult AS (
+            SELECT partido_id, jugador_id FROM mios WHERE nro <= ?
+        )
+        SELECT pj.partido_id, pj.jugador_id, pj.equipo, pj.camiseta,
+               u.jugador_id IS NOT NULL AS reciente
+        FROM (SELECT DISTINCT partido_id FROM ult) m
+        JOIN partidos p ON p.id = m.partido_id
+        JOIN partido_jugadores pj ON pj.partido_id = m.partido_id AND pj.equipo IN (1, 2)
+        LEFT JOIN ult u ON u.partido_id = pj.partido_id AND u.jugador_id = pj.jugador_id
+        ORDER BY p.fecha_dia DESC, p.id DESC
+    """, (*ids, partido_id, int(ultimos)))
+    rows = cur.fetchall()
+    conn.close()
 
-        base = base[:min(n_opciones, len(base))]
-        opciones = [c[3] for c in base]
-        diffs = [c[0] for c in base]
+    # partidos del más reciente al más viejo
+    partidos = OrderedDict()
+    for pid, jid, eq, cam, reciente in rows:
+        partidos.setdefault(pid, []).append((jid, eq, cam, bool(reciente)))
+
+    full = (1 << n) - 1
+    ultima = {}       # índice -> color de la racha en curso
+    cortada = set()   # índices cuya racha ya terminó (yendo hacia atrás)
+    for filas in partidos.values():
+        for eq in (1, 2):
+            idx = [pos[jid] for jid, e, _c, rec in filas if e == eq and rec]
+            if len(idx) > 1:
+                juntos[np.ix_(idx, idx)] += 1
+        if {jid for jid, _e, _c, _r in filas} == set(ids):
+            mask = 0
+            for jid, e, _c, _r in filas:
+                if e == 1:
+                    mask |= 1 << pos[jid]
+            repetidos.add(min(mask, full ^ mask))
+        for jid, _e, cam, rec in filas:
+            i = pos.get(jid)
+            if i is None or i in cortada:
+                continue
+            if not rec:  # fuera de su ventana
+                cortada.add(i)
+                continue
+            c = (cam or "").strip().lower()
+            if c not in JERSEYS or ultima.setdefault(i, c) != c:
+                cortada.add(i)
+                continue
+            racha[i] += 1 if c == "clara" else -1
+    np.fill_diagonal(juntos, 0)
+    racha[np.abs(racha) < 2] = 0
+    return {"ids": ids, "juntos": juntos, "repetidos": repetidos, "racha": racha}
 
-        # blindaje extra (por las dudas)
-        opciones = _filter_options_by_blocks(opciones, bloques)
-        diffs = diffs[:len(opciones)]
-        return opciones, diffs
 
-    # Con bloques -> exacto por bloques
-    opciones, diffs = _enumerar_opciones_exactas_por_bloques(
-        bloques,
-        name2elo,
-        n_opciones=n_opciones,
-        diff_max=diff_max
+def puntuar_opciones(opciones, diffs, ctx, pesos=None):
+    """
+    Puntaje de cada opción (listas de jugador_id) con las matrices de contexto_puntaje.
+    Devuelve (opciones, diffs, detalles) ordenadas por puntaje; cada opción queda del lado
+    (Equipo 1 = clara) que menos estira rachas de camiseta.
+    """
+    if not opciones:
+        return [], [], []
+    w = {**PESOS_PUNTAJE, **(pesos or {})}
+    pos = {jid: i for i, jid in enumerate(ctx["ids"])}
+    n = len(pos)
+    full = (1 << n) - 1
+
+    X = np.zeros((len(opciones), n), dtype=np.int64)
+    repetido = np.zeros(len(opciones), dtype=np.int64)
+    for r, lista in enumerate(opciones):
+        idx = [pos[j] for j in lista[:len(lista) // 2]]
+        X[r, idx] = 1
+        mask = sum(1 << i for i in idx)
+        repetido[r] = min(mask, full ^ mask) in ctx["repetidos"]
+    Y = 1 - X
+
+    juntos = ctx["juntos"]
+    parejas = (np.einsum("mi,ij,mj->m", X, juntos, X) + np.einsum("mi,ij,mj->m", Y, juntos, Y)) // 2
+    clara = np.maximum(ctx["racha"], 0)
+    oscura = np.maximum(-ctx["racha"], 0)
+    cam_tal_cual = X @ clara + Y @ oscura
+    cam_espejada = Y @ clara + X @ oscura
+    espejar = cam_espejada < cam_tal_cual
+    camiseta = np.minimum(cam_tal_cual, cam_espejada)
+    diffs_arr = np.asarray(diffs, dtype=np.float64)
+    puntaje = (w["elo"] * diffs_arr + w["repetido"] * repetido
+               + w["pareja"] * parejas + w["camiseta"] * camiseta)
+
+    orden = np.argsort(puntaje, kind="stable")
+    out_opts, out_diffs, detalles = [], [], []
+    for r in orden.tolist():
+        lista = opciones[r]
+        k = len(lista) // 2
+        out_opts.append(lista[k:] + lista[:k] if espejar[r] else list(lista))
+        out_diffs.append(diffs[r])
+        detalles.append({
+            "puntaje": float(puntaje[r]),
+            "repetido": bool(repetido[r]),
+            "parejas": int(parejas[r]),
+            "camiseta": int(camiseta[r]),
+        })
+    return out_opts, out_diffs, detalles
+
+
+def generar_opciones_puntuadas(partido_id: int, bloques, n_opciones=12, jugadores_por_equipo=None,
+                               pesos=None, pool=POOL_PUNTAJE, diff_max=350):
+    """
+    Top n_opciones por puntaje multiobjetivo: toma las 'pool' mejores por ΔELO (cacheadas)
+    y las re-ordena con el historial reciente del roster.
+    """
+    opts, diffs = generar_opciones_cacheadas(
+        bloques, n_opciones=max(pool, n_opciones), diff_max=diff_max, jugadores_por_equipo=jugadores_por_equipo
     )
+    if not opts:
+        return [], [], []
+    ids = [int(p["jugador_id"]) for bl in bloques for p in bl]
+    ctx = contexto_puntaje(partido_id, ids)
+    opts, diffs, detalles = puntuar_opciones(opts, diffs, ctx, pesos)
+    return _recortar_por_diff(opts, diffs, detalles, n_opciones, diff_max)
 
-    # blindaje extra
-    opciones = _filter_options_by_blocks(opciones, bloques)
-    diffs = diffs[:len(opciones)]
-    return opciones, diffs
+
+def _recortar_por_diff(opciones, diffs, detalles, n_opciones, diff_max):
+    """
+    Top n_opciones de una lista ya ordenada por puntaje, respetando diff_max como el
+    generador por ΔELO: si hay n_opciones dentro de diff_max, sólo esas (en orden de
+    puntaje); si no, todas las de adentro y se completa con las de menor ΔELO de afuera.
+    """
+    dentro = [i for i, d in enumerate(diffs) if d <= diff_max]
+    if len(dentro) < n_opciones:
+        afuera = sorted((i for i, d in enumerate(diffs) if d > diff_max), key=lambda i: diffs[i])
+        dentro += afuera[:n_opciones - len(dentro)]
+    elegidas = dentro[:n_opciones]
+    return ([opciones[i] for i in elegidas], [diffs[i] for i in elegidas],
+            [detalles[i] for i in elegidas])
 
 
 # -------------------------
 # Guardar / borrar equipos elegidos
 # -------------------------
-def guardar_opcion(partido_id: int, combinacion):
-    conn = get_connection()
-    cur = conn.cursor()
-
-    for idx, nombre in enumerate(combinacion):
-        if not nombre:
-            continue
-        equipo_val = 1 if idx < 5 else 2
-        cur.execute(
-            """
-            UPDATE partido_jugadores
-               SET equipo = ?
-             WHERE partido_id = ?
-               AND jugador_id = (SELECT id FROM jugadores WHERE nombre = ? LIMIT 1)
-            """,
-            (equipo_val, partido_id, nombre),
-        )
-
+def guardar_opcion(partido_id: int, combinacion, camisetas_por_defecto=True):
+    """
+    Persiste la opción elegida (jugador_id de Equipo 1 + Equipo 2) en una sola transacción:
+    - equipo de todo el roster con un único UPDATE ... CASE
+    - camisetas por defecto (clara / oscura) para el equipo que todavía no tenga
+    - equipos_generados_por del partido
+    """
     admin_username = "desconocido"
     user = getattr(st.session_state, "user", None)
     try:
@@ -732,17 +915,49 @@ def guardar_opcion(partido_id: int, combinacion):
     except Exception:
         pass
 
-    cur.execute(
-        """
-        UPDATE partidos
-           SET equipos_generados_por = ?
-         WHERE id = ?
-        """,
-        (admin_username, partido_id),
-    )
+    k = len(combinacion) // 2
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        ids1 = [int(j) for j in combinacion[:k] if j is not None]
+        todos = ids1 + [int(j) for j in combinacion[k:] if j is not None]
+        if todos:
+            ph1 = ",".join("?" * len(ids1)) or "NULL"
+            ph = ",".join("?" * len(todos))
+            cur.execute(f"""
+                UPDATE partido_jugadores
+                   SET equipo = CASE WHEN jugador_id IN ({ph1}) THEN 1 ELSE 2 END
+                 WHERE partido_id = ?
+                   AND jugador_id IN ({ph})
+            """, (*ids1, partido_id, *todos))
+
+        if camisetas_por_defecto:
+            cur.execute("""
+                SELECT DISTINCT equipo
+                FROM partido_jugadores
+                WHERE partido_id = ?
+                  AND equipo IN (1, 2)
+                  AND camiseta IS NOT NULL
+                  AND camiseta <> ''
+            """, (partido_id,))
+            sin_camiseta = [e for e in (1, 2) if e not in {r[0] for r in cur.fetchall()}]
+            if sin_camiseta:
+                cur.execute(f"""
+                    UPDATE partido_jugadores
+                       SET camiseta = CASE equipo WHEN 1 THEN 'clara' ELSE 'oscura' END
+                     WHERE partido_id = ?
+                       AND equipo IN ({",".join("?" * len(sin_camiseta))})
+                """, (partido_id, *sin_camiseta))
 
-    conn.commit()
-    conn.close()
+        cur.execute("""
+            UPDATE partidos
+               SET equipos_generados_por = ?
+             WHERE id = ?
+        """, (admin_username, partido_id))
+        conn.commit()
+    finally:
+        conn.close()  # sin commit, el pool descarta lo escrito
+    sync_now()
 
 
 def borrar_equipos_confirmados(partido_id: int):
@@ -760,7 +975,7 @@ def borrar_equipos_confirmados(partido_id: int):
 def equipos_ya_confirmados(partido_id: int):
     jugadores = obtener_jugadores_partido_full(partido_id)
     asignados = [j for j in jugadores if j["equipo"] in (1, 2)]
-    if len(asignados) != 10:
+    if len(asignados) != 2 * obtener_jugadores_por_equipo(partido_id):
         return False, [], [], 0, 0
     team1 = [j["nombre"] for j in jugadores if j["equipo"] == 1]
     team2 = [j["nombre"] for j in jugadores if j["equipo"] == 2]
@@ -783,74 +998,58 @@ def calcular_rachas_camiseta(partido_id: int, fecha_ref):
     if fecha_ref is None:
         return []
 
-    jugadores = obtener_jugadores_partido_full(partido_id)
-    if not jugadores:
-        return []
-
     fecha_fin = fecha_ref.date()
     fecha_ini = fecha_fin - timedelta(days=60)
 
+    # Una sola consulta para todo el roster, acotada a la ventana:
+    # - hist: partidos de cada jugador en la ventana, numerados del más reciente (rn = 1)
+    # - ultimo: color del partido más reciente (si tiene camiseta válida)
+    # - corte: primer partido (hacia atrás) con otro color o sin camiseta
+    # La racha son los partidos anteriores al corte.
     conn = get_connection()
     cur = conn.cursor()
-
-    avisos = []
-
-    for j in jugadores:
-        jid = j["jugador_id"]
-
-        cur.execute("""
-            SELECT p.fecha, pj.camiseta
-            FROM partidos p
-            JOIN partido_jugadores pj ON pj.partido_id = p.id
-            WHERE pj.jugador_id = ?
-              AND p.fecha IS NOT NULL
-            ORDER BY date(p.fecha) ASC, p.id ASC
-        """, (jid,))
-        rows = cur.fetchall()
-        if not rows:
-            continue
-
-        cams = []
-        for fecha_str, cam in rows:
-            dt = parsear_fecha(fecha_str)
-            if dt is None:
-                continue
-            d = dt.date()
-            if d < fecha_ini or d > fecha_fin:
-                continue
-
-            if cam is None:
-                cams.append(None)
-            else:
-                c = str(cam).strip().lower()
-                if c.startswith("clara"):
-                    cams.append("clara")
-                elif c.startswith("osc"):
-                    cams.append("oscura")
-                else:
-                    cams.append(None)
-
-        if not cams:
-            continue
-
-        last_color = None
-        count = 0
-        for c in reversed(cams):
-            if c and (last_color is None or c == last_color):
-                last_color = c
-                count += 1
-            else:
-                break
-
-        if last_color and count >= 3:
-            avisos.append({
-                "nombre": j["nombre"],
-                "camiseta": last_color,
-                "veces": count,
-            })
-
+    cur.execute("""
+        WITH hist AS (
+            SELECT pj.jugador_id,
+                   CASE
+                     WHEN lower(trim(pj.camiseta)) LIKE 'clara%' THEN 'clara'
+                     WHEN lower(trim(pj.camiseta)) LIKE 'osc%'   THEN 'oscura'
+                   END AS cam,
+                   ROW_NUMBER() OVER (
+                     PARTITION BY pj.jugador_id ORDER BY p.fecha_dia DESC, p.id DESC
+                   ) AS rn
+            FROM partido_jugadores pj
+            JOIN partidos p ON p.id = pj.partido_id
+            WHERE pj.jugador_id IN (SELECT jugador_id FROM partido_jugadores WHERE partido_id = ?)
+              AND p.fecha_dia BETWEEN ? AND ?
+        ),
+        ultimo AS (
+            SELECT jugador_id, cam FROM hist WHERE rn = 1 AND cam IS NOT NULL
+        ),
+        corte AS (
+            SELECT h.jugador_id, MIN(h.rn) AS rn_corte
+            FROM hist h
+            JOIN ultimo u ON u.jugador_id = h.jugador_id
+            WHERE h.cam IS NULL OR h.cam <> u.cam
+            GROUP BY h.jugador_id
+        )
+        SELECT j.nombre AS nombre,
+               u.cam AS camiseta,
+               COALESCE(c.rn_corte - 1, (SELECT MAX(h.rn) FROM hist h WHERE h.jugador_id = u.jugador_id)) AS veces
+        FROM ultimo u
+        JOIN jugadores j ON j.id = u.jugador_id
+        JOIN partido_jugadores rp ON rp.partido_id = ? AND rp.jugador_id = u.jugador_id
+        LEFT JOIN corte c ON c.jugador_id = u.jugador_id
+        ORDER BY rp.id
+    """, (partido_id, fecha_ini.isoformat(), fecha_fin.isoformat(), partido_id))
+    rows = cur.fetchall()
     conn.close()
-    return avisos
+
+    return [{
+        "nombre": r["nombre"],
+        "camiseta": r["camiseta"],
+        "veces": int(r["veces"]),
+    } for r in rows if int(r["veces"]) >= 3]
 
 
 # -------------------------
@@ -858,7 +1057,7 @@ def calcular_rachas_camiseta(partido_id: int, fecha_ref):
 # -------------------------
 def render_vista_jugadores(partido_id: int):
     jugadores = obtener_jugadores_partido_full(partido_id)
-    if len([j for j in jugadores if j["equipo"] in (1, 2)]) != 10:
+    if len([j for j in jugadores if j["equipo"] in (1, 2)]) != 2 * obtener_jugadores_por_equipo(partido_id):
         return
 
     team1 = [j["nombre"] for j in jugadores if j["equipo"] == 1]
@@ -894,6 +1093,301 @@ def render_vista_jugadores(partido_id: int):
             st.write(f"- {n}")
 
 
+# -------------------------
+# Varios partidos simultáneos (pool compartido)
+# -------------------------
+def obtener_partidos_simultaneos():
+    """
+    Partidos abiertos sin equipos confirmados agrupados por (día, grupos):
+    lista de dicts {fecha_dia, grupos, partidos: [filas]} con 2+ partidos.
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT p.id,
+               p.numero_publico AS np,
+               p.fecha,
+               p.fecha_dia,
+               p.hora,
+               p.jugadores_por_equipo AS jpe,
+               IFNULL(c.nombre,'Sin asignar') AS cancha_nombre,
+               (SELECT GROUP_CONCAT(g, ',') FROM (
+                    SELECT pg.grupo_id AS g FROM partido_grupos pg
+                     WHERE pg.partido_id = p.id ORDER BY pg.grupo_id
+               )) AS grupos,
+               (SELECT COUNT(*) FROM partido_jugadores pj WHERE pj.partido_id = p.id) AS inscriptos,
+               (SELECT COUNT(*) FROM partido_jugadores pj
+                 WHERE pj.partido_id = p.id AND pj.equipo IN (1, 2)) AS con_equipo
+        FROM partidos p
+        LEFT JOIN canchas c ON p.cancha_id = c.id
+        WHERE p.tipo = 'abierto'
+          AND p.ganador IS NULL
+          AND p.diferencia_gol IS NULL
+        ORDER BY p.fecha_dia ASC, p.hora ASC, p.id ASC
+    """)
+    rows = cur.fetchall()
+    conn.close()
+
+    por_clave = OrderedDict()
+    for r in rows:
+        if int(r["con_equipo"] or 0) > 0:
+            continue
+        por_clave.setdefault((r["fecha_dia"], r["grupos"] or ""), []).append(r)
+    return [{"fecha_dia": f, "grupos": g, "partidos": ps}
+            for (f, g), ps in por_clave.items() if len(ps) >= 2]
+
+
+LIMITE_BLOQUES = {2: 2, 3: 2}  # duplas y tríos por partido, como en ui_definir_bloques
+
+
+def _numerar_bloques(tamaño_de):
+    """
+    Bloques de un partido como los guarda ui_definir_bloques: duplas en 1/2 y tríos en 3/4.
+    tamaño_de = {clave: cantidad de jugadores} -> {clave: bloque}, o None si hay más de
+    2 duplas o más de 2 tríos. Un bloque de un solo jugador queda sin bloque.
+    """
+    libres = {2: [1, 2], 3: [3, 4]}
+    bloque_de = {}
+    for clave, n in tamaño_de.items():
+        if n < 2:
+            continue
+        slots = libres[min(n, 3)]
+        if not slots:
+            return None
+        bloque_de[clave] = slots.pop(0)
+    return bloque_de
+
+
+def generar_reparto(partido_ids):
+    """
+    Une los rosters de partido_ids y los reparte en esos partidos (2 equipos cada uno,
+    con su jugadores_por_equipo) minimizando el peor ΔELO. Respeta duplas/tríos.
+    Devuelve (reparto, error): reparto = [{partido_id, equipo1, equipo2, elo1, elo2}]
+    con listas de jugador_id; a cada partido le toca el reparto que menos jugadores mueve.
+    """
+    partido_ids = [int(p) for p in partido_ids]
+    if len(partido_ids) < 2:
+        return None, "Elegí al menos dos partidos."
+    ph = ",".join("?" * len(partido_ids))
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute(f"""
+        SELECT pj.partido_id, pj.jugador_id, pj.bloque, COALESCE(j.elo_actual, 1000) AS elo
+        FROM partido_jugadores pj
+        JOIN jugadores j ON j.id = pj.jugador_id
+        WHERE pj.partido_id IN ({ph})
+        ORDER BY pj.partido_id, pj.id
+    """, partido_ids)
+    rows = cur.fetchall()
+    cur.execute(f"SELECT id, jugadores_por_equipo FROM partidos WHERE id IN ({ph})", partido_ids)
+    jpe_de = {r[0]: int(r[1] or 5) for r in cur.fetchall()}
+    conn.close()
+
+    ids = [int(r["jugador_id"]) for r in rows]
+    if len(set(ids)) != len(ids):
+        return None, "Hay jugadores anotados en más de uno de esos partidos."
+    tamaños = [jpe_de.get(pid, 5) for pid in partido_ids]
+    if len(ids) != 2 * sum(tamaños):
+        return None, f"El pool tiene {len(ids)} jugadores y los partidos suman {2 * sum(tamaños)} lugares."
+
+    # bloques: (partido, bloque) de origen; singles aparte
+    idx_de_bloque = OrderedDict()
+    bloques = []
+    for i, r in enumerate(rows):
+        b = r["bloque"]
+        b_str = "" if b is None else str(b).strip()
+        if b_str in ("", "0"):
+            bloques.append([i])
+        else:
+            idx_de_bloque.setdefault((r["partido_id"], b_str), []).append(i)
+    bloques = list(idx_de_bloque.values()) + bloques
+    rating_de = motores_rating.ratings_actuales(ids)
+    elos = [int(float(rating_de.get(jid, r["elo"]))) for jid, r in zip(ids, rows)]
+
+    equipos_idx, _obj = balanceo.repartir_en_partidos(elos, bloques, tamaños, limite=LIMITE_BLOQUES)
+    if equipos_idx is None:
+        return None, "No se pudo repartir respetando duplas/tríos."
+    clave_de = {i: clave for clave, idxs in idx_de_bloque.items() for i in idxs}
+    for m in range(len(partido_ids)):
+        tamaño_de = defaultdict(int)
+        for i in equipos_idx[2 * m] + equipos_idx[2 * m + 1]:
+            if i in clave_de:
+                tamaño_de[clave_de[i]] += 1
+        if _numerar_bloques(tamaño_de) is None:
+            return None, "Un partido quedaría con más de 2 duplas o 2 tríos. Revisá los compañeros."
+
+    # partido destino de cada reparto: el que conserva más jugadores (entre los del mismo tamaño)
+    origen = [int(r["partido_id"]) for r in rows]
+    M = len(partido_ids)
+    destino = list(range(M))
+    if M <= 6:
+        def _quedan(perm):
+            return sum(origen[i] == partido_ids[perm[m]]
+                       for m in range(M) for i in equipos_idx[2 * m] + equipos_idx[2 * m + 1])
+        perms = [p for p in itertools.permutations(range(M))
+                 if all(tamaños[p[m]] == tamaños[m] for m in range(M))]
+        destino = list(max(perms, key=_quedan))
+
+    reparto = []
+    for m in range(M):
+        t1, t2 = equipos_idx[2 * m], equipos_idx[2 * m + 1]
+        reparto.append({
+            "partido_id": partido_ids[destino[m]],
+            "equipo1": [ids[i] for i in t1],
+            "equipo2": [ids[i] for i in t2],
+            "elo1": sum(elos[i] for i in t1),
+            "elo2": sum(elos[i] for i in t2),
+        })
+    reparto.sort(key=lambda r: partido_ids.index(r["partido_id"]))
+    return reparto, None
+
+
+def guardar_reparto(reparto):
+    """
+    Aplica el reparto en una transacción: mueve cada jugador a su partido, le asigna
+    equipo y camiseta por defecto (1 = clara, 2 = oscura) y renumera los bloques
+    por partido destino (los de origen podían chocar): duplas en 1/2 y tríos en 3/4.
+    Dentro de la transacción vuelve a validar que los partidos sigan abiertos, sin
+    resultado ni equipos, con el mismo pool de jugadores y a lo sumo 2 duplas y 2 tríos
+    por destino; si no, RuntimeError y no escribe nada. Un jugador movido queda como agregado por el admin en el destino
+    (sin confirmado_por_jugador ni ingreso_desde_espera) y sale de la lista de espera
+    del partido destino si estaba anotado.
+    """
+    partido_ids = [r["partido_id"] for r in reparto]
+    ph = ",".join("?" * len(partido_ids))
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        # primera escritura: abre la transacción (lock de escritura) y valida el estado
+        cur.execute(f"""
+            UPDATE partidos SET tipo = tipo
+             WHERE id IN ({ph})
+               AND tipo = 'abierto'
+               AND ganador IS NULL
+               AND diferencia_gol IS NULL
+        """, partido_ids)
+        if cur.rowcount != len(set(partido_ids)):
+            raise RuntimeError("Alguno de los partidos ya no está abierto o tiene resultado cargado.")
+        cur.execute(f"""
+            SELECT partido_id, jugador_id, bloque, equipo FROM partido_jugadores WHERE partido_id IN ({ph})
+        """, partido_ids)
+        filas_origen = cur.fetchall()
+        if any(r[3] in (1, 2) for r in filas_origen):
+            raise RuntimeError("Alguno de los partidos ya tiene equipos confirmados.")
+        origen = {r[1]: (r[0], r[2]) for r in filas_origen}
+        nuevos_ids = [jid for r in reparto for jid in r["equipo1"] + r["equipo2"]]
+        if len(origen) != len(filas_origen) or set(origen) != set(nuevos_ids) \
+                or len(nuevos_ids) != len(set(nuevos_ids)):
+            raise RuntimeError("Los inscriptos cambiaron desde que se armó el reparto. Volvé a repartir.")
+
+        def _clave(jid):
+            pid_o, b = origen[jid]
+            b_str = "" if b is None else str(b).strip()
+            return None if b_str in ("", "0") else (pid_o, b_str)
+
+        filas, movidos = [], []
+        for r in reparto:
+            tamaño_de = defaultdict(int)
+            for jid in r["equipo1"] + r["equipo2"]:
+                if _clave(jid) is not None:
+                    tamaño_de[_clave(jid)] += 1
+            bloque_de = _numerar_bloques(tamaño_de)
+            if bloque_de is None:
+                raise RuntimeError("Un partido quedaría con más de 2 duplas o 2 tríos. Volvé a repartir.")
+            for eq, cam, ids in ((1, "clara", r["equipo1"]), (2, "oscura", r["equipo2"])):
+                for jid in ids:
+                    pid_o = origen[jid][0]
+                    filas.append((r["partido_id"], eq, cam, bloque_de.get(_clave(jid)), pid_o, jid))
+                    if pid_o != r["partido_id"]:
+                        movidos.append((r["partido_id"], jid))
+        cur.executemany("""
+            UPDATE partido_jugadores
+               SET partido_id = ?, equipo = ?, camiseta = ?, bloque = ?
+             WHERE partido_id = ? AND jugador_id = ?
+        """, filas)
+        cur.executemany("""
+            UPDATE partido_jugadores
+               SET confirmado_por_jugador = 0, ingreso_desde_espera = 0
+             WHERE partido_id = ? AND jugador_id = ?
+        """, movidos)
+        cur.executemany("DELETE FROM lista_espera WHERE partido_id = ? AND jugador_id = ?", movidos)
+        conn.commit()
+    finally:
+        conn.close()  # sin commit, el pool descarta lo escrito
+    sync_now()
+
+
+def _panel_varios_partidos():
+    st.markdown("### 🔀 Repartir varios partidos simultáneos")
+    st.caption("Une los inscriptos de partidos del mismo día y grupos y arma todos los equipos "
+               "a la vez, minimizando el peor ΔELO. Respeta duplas/tríos.")
+
+    candidatos = obtener_partidos_simultaneos()
+    if not candidatos:
+        st.info("No hay dos o más partidos abiertos (sin equipos confirmados) el mismo día y con los mismos grupos.")
+        return
+
+    def _etiqueta_partido(p):
+        return f"N° {p['np']} {formatear_hora(p['hora'])} - {p['cancha_nombre']} ({p['inscriptos']}/{2 * int(p['jpe'] or 5)})"
+
+    etiquetas = []
+    for c in candidatos:
+        dt = parsear_fecha(c["fecha_dia"])
+        dia = f"{DIAS_ES[dt.weekday()]} {dt.strftime('%d/%m/%y')}" if dt else c["fecha_dia"]
+        etiquetas.append(f"{dia} — {len(c['partidos'])} partidos")
+    sel = st.selectbox("Día", etiquetas, key="sb_multi_dia")
+    cand = candidatos[etiquetas.index(sel)]
+    por_id = {p["id"]: p for p in cand["partidos"]}
+    elegidos = st.multiselect(
+        "Partidos a repartir", list(por_id), default=list(por_id),
+        format_func=lambda pid: _etiqueta_partido(por_id[pid]), key="ms_multi_partidos",
+    )
+
+    if st.button("🎲 Repartir", key="btn_multi_repartir", disabled=len(elegidos) < 2):
+        with st.spinner("Repartiendo..."):
+            reparto, error = generar_reparto(elegidos)
+        if error:
+            st.error(error)
+            st.session_state.pop("_multi_reparto", None)
+        else:
+            st.session_state._multi_reparto = reparto
+
+    reparto = st.session_state.get("_multi_reparto")
+    if not reparto or {r["partido_id"] for r in reparto} != set(elegidos):
+        return
+
+    ids = [j for r in reparto for j in r["equipo1"] + r["equipo2"]]
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute(f"SELECT id, nombre FROM jugadores WHERE id IN ({','.join('?' * len(ids))})", ids)
+    nombre_de = {r[0]: r[1] for r in cur.fetchall()}
+    conn.close()
+
+    peor = max(abs(r["elo1"] - r["elo2"]) for r in reparto)
+    st.caption(f"Peor ΔELO: **{peor}**")
+    cols = st.columns(len(reparto))
+    for col, r in zip(cols, reparto):
+        col.markdown(f"**{_etiqueta_partido(por_id[r['partido_id']]).split(' (')[0]}**")
+        col.write(f"ΔELO = {abs(r['elo1'] - r['elo2'])}")
+        col.markdown(f"Equipo 1 ({r['elo1']} ELO) — clara")
+        for n in sorted(nombre_de.get(j, "?") for j in r["equipo1"]):
+            col.write(f"- {n}")
+        col.markdown(f"Equipo 2 ({r['elo2']} ELO) — oscura")
+        for n in sorted(nombre_de.get(j, "?") for j in r["equipo2"]):
+            col.write(f"- {n}")
+
+    if st.button("✅ Aplicar reparto y confirmar equipos", key="btn_multi_aplicar"):
+        try:
+            guardar_reparto(reparto)
+        except RuntimeError as e:
+            st.session_state.pop("_multi_reparto", None)
+            st.error(str(e))
+            return
+        st.session_state.pop("_multi_reparto", None)
+        st.success("Jugadores reubicados y equipos confirmados.")
+        st.rerun()
+
+
 # -------------------------
 # Selección de partido y panel
 # -------------------------
@@ -904,6 +1398,11 @@ def panel_generacion():
         st.session_state.admin_page = None
         st.rerun()
 
+    modo = st.radio("Modo", ["Un partido", "Varios partidos simultáneos"], horizontal=True, key="modo_generacion")
+    if modo == "Varios partidos simultáneos":
+        _panel_varios_partidos()
+        return
+
     partidos = obtener_partidos_abiertos()
     if not partidos:
         st.info("No hay partidos abiertos.")
@@ -1009,17 +1508,19 @@ def panel_generacion():
     # =========================
     st.markdown("### 👥 Jugadores del partido")
 
+    jpe = obtener_jugadores_por_equipo(partido_id)
+    cupo = 2 * jpe
     total_actual = len(jugadores)
     cA, cB = st.columns([1, 2])
     with cA:
-        st.caption(f"Inscriptos: **{total_actual}/{CUPO_PARTIDO}**")
+        st.caption(f"Inscriptos: **{total_actual}/{cupo}** ({jpe} vs {jpe})")
     with cB:
-        if total_actual == CUPO_PARTIDO:
+        if total_actual == cupo:
             st.success("Roster completo ✅")
-        elif total_actual < CUPO_PARTIDO:
-            st.warning(f"Faltan {CUPO_PARTIDO - total_actual} para completar.")
+        elif total_actual < cupo:
+            st.warning(f"Faltan {cupo - total_actual} para completar.")
         else:
-            st.error(f"Hay más de {CUPO_PARTIDO} inscriptos (esto no debería pasar).")
+            st.error(f"Hay más de {cupo} inscriptos (esto no debería pasar).")
 
     # Lista con botones Quitar (reemplaza la impresión como texto)
     cols = st.columns(2)
@@ -1035,7 +1536,7 @@ def panel_generacion():
                 st.rerun()
 
     # Si faltan jugadores, permitir completar desde acá
-    faltan = max(0, CUPO_PARTIDO - total_actual)
+    faltan = max(0, cupo - total_actual)
     if faltan > 0:
         st.divider()
         st.markdown("### ➕ Completar roster (admin)")
@@ -1064,17 +1565,40 @@ def panel_generacion():
                 st.session_state.pop(k, None)
             st.rerun()
 
-        # Sin 10, no se puede generar equipos
+        # Sin el roster completo, no se puede generar equipos
         return
 
-    # Con 10, seguimos EXACTAMENTE igual que antes (matchmaking intacto)
-    names = [j["nombre"] for j in jugadores]
-
-    ui_definir_bloques(partido_id, names)
+    # Con el roster completo, matchmaking
+    ui_definir_bloques(partido_id, jugadores)
 
-    jugadores = obtener_jugadores_partido_full(partido_id)
+    jugadores = elos_para_balanceo(obtener_jugadores_partido_full(partido_id))
     bloques = construir_bloques(jugadores)
 
+    # opciones / equipo actual son listas de jugador_id; nombres sólo al mostrar
+    nombre_de = {j["jugador_id"]: j["nombre"] for j in jugadores}
+    elo_de = {j["jugador_id"]: j["elo"] for j in jugadores}
+
+    def _nombres(ids):
+        return sorted(nombre_de.get(j, "?") for j in ids if j is not None)
+
+    # Opciones en sesión atadas a la firma del roster: si cambia (otro partido, otro
+    # roster, otros bloques) se recuperan del cache o se limpian, sin recalcular.
+    # Con puntaje multiobjetivo no se recupera del cache (depende del historial).
+    usar_puntaje = st.checkbox(
+        "Priorizar variedad (evitar cruces repetidos, parejas frecuentes y rachas de camiseta)",
+        key="chk_puntaje_equipos",
+    )
+    diff_max = 350  # ΔELO máximo entre equipos para las opciones
+    firma = (firma_opciones(bloques, n_opciones=12, diff_max=diff_max, jugadores_por_equipo=jpe), usar_puntaje)
+    if st.session_state.get("_equipos_firma") != firma:
+        hit = None if usar_puntaje else opciones_cacheadas(firma[0])
+        st.session_state._equipos_firma = firma
+        st.session_state._equipos_opciones = hit[0] if hit else None
+        st.session_state._equipos_diffs = hit[1] if hit else None
+        st.session_state._equipos_detalles = None
+        st.session_state._equipos_actual = None
+        st.session_state._equipos_page = 0
+
     # =========================
     # Generar opciones (paginadas 3 en 3)
     # =========================
@@ -1082,18 +1606,26 @@ def panel_generacion():
 
     with cgen:
         if st.button("🎲 Generar opciones balanceadas", key="btn_generar_opciones"):
-            with st.spinner("Buscando hasta 12 alternativas (ordenadas por ΔELO real)..."):
-                opts, diffs = generar_opciones_unicas(
-                    bloques,
-                    n_opciones=12,
-                    diff_max=350,
-                )
+            with st.spinner("Buscando hasta 12 alternativas..."):
+                detalles = None
+                if usar_puntaje:
+                    opts, diffs, detalles = generar_opciones_puntuadas(
+                        partido_id, bloques, n_opciones=12, jugadores_por_equipo=jpe, diff_max=diff_max
+                    )
+                else:
+                    opts, diffs = generar_opciones_cacheadas(
+                        bloques,
+                        n_opciones=12,
+                        diff_max=diff_max,
+                        jugadores_por_equipo=jpe,
+                    )
                 if not opts:
-                    st.error("No se pudieron generar opciones. Revisá duplas/tríos o que haya 10 jugadores.")
+                    st.error(f"No se pudieron generar opciones. Revisá duplas/tríos o que haya {cupo} jugadores.")
                     return
 
                 st.session_state._equipos_opciones = opts
                 st.session_state._equipos_diffs = diffs
+                st.session_state._equipos_detalles = detalles
                 st.session_state._equipos_actual = None
                 st.session_state._equipos_page = 0
                 st.rerun()
@@ -1126,28 +1658,34 @@ def panel_generacion():
         cols = st.columns(3)
         chosen_idx = None
 
-        elo_map = {j["nombre"]: j["elo"] for j in jugadores}
-
         for local_i, col in enumerate(cols[:len(opts_page)]):
             global_i = start + local_i
-            lista10 = opts_page[local_i]
+            lista = opts_page[local_i]
 
-            t1 = [n for n in lista10[:5] if n]
-            t2 = [n for n in lista10[5:] if n]
-            elo1 = int(sum(elo_map.get(n, 0) for n in t1))
-            elo2 = int(sum(elo_map.get(n, 0) for n in t2))
+            t1 = [j for j in lista[:jpe] if j is not None]
+            t2 = [j for j in lista[jpe:] if j is not None]
+            elo1 = int(sum(elo_de.get(j, 0) for j in t1))
+            elo2 = int(sum(elo_de.get(j, 0) for j in t2))
             delta = abs(elo1 - elo2)
 
             col.markdown(f"### Opción {global_i + 1}")
             col.write(f"ΔELO = {delta}")
             col.caption(f"Equipo 1: {elo1} · Equipo 2: {elo2}")
+            detalles = st.session_state.get("_equipos_detalles")
+            if detalles and global_i < len(detalles):
+                d = detalles[global_i]
+                col.caption(
+                    f"Puntaje {d['puntaje']:.0f} · "
+                    f"{'cruce repetido' if d['repetido'] else 'cruce nuevo'} · "
+                    f"parejas repetidas: {d['parejas']} · rachas de camiseta: {d['camiseta']}"
+                )
 
             col.markdown("**Equipo 1**")
-            for n in t1:
+            for n in _nombres(t1):
                 col.write(f"- {n}")
 
             col.markdown("**Equipo 2**")
-            for n in t2:
+            for n in _nombres(t2):
                 col.write(f"- {n}")
 
             if col.button(f"Seleccionar Opción {global_i + 1}", key=f"btn_sel_opt_{global_i + 1}"):
@@ -1164,25 +1702,29 @@ def panel_generacion():
         st.markdown("### ✍️ Ajuste manual")
 
         equipo_actual = st.session_state._equipos_actual
-        team1 = equipo_actual[:5]
-        team2 = equipo_actual[5:]
+        team1 = equipo_actual[:jpe]
+        team2 = equipo_actual[jpe:]
+
+        elo1 = int(sum(elo_de.get(j, 0) for j in team1 if j is not None))
+        elo2 = int(sum(elo_de.get(j, 0) for j in team2 if j is not None))
 
-        elo_map = {j["nombre"]: j["elo"] for j in jugadores}
-        elo1 = int(sum(elo_map.get(n, 0) for n in team1 if n))
-        elo2 = int(sum(elo_map.get(n, 0) for n in team2 if n))
+        def _fmt(jid):
+            return "(ninguno)" if jid is None else nombre_de.get(jid, "?")
 
         c1, c2 = st.columns(2)
         with c1:
             st.markdown(f"**Equipo 1 ({elo1} ELO)**")
-            st.write(", ".join([n for n in team1 if n]))
-            a = st.selectbox("Jugador de Equipo 1", ["(ninguno)"] + [n for n in team1 if n], key="swap_a")
+            st.write(", ".join(_nombres(team1)))
+            a = st.selectbox("Jugador de Equipo 1", [None] + sorted((j for j in team1 if j is not None), key=_fmt),
+                             format_func=_fmt, key="swap_a")
         with c2:
             st.markdown(f"**Equipo 2 ({elo2} ELO)**")
-            st.write(", ".join([n for n in team2 if n]))
-            b = st.selectbox("Jugador de Equipo 2", ["(ninguno)"] + [n for n in team2 if n], key="swap_b")
+            st.write(", ".join(_nombres(team2)))
+            b = st.selectbox("Jugador de Equipo 2", [None] + sorted((j for j in team2 if j is not None), key=_fmt),
+                             format_func=_fmt, key="swap_b")
 
         if st.button("↔️ Intercambiar", key="btn_swap"):
-            if a != "(ninguno)" and b != "(ninguno)":
+            if a is not None and b is not None:
                 t1 = team1[:]
                 t2 = team2[:]
                 i1 = t1.index(a)
@@ -1197,16 +1739,23 @@ def panel_generacion():
                     st.session_state._equipos_actual = candidato
                     st.rerun()
 
-        equipo_actual = st.session_state._equipos_actual
-        team1 = equipo_actual[:5]
-        team2 = equipo_actual[5:]
-        elo1 = int(sum(elo_map.get(n, 0) for n in team1 if n))
-        elo2 = int(sum(elo_map.get(n, 0) for n in team2 if n))
-        st.markdown(f"**Equipo 1 ({elo1} ELO)**: " + ", ".join([n for n in team1 if n]))
-        st.markdown(f"**Equipo 2 ({elo2} ELO)**: " + ", ".join([n for n in team2 if n]))
+        # Sugerencias: mejores intercambios (simples / dobles) que bajan el ΔELO
+        sugerencias = sugerir_intercambios(equipo_actual, bloques)
+        if sugerencias:
+            st.markdown("#### 💡 Intercambios sugeridos")
+            for si, (nuevo, sale1, sale2) in enumerate(sugerencias):
+                cs1, cs2 = st.columns([4, 1])
+                cs1.write(f"{', '.join(_nombres(sale1))} ↔ {', '.join(_nombres(sale2))} "
+                          f"— ΔELO {abs(elo1 - elo2)} → {nuevo}")
+                if cs2.button("Aplicar", key=f"btn_sug_swap_{si}"):
+                    st.session_state._equipos_actual = aplicar_intercambio(equipo_actual, sale1, sale2)
+                    st.rerun()
+
+        st.markdown(f"**Equipo 1 ({elo1} ELO)**: " + ", ".join(_nombres(team1)))
+        st.markdown(f"**Equipo 2 ({elo2} ELO)**: " + ", ".join(_nombres(team2)))
 
         if st.button("✅ Confirmar equipos", key="btn_confirmar_equipos"):
-            if len([n for n in team1 if n]) == 5 and len([n for n in team2 if n]) == 5:
+            if len([j for j in team1 if j is not None]) == jpe and len([j for j in team2 if j is not None]) == jpe:
                 # Validación final por si acaso
                 groups = _build_block_rules_from_bloques(bloques)
                 if groups and _violates_blocks(team1 + team2, groups):
@@ -1214,19 +1763,15 @@ def panel_generacion():
                 else:
                     guardar_opcion(partido_id, equipo_actual)
 
-                    if obtener_camiseta_equipo(partido_id, 1) is None:
-                        asignar_camiseta_equipo(partido_id, 1, "clara")
-                    if obtener_camiseta_equipo(partido_id, 2) is None:
-                        asignar_camiseta_equipo(partido_id, 2, "oscura")
-
                     st.success("Equipos confirmados y guardados en la base de datos.")
                     st.session_state._equipos_opciones = None
                     st.session_state._equipos_diffs = None
+                    st.session_state._equipos_detalles = None
                     st.session_state._equipos_actual = None
                     st.session_state._equipos_page = 0
                     st.rerun()
             else:
-                st.error("Cada equipo debe tener exactamente 5 jugadores.")
+                st.error(f"Cada equipo debe tener exactamente {jpe} jugadores.")
 
     if st.button("⬅️ Volver al menú principal", key="btn_back_bottom"):
         st.session_state.admin_page = None
@@ -1,5 +1,8 @@
 # historial.py — Calendario (FullCalendar) + Historial ELO + Edición/Eliminación
-from db import get_connection
+from db import read_df
+import elo_service
+import motores_rating
+import snapshot_elo
 from pathlib import Path
 from typing import Optional
 from datetime import datetime, date
@@ -21,40 +24,10 @@ def get_conn():
 
 def read_sql_df(query: str, params: tuple = ()):
     """
-    Ejecuta una query y devuelve un DataFrame, autocasteando a numérico
-    las columnas mayormente numéricas para evitar problemas con pandas.
+    Ejecuta una query y devuelve un DataFrame con tipos por columna
+    (esquema declarado o inferencia vectorizada, ver db.read_df).
     """
-    with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute(query, params)
-        rows = cur.fetchall()
-
-    if not rows:
-        return pd.DataFrame()
-
-    df = pd.DataFrame(rows)
-
-    def _mostly_numeric(s: pd.Series, thresh: float = 0.7) -> bool:
-        nn = s.dropna()
-        if len(nn) == 0:
-            return False
-        ok = 0
-        for v in nn:
-            try:
-                float(str(v).replace(",", "."))
-                ok += 1
-            except Exception:
-                pass
-        return ok / len(nn) >= thresh
-
-    for c in df.columns:
-        if df[c].dtype == object and _mostly_numeric(df[c]):
-            df[c] = pd.to_numeric(
-                df[c].astype(str).str.replace(",", ".", regex=False),
-                errors="coerce",
-            )
-
-    return df
+    return read_df(query, params)
 
 
 # =========================
@@ -148,33 +121,10 @@ def _delta_str(antes, despues):
 
 def _team_elo_before_match(partido_id: int):
     """
-    Devuelve un dict {equipo: suma_elo_antes} usando historial_elo.
+    Devuelve un dict {equipo: suma_elo_antes} usando el snapshot de historial_elo.
     Si no hay historial para ese partido (amistoso o no registrado), devuelve {}.
     """
-    df = read_sql_df(
-        """
-        SELECT pj.equipo, SUM(he.elo_antes) AS suma_elo
-          FROM historial_elo he
-          JOIN partido_jugadores pj
-            ON pj.partido_id = he.partido_id
-           AND pj.jugador_id = he.jugador_id
-         WHERE he.partido_id = ?
-         GROUP BY pj.equipo
-        """,
-        (partido_id,),
-    )
-    if df.empty:
-        return {}
-
-    result = {}
-    for _, r in df.iterrows():
-        try:
-            eq = int(r["equipo"])
-            suma = r["suma_elo"] if r["suma_elo"] is not None else 0
-            result[eq] = float(suma)
-        except Exception:
-            continue
-    return result
+    return snapshot_elo.team_elo_at(partido_id)
 
 
 # =========================
@@ -213,7 +163,7 @@ def _partidos_by_date(date_iso: str):
                p.resultado_cargado_por
           FROM partidos p
      LEFT JOIN canchas c ON c.id = p.cancha_id
-         WHERE SUBSTR(p.fecha,1,10) = ?
+         WHERE p.fecha_dia = ?
            AND (p.ganador IS NOT NULL OR p.diferencia_gol IS NOT NULL)
            AND EXISTS (
                  SELECT 1 FROM partido_jugadores pj
@@ -302,11 +252,11 @@ def _render_partidos_detail_for_day(date_iso: str):
             st.markdown("---")
             st.markdown("#### Acciones de corrección")
 
-            # ====== Formulario para EDITAR resultado (NO toca ELO) ======
+            # ====== Formulario para EDITAR resultado (recalcula ELO desde este partido) ======
             with st.form(f"edit_result_form_{pid}"):
                 st.caption(
-                    "✏️ Editar resultado (solo tabla de partidos; "
-                    "el ELO ya calculado **no** se modifica automáticamente)."
+                    "✏️ Editar resultado. Si el partido es oficial, el ELO se recalcula "
+                    "desde este partido en adelante para los jugadores alcanzados."
                 )
 
                 opciones = ["Sin resultado", "Ganó Equipo 1", "Ganó Equipo 2", "Empate"]
@@ -355,15 +305,11 @@ def _render_partidos_detail_for_day(date_iso: str):
                     nuevo_ganador = map_res.get(label_sel)
                     nueva_diff = diff_value if label_sel != "Sin resultado" else None
 
-                    with get_connection() as conn:
-                        cur = conn.cursor()
-                        cur.execute(
-                            "UPDATE partidos SET ganador = ?, diferencia_gol = ? WHERE id = ?",
-                            (nuevo_ganador, nueva_diff, pid),
-                        )
-                        conn.commit()
+                    res = elo_service.editar_resultado(pid, nuevo_ganador, nueva_diff)
+                    motores_rating.actualizar_motor_configurado()
                     st.success(
-                        "Resultado actualizado. Recordá que el ELO no se recalculó automáticamente."
+                        "Resultado actualizado. ELO recalculado en %d partido(s) para %d jugador(es)."
+                        % (res["partidos"], res["jugadores"])
                     )
                     st.rerun()
 
@@ -371,10 +317,9 @@ def _render_partidos_detail_for_day(date_iso: str):
             st.markdown("---")
             st.markdown("#### Eliminar este partido del historial")
             st.caption(
-                "🗑️ Esta acción intenta revertir el ELO de este partido usando `historial_elo` "
-                "y luego borra el partido y sus registros asociados.\n\n"
-                "**Usalo solo si este partido fue cargado por error**. "
-                "Si hay muchos partidos oficiales posteriores, el ranking puede quedar inconsistente."
+                "🗑️ Esta acción borra el partido y sus registros asociados, y recalcula el ELO "
+                "de los partidos oficiales posteriores que compartan jugadores.\n\n"
+                "**Usalo solo si este partido fue cargado por error**."
             )
 
             col_conf, col_btn = st.columns([1, 1])
@@ -393,43 +338,9 @@ def _render_partidos_detail_for_day(date_iso: str):
                             "Marcá la casilla de confirmación antes de eliminar."
                         )
                     else:
-                        # Revertir ELO de este partido usando historial_elo
-                        df_he = read_sql_df(
-                            """
-                            SELECT jugador_id, elo_antes
-                            FROM historial_elo
-                            WHERE partido_id = ?
-                        """,
-                            (pid,),
-                        )
-
-                        with get_connection() as conn:
-                            cur = conn.cursor()
-
-                            # Revertir elo_actual para cada jugador involucrado
-                            if not df_he.empty:
-                                for _, r_he in df_he.iterrows():
-                                    jug_id = int(r_he["jugador_id"])
-                                    elo_antes = r_he["elo_antes"]
-                                    cur.execute(
-                                        "UPDATE jugadores SET elo_actual = ? WHERE id = ?",
-                                        (elo_antes, jug_id),
-                                    )
-
-                            # Borrar registros del partido
-                            cur.execute(
-                                "DELETE FROM historial_elo WHERE partido_id = ?",
-                                (pid,),
-                            )
-                            cur.execute(
-                                "DELETE FROM partido_jugadores WHERE partido_id = ?",
-                                (pid,),
-                            )
-                            cur.execute(
-                                "DELETE FROM partidos WHERE id = ?",
-                                (pid,),
-                            )
-                            conn.commit()
+                        # Borra el partido y recalcula el ELO de ahí en adelante (una transacción)
+                        elo_service.eliminar_partido(pid)
+                        motores_rating.actualizar_motor_configurado()
 
                         st.success(
                             "Partido eliminado del historial. "
@@ -458,8 +369,7 @@ def _partidos_eventos_para_fullcalendar(year: int):
             p.es_oficial
         FROM partidos p
         LEFT JOIN canchas c ON c.id = p.cancha_id
-        WHERE SUBSTR(p.fecha,1,4) = ?
-          AND SUBSTR(p.fecha,1,10) <= ?
+        WHERE p.fecha_dia BETWEEN ? AND ?
           AND (p.ganador IS NOT NULL OR p.diferencia_gol IS NOT NULL)
           AND EXISTS (
                 SELECT 1 FROM partido_jugadores pj
@@ -467,7 +377,7 @@ def _partidos_eventos_para_fullcalendar(year: int):
           )
         ORDER BY p.fecha ASC, p.id ASC
     """,
-        (str(year), today_iso),
+        (f"{year}-01-01", min(today_iso, f"{year}-12-31")),
     )
 
     events = []
@@ -1,5 +1,5 @@
 # jugador_panel.py
-from db import get_connection
+from db import get_connection, sync_now
 import streamlit as st
 import sqlite3
 import scheduler
@@ -10,7 +10,7 @@ import base64
 from remember import current_token_in_url, revoke_token, clear_url_token
 
 DB_NAME = "elo_futbol.db"
-CUPO_PARTIDO = 10
+CUPO_PARTIDO = scheduler.CUPO_PARTIDO  # por defecto; cada partido define el suyo (_cupo)
 CUPO_ESPERA = 4
 TZ_AR = pytz.timezone("America/Argentina/Buenos_Aires")
 
@@ -195,9 +195,15 @@ def _roster_count(partido_id):
         return r["c"] if r else 0
 
 
+def _cupo(partido_id):
+    with get_connection() as conn:
+        return scheduler.cupo_partido(conn.cursor(), partido_id)
+
+
 def _equipos_estan_generados(partido_id):
     with get_connection() as conn:
         cur = conn.cursor()
+        cupo = scheduler.cupo_partido(cur, partido_id)
         cur.execute("""
             SELECT
               SUM(CASE WHEN CAST(equipo AS INTEGER) IN (1,2) THEN 1 ELSE 0 END) AS con_eq,
@@ -208,7 +214,7 @@ def _equipos_estan_generados(partido_id):
         r = cur.fetchone()
         con_eq = int((r["con_eq"] if r and r["con_eq"] is not None else 0))
         total = int((r["total"] if r and r["total"] is not None else 0))
-        return (total == CUPO_PARTIDO) and (con_eq == CUPO_PARTIDO)
+        return (total == cupo) and (con_eq == cupo)
 
 
 def _reset_equipos(partido_id):
@@ -264,7 +270,7 @@ def _render_equipos(partido_id, inscritos):
 
 
 def _promote_from_waitlist_if_possible(partido_id):
-    if _roster_count(partido_id) >= CUPO_PARTIDO:
+    if _roster_count(partido_id) >= _cupo(partido_id):
         return False
     wl = _waitlist_get(partido_id)
     if not wl:
@@ -359,10 +365,11 @@ def _partidos_visibles_para_jugador(jugador_id: int):
                 p.ganador,
                 p.diferencia_gol,
                 p.publicar_desde,
-                p.equipos_generados_por
+                p.equipos_generados_por,
+                p.jugadores_por_equipo
             FROM partidos p
             LEFT JOIN canchas c ON c.id = p.cancha_id
-            WHERE substr(p.fecha, 1, 10) >= ?
+            WHERE p.fecha_dia >= ?
               AND (p.tipo IS NULL OR p.tipo = 'abierto')
               AND p.ganador IS NULL
               AND (p.diferencia_gol IS NULL OR TRIM(p.diferencia_gol) = '')
@@ -500,7 +507,7 @@ def panel_menu_jugador(user):
             JOIN partido_jugadores pj ON pj.partido_id = p.id
             WHERE pj.jugador_id = ?
               AND (p.ganador IS NULL OR TRIM(p.ganador) = '')
-              AND substr(p.fecha, 1, 10) >= ?
+              AND p.fecha_dia >= ?
             GROUP BY
                 p.id,
                 p.fecha,
@@ -556,6 +563,7 @@ def panel_menu_jugador(user):
                     # Desarmar equipos y promover desde lista de espera
                     _reset_equipos(p["id"])
                     promoted = _promote_from_waitlist_if_possible(p["id"])
+                    sync_now()
 
                     if promoted:
                         _push_flash("Cancelaste tu asistencia. Se promovió al primero de la lista de espera.", "info")
@@ -593,6 +601,7 @@ def panel_partidos_disponibles(user):
         cancha_name = _cancha_label(p["cancha_id"])
         inscritos = _jugadores_en_partido(partido_id)
         count = len(inscritos)
+        cupo = 2 * int(p.get("jugadores_por_equipo") or scheduler.JUGADORES_POR_EQUIPO)
         wl = _waitlist_get(partido_id)
         wl_count = len(wl)
 
@@ -600,7 +609,7 @@ def panel_partidos_disponibles(user):
         yo_en_espera = _waitlist_is_in(partido_id, jugador_id)
 
         badges = []
-        if count >= CUPO_PARTIDO:
+        if count >= cupo:
             badges.append("🧍‍🧍 Partido completo")
         if yo_en_roster:
             badges.append("✅ Confirmado")
@@ -634,7 +643,7 @@ def panel_partidos_disponibles(user):
             st.write("---")
             c1, c2 = st.columns(2)
             with c1:
-                can_confirm = (not yo_en_roster) and (count < CUPO_PARTIDO)
+                can_confirm = (not yo_en_roster) and (count < cupo)
                 if st.button("Confirmar asistencia", key=f"confirm_{partido_id}", disabled=not can_confirm):
                     with get_connection() as conn:
                         cur = conn.cursor()
@@ -643,10 +652,11 @@ def panel_partidos_disponibles(user):
                             VALUES (?, ?, 1, 0)
                         """, (partido_id, jugador_id))
                         conn.commit()
+                    sync_now()
                     _push_flash("Confirmaste tu asistencia 🟢", "success")
                     st.rerun()
 
-                can_join_wl = (not yo_en_roster) and (not yo_en_espera) and (count >= CUPO_PARTIDO) and (wl_count < CUPO_ESPERA)
+                can_join_wl = (not yo_en_roster) and (not yo_en_espera) and (count >= cupo) and (wl_count < CUPO_ESPERA)
                 if st.button("Anotarme en lista de espera", key=f"join_wl_{partido_id}", disabled=not can_join_wl):
                     ok, msg = _waitlist_join(partido_id, jugador_id)
                     _push_flash(msg, "success" if ok else "warning")
@@ -662,6 +672,7 @@ def panel_partidos_disponibles(user):
                             conn.commit()
                         _reset_equipos(partido_id)
                         promoted = _promote_from_waitlist_if_possible(partido_id)
+                        sync_now()
                         if promoted:
                             _push_flash("Cancelaste tu asistencia. Se promovió al primero de la lista de espera.", "info")
                         else:
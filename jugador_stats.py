@@ -43,24 +43,6 @@ def _fetchone_dict(cur):
     cols = [d[0] for d in cur.description] if cur.description else []
     return {cols[i]: r[i] for i in range(len(cols))}
 
-def _ensure_awards_table():
-    with _get_conn() as conn:
-        cur = conn.cursor()
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS season_awards (
-            season TEXT NOT NULL,
-            category TEXT NOT NULL,     -- 'most_matches' | 'best_points' | 'most_improved' | 'best_duo'
-            place INTEGER NOT NULL,     -- 1,2,3
-            jugador_id INTEGER NOT NULL,
-            value REAL,                 -- métrica interna
-            meta TEXT,                  -- JSON opcional (p.ej. {"partner_id": 7})
-            finalized INTEGER NOT NULL DEFAULT 0,
-            awarded_at TEXT,
-            PRIMARY KEY (season, category, place, jugador_id)
-        )
-        """)
-        conn.commit()
-
 # ======================
 # Utilidades varias
 # ======================
@@ -121,9 +103,9 @@ def _season_clause_and_params(temporada: str | None, alias: str = "p"):
     if temporada and temporada != "Todas":
         rng = _get_season_range(temporada)
         if rng:
-            return f"AND date({alias}.fecha) BETWEEN date(?) AND date(?)", [rng[0], rng[1]]
+            return f"AND {alias}.fecha_dia BETWEEN date(?) AND date(?)", [rng[0], rng[1]]
         else:
-            return f"AND strftime('%Y', {alias}.fecha) = ?", [temporada]
+            return f"AND {alias}.fecha_dia BETWEEN ? AND ?", [f"{temporada}-01-01", f"{temporada}-12-31"]
     return "", []
 
 def _coarse_ticks(min_val: float, max_val: float, target_ticks: int = 3) -> list[int]:
@@ -162,71 +144,62 @@ def _years_for_player(jugador_id: int) -> list[str]:
         cur.execute("SELECT DISTINCT substr(fecha,1,4) AS y FROM partidos ORDER BY y DESC")
         return [r["y"] for r in _fetchall_dicts(cur) if r.get("y")]
 
-def _fetch_my_results(jugador_id: int, temporada: str | None):
-    # Devuelve detalle (orden cronológico), secuencia G/E/P y totales W/D/L
-    cond = _result_condition_sql("p")
+def _fetch_my_results(jugador_id: int, temporada: str | None, ultimos: int = 10):
+    # Totales W/D/L del período desde player_stats; detalle y secuencia G/E/P (orden
+    # cronológico) sólo de los últimos `ultimos` partidos con resultado.
+    import player_stats
+    cond = player_stats.CON_RESULTADO.format(a="p")
     season_sql, season_params = _season_clause_and_params(temporada, "p")
     with _get_conn() as conn:
         cur = conn.cursor()
+        cur.execute(
+            "SELECT w, e, l FROM player_stats WHERE periodo = ? AND jugador_id = ?",
+            (player_stats.periodo_de(temporada, cur), jugador_id),
+        )
+        tot = _fetchone_dict(cur) or {}
         cur.execute(
             f"""
-            SELECT p.id, p.fecha, p.cancha_id, p.ganador, p.diferencia_gol, mp.equipo AS mi_equipo
-            FROM (SELECT pj.partido_id, pj.equipo
-                  FROM partido_jugadores pj
-                  JOIN partidos p2 ON p2.id = pj.partido_id
-                  WHERE pj.jugador_id = ?) mp
-            JOIN partidos p ON p.id = mp.partido_id
-            WHERE {cond} {season_sql}
-            ORDER BY datetime(p.fecha), p.id
-            """, (jugador_id, *season_params)
+            SELECT p.id, p.fecha, p.cancha_id, p.ganador, p.diferencia_gol, pj.equipo AS mi_equipo
+            FROM partido_jugadores pj
+            JOIN partidos p ON p.id = pj.partido_id
+            WHERE pj.jugador_id = ? AND pj.equipo IN (1, 2) AND {cond} {season_sql}
+            ORDER BY datetime(p.fecha) DESC, p.id DESC
+            LIMIT ?
+            """, (jugador_id, *season_params, int(ultimos))
         )
-        rows = _fetchall_dicts(cur)
+        rows = _fetchall_dicts(cur)[::-1]
 
     seq, detalle = [], []
-    w = l = d = 0
     for r in rows:
         ganador = r.get("ganador")
-        dif = r.get("diferencia_gol")
-        mi = r.get("mi_equipo")
-        if ganador is None and (dif is None or int(dif) == 0):
-            res = "E"; d += 1
+        if ganador == r.get("mi_equipo"):
+            res = "G"
+        elif ganador in (1, 2):
+            res = "P"
         else:
-            if ganador == mi:
-                res = "G"; w += 1
-            else:
-                res = "P"; l += 1
+            res = "E"  # mismo criterio que player_stats
         seq.append(res)
         detalle.append({
             "id": r.get("id"), "fecha": r.get("fecha"), "cancha_id": r.get("cancha_id"),
-            "resultado": res, "dif": dif, "ganador": ganador
+            "resultado": res, "dif": r.get("diferencia_gol"), "ganador": ganador
         })
-    return detalle, seq, w, d, l
+    return detalle, seq, int(tot.get("w") or 0), int(tot.get("e") or 0), int(tot.get("l") or 0)
+
+def _season_bounds(temporada: str | None):
+    # (desde, hasta) 'YYYY-MM-DD' de la temporada (mismo criterio que _season_clause_and_params)
+    if temporada and temporada != "Todas":
+        rng = _get_season_range(temporada)
+        if rng:
+            return rng[0], rng[1]
+        return f"{temporada}-01-01", f"{temporada}-12-31"
+    return None, None
 
 def _elo_series(jugador_id: int, temporada: str | None):
-    season_sql, season_params = _season_clause_and_params(temporada, "p")
-    with _get_conn() as conn:
-        cur = conn.cursor()
-        cur.execute(
-            f"""
-            SELECT p.fecha AS fecha, COALESCE(h.elo_despues, h.elo_antes) AS elo
-            FROM historial_elo h
-            JOIN partidos p ON p.id = h.partido_id
-            WHERE h.jugador_id = ? {season_sql}
-            ORDER BY datetime(p.fecha), p.id
-            """, (jugador_id, *season_params)
-        )
-        rows = _fetchall_dicts(cur)
-    xs, ys = [], []
-    for r in rows:
-        elo = r.get("elo")
-        if elo is None:
-            continue
-        try:
-            ys.append(float(elo))
-            xs.append(str(r.get("fecha")))
-        except Exception:
-            continue
-    return xs, ys
+    # serie de ELO (después de cada oficial) desde el snapshot de historial_elo
+    import snapshot_elo
+    desde, hasta = _season_bounds(temporada)
+    xs, ys = snapshot_elo.snapshot().serie(jugador_id, desde, hasta)
+    return list(xs), [float(y) for y in ys]
 
 # ======================
 # Comparativas (stats cruzadas)
@@ -472,21 +445,18 @@ def _best_duo_for_player(jugador_id: int, temporada: str | None, min_juntos: int
 # Podios
 # ======================
 def _rank_most_matches(temporada: str | None, top: int = 3):
-    cond = _result_condition_sql("p")
-    season_sql, season_params = _season_clause_and_params(temporada, "p")
+    import player_stats
     with _get_conn() as conn:
         cur = conn.cursor()
         cur.execute(
-            f"""
-            SELECT pj.jugador_id, j.nombre, COUNT(*) AS pj
-            FROM partido_jugadores pj
-            JOIN partidos p ON p.id = pj.partido_id
-            JOIN jugadores j ON j.id = pj.jugador_id
-            WHERE {cond} {season_sql}
-            GROUP BY pj.jugador_id
-            ORDER BY pj DESC, j.nombre ASC
-            LIMIT {top}
-            """, (*season_params,)
+            """
+            SELECT s.jugador_id, j.nombre, s.pj
+            FROM player_stats s
+            JOIN jugadores j ON j.id = s.jugador_id
+            WHERE s.periodo = ? AND s.pj > 0
+            ORDER BY s.pj DESC, j.nombre ASC
+            LIMIT ?
+            """, (player_stats.periodo_de(temporada, cur), top)
         )
         rows = _fetchall_dicts(cur)
     for r in rows:
@@ -495,32 +465,20 @@ def _rank_most_matches(temporada: str | None, top: int = 3):
     return rows
 
 def _rank_best_points(temporada: str | None, min_pj: int = 15, top: int = 3):
-    cond = _result_condition_sql("p")
-    season_sql, season_params = _season_clause_and_params(temporada, "p")
+    import player_stats
     with _get_conn() as conn:
         cur = conn.cursor()
         cur.execute(
-            f"""
-            WITH base AS (
-              SELECT pj.jugador_id,
-                     SUM(CASE WHEN p.ganador = pj.equipo THEN 1 ELSE 0 END) AS w,
-                     SUM(CASE WHEN p.ganador IS NULL AND IFNULL(p.diferencia_gol,0)=0 THEN 1 ELSE 0 END) AS e,
-                     SUM(CASE WHEN p.ganador IS NOT NULL AND p.ganador <> pj.equipo THEN 1 ELSE 0 END) AS l
-              FROM partido_jugadores pj
-              JOIN partidos p ON p.id = pj.partido_id
-              WHERE {cond} {season_sql}
-              GROUP BY pj.jugador_id
-            ), elig AS (
-              SELECT jugador_id, w, e, l, (w+e+l) AS pj,
-                     (3.0*w + 1.0*e) / NULLIF(3.0*(w+e+l),0) AS puntos_pct
-              FROM base
-              WHERE (w+e+l) >= ?
-            )
-            SELECT e.jugador_id, j.nombre, e.pj, e.puntos_pct, e.w, e.e, e.l
-            FROM elig e JOIN jugadores j ON j.id = e.jugador_id
-            ORDER BY e.puntos_pct DESC, e.pj DESC, e.w DESC, j.nombre ASC
-            LIMIT {top}
-            """, (*season_params, min_pj)
+            """
+            SELECT s.jugador_id, j.nombre, s.pj,
+                   (3.0*s.w + 1.0*s.e) / (3.0*s.pj) AS puntos_pct,
+                   s.w, s.e, s.l
+            FROM player_stats s
+            JOIN jugadores j ON j.id = s.jugador_id
+            WHERE s.periodo = ? AND s.pj > 0 AND s.pj >= ?
+            ORDER BY puntos_pct DESC, s.pj DESC, s.w DESC, j.nombre ASC
+            LIMIT ?
+            """, (player_stats.periodo_de(temporada, cur), min_pj, top)
         )
         rows = _fetchall_dicts(cur)
     for r in rows:
@@ -625,8 +583,6 @@ def _render_header_cards_and_bar(w: int, e: int, l: int):
 # UI principal
 # ======================
 def panel_mis_estadisticas(user):
-    _ensure_awards_table()
-
     user = _as_user_dict(user)
     jugador_id = user.get("jugador_id")
     if not jugador_id:
@@ -1,7 +1,6 @@
 from db import get_connection
 # jugadores.py — versión con mejoras de UX + descripción en 'foto'
 import streamlit as st
-import sqlite3
 
 DB_NAME = "elo_futbol.db"
 
@@ -13,38 +12,6 @@ def get_connection():
     return conn  # (inaccesible, se deja por compat)
 
 
-# ==== Migración mínima: tabla puente jugador_grupos ====
-def _ensure_jugador_grupos():
-    with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS jugador_grupos (
-                jugador_id INTEGER NOT NULL,
-                grupo_id   INTEGER NOT NULL,
-                PRIMARY KEY (jugador_id, grupo_id)
-            )
-            """
-        )
-        conn.commit()
-
-
-def _ensure_descripcion_en_jugadores():
-    """Garantiza que exista la columna 'foto' (TEXT), usada como 'descripcion'."""
-    try:
-        with get_connection() as conn:
-            cur = conn.cursor()
-            cur.execute("PRAGMA table_info(jugadores)")
-            # En la mayoría de los casos row_factory=sqlite3.Row => r["name"]
-            cols = [r["name"] if isinstance(r, sqlite3.Row) else r[1] for r in cur.fetchall()]
-            if "foto" not in cols:
-                cur.execute("ALTER TABLE jugadores ADD COLUMN foto TEXT")
-                conn.commit()
-    except Exception:
-        # Si falla (por ejemplo en Turso ya existe), seguimos sin interrumpir la UI.
-        pass
-
-
 def _cargar_grupos():
     """Devuelve lista de rows con (id, nombre) de la tabla grupos, ordenados por nombre."""
     with get_connection() as conn:
@@ -98,8 +65,6 @@ def _set_memberships(jugador_id, group_ids):
 # UI principal (admin)
 # =======================
 def panel_gestion():
-    _ensure_jugador_grupos()
-    _ensure_descripcion_en_jugadores()
     st.subheader("Gestión de jugadores ⚽")
 
     accion = st.radio(
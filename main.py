@@ -1,12 +1,13 @@
 import streamlit as st
 from auth import verify_user
 import scheduler  # dispara materializaciones "lazy"
+from migrations import ensure_migrated
+ensure_migrated()  # esquema: una sola vez por proceso
 from crear_admin import ensure_admin_user
 ensure_admin_user()
 from PIL import Image
 
 from remember import (
-    ensure_tables,
     validate_token,
     issue_token,
     revoke_token,
@@ -85,7 +86,6 @@ def _hero_logo_login(width_px: int = 200, opacity: float = 0.95):
 # ==================================================
 #  Autologin por token (URL o cookie)
 # ==================================================
-ensure_tables()
 if "user" not in st.session_state:
     url_token = current_token_in_url()
 
@@ -0,0 +1,313 @@
+# migrations.py
+# Migraciones de esquema versionadas.
+# - Cada migración es (versión, nombre, función(cur)) y se aplica una sola vez;
+#   las versiones aplicadas quedan registradas en schema_version.
+# - run_migrations() corre al inicio del proceso (main.py); el resto del código
+#   asume el esquema ya creado y no ejecuta DDL en cada render.
+# - Todas las migraciones son idempotentes (IF NOT EXISTS / chequeo de columna),
+#   así que dos procesos arrancando a la vez no se pisan.
+
+import threading
+from datetime import datetime
+
+from db import get_connection
+
+# -------------------------
+# Helpers
+# -------------------------
+def _columns(cur, table: str) -> set:
+    # table_xinfo incluye también las columnas generadas
+    cur.execute(f"PRAGMA table_xinfo({table})")
+    return {r[1] for r in cur.fetchall()}  # r[1] = name
+
+def _add_column(cur, table: str, column: str, decl: str):
+    if column not in _columns(cur, table):
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+def _run_script(cur, script: str):
+    for stmt in script.split(";"):
+        if stmt.strip():
+            cur.execute(stmt)
+
+# -------------------------
+# Migraciones
+# -------------------------
+def _m001_base(cur):
+    # tablas base (init_db.SCHEMA_SQL)
+    from init_db import SCHEMA_SQL
+    _run_script(cur, SCHEMA_SQL)
+
+def _m002_columnas(cur):
+    # columnas agregadas con el tiempo sobre las tablas base
+    _add_column(cur, "usuarios", "grupos", "INTEGER")                  # crear_admin / usuarios
+    _add_column(cur, "jugadores", "foto", "TEXT")                      # jugadores (descripción)
+    _add_column(cur, "partidos", "hora", "INTEGER")                    # partidos
+    _add_column(cur, "partidos", "numero_publico", "INTEGER")          # partidos
+    _add_column(cur, "partidos", "publicar_desde", "TEXT")             # scheduler / partidos
+    _add_column(cur, "partido_jugadores", "ingreso_desde_espera", "INTEGER DEFAULT 0")  # lista de espera
+
+def _m003_tablas_aux(cur):
+    # numero_publico libres (partidos / scheduler)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS numeros_libres_partidos (
+            n INTEGER PRIMARY KEY
+        )
+    """)
+    # lista de espera (partidos)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS lista_espera (
+            partido_id INTEGER NOT NULL,
+            jugador_id INTEGER NOT NULL,
+            created_at TEXT NOT NULL,
+            PRIMARY KEY (partido_id, jugador_id),
+            FOREIGN KEY (partido_id) REFERENCES partidos(id),
+            FOREIGN KEY (jugador_id) REFERENCES jugadores(id)
+        )
+    """)
+    # programaciones (scheduler / partidos)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS programaciones (
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          partido_base_id INTEGER NOT NULL,
+          repeat_semanal INTEGER NOT NULL DEFAULT 0,
+          next_publicar_desde TEXT NOT NULL,
+          hora_juego INTEGER,
+          cancha_id INTEGER,
+          enabled INTEGER NOT NULL DEFAULT 1,
+          FOREIGN KEY (partido_base_id) REFERENCES partidos(id)
+        )
+    """)
+    # plantilla_jugadores: jugadores que arrancan confirmados al materializar
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS plantilla_jugadores (
+            partido_base_id INTEGER NOT NULL,
+            jugador_id INTEGER NOT NULL,
+            orden INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (partido_base_id, jugador_id),
+            FOREIGN KEY (partido_base_id) REFERENCES partidos(id),
+            FOREIGN KEY (jugador_id) REFERENCES jugadores(id)
+        )
+    """)
+    # tabla puente jugador_grupos (jugadores)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS jugador_grupos (
+            jugador_id INTEGER NOT NULL,
+            grupo_id   INTEGER NOT NULL,
+            PRIMARY KEY (jugador_id, grupo_id)
+        )
+    """)
+    # remember-me (remember)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS login_tokens (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            token_hash TEXT NOT NULL,
+            expires_at TEXT NOT NULL
+        )
+    """)
+
+def _m004_temporadas(cur):
+    # seasons / season_awards (admin_temporadas / jugador_stats)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS seasons (
+      id INTEGER PRIMARY KEY AUTOINCREMENT,
+      label TEXT NOT NULL UNIQUE,     -- ej: '2025', '2026'
+      start_date TEXT NOT NULL,       -- 'YYYY-MM-DD'
+      end_date   TEXT,                -- NULL hasta finalizar
+      finalized  INTEGER NOT NULL DEFAULT 0
+    )
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS season_awards (
+      season TEXT NOT NULL,
+      category TEXT NOT NULL,     -- 'most_matches' | 'best_points' | 'most_improved' | 'best_duo'
+      place INTEGER NOT NULL,     -- 1,2,3
+      jugador_id INTEGER NOT NULL,
+      value REAL,                 -- métrica interna
+      meta TEXT,                  -- JSON opcional (p.ej. {"partner_id": 7})
+      finalized INTEGER NOT NULL DEFAULT 0,
+      awarded_at TEXT,
+      PRIMARY KEY (season, category, place, jugador_id)
+    )
+    """)
+
+def _m005_canchas_numero_publico(cur):
+    # número público de canchas: columna, índice único y completado de faltantes
+    _add_column(cur, "canchas", "numero_publico", "INTEGER")
+    cur.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_canchas_numero_publico ON canchas(numero_publico)"
+    )
+    cur.execute("SELECT numero_publico FROM canchas WHERE numero_publico IS NOT NULL")
+    used = {r[0] for r in cur.fetchall()}
+    cur.execute("SELECT id FROM canchas WHERE numero_publico IS NULL ORDER BY id ASC")
+    n = 1
+    for (cid,) in [tuple(r) for r in cur.fetchall()]:
+        while n in used:
+            n += 1
+        cur.execute("UPDATE canchas SET numero_publico = ? WHERE id = ?", (n, cid))
+        used.add(n)
+
+def _m006_indices(cur):
+    # fecha_dia: 'YYYY-MM-DD' derivada de partidos.fecha (columna generada, indexable).
+    # Las consultas filtran/ordenan por p.fecha_dia en vez de substr(p.fecha,1,10) / date(p.fecha).
+    _add_column(cur, "partidos", "fecha_dia",
+                "TEXT GENERATED ALWAYS AS (substr(fecha, 1, 10)) VIRTUAL")
+    _run_script(cur, INDEX_SQL)
+
+def _m007_jugadores_por_equipo(cur):
+    # tamaño de equipo por partido (5v5 por defecto; 6v6, 7v7, 8v8 en canchas grandes)
+    _add_column(cur, "partidos", "jugadores_por_equipo", "INTEGER NOT NULL DEFAULT 5")
+
+def _m008_equipos_generados_por(cur):
+    # quién confirmó los equipos (equipos.guardar_opcion; lo muestran historial / jugador_panel)
+    _add_column(cur, "partidos", "equipos_generados_por", "TEXT")
+
+def _m009_resultado_cargado_por(cur):
+    # quién cargó el resultado (cargaresultados / elo_service; lo muestra historial)
+    _add_column(cur, "partidos", "resultado_cargado_por", "TEXT")
+
+def _m010_motores_rating(cur):
+    # historial y rating vigente de los motores que no son Elo (motores_rating)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS historial_rating (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            motor TEXT NOT NULL,            -- 'glicko2' | 'trueskill'
+            jugador_id INTEGER NOT NULL,
+            partido_id INTEGER NOT NULL,
+            rating_antes INTEGER NOT NULL,
+            rating_despues INTEGER NOT NULL,
+            fecha DATETIME,
+            FOREIGN KEY (jugador_id) REFERENCES jugadores(id),
+            FOREIGN KEY (partido_id) REFERENCES partidos(id)
+        )
+    """)
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_historial_rating_motor ON historial_rating(motor, jugador_id, partido_id)"
+    )
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS ratings_jugador (
+            motor TEXT NOT NULL,
+            jugador_id INTEGER NOT NULL,
+            rating REAL NOT NULL,
+            incertidumbre REAL,             -- RD (Glicko-2) / sigma (TrueSkill), en puntos
+            PRIMARY KEY (motor, jugador_id)
+        )
+    """)
+
+def _m011_elo_snapshot(cur):
+    # checkpoint del snapshot de historial_elo (snapshot_elo); una fila por firma vigente
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS elo_snapshot (
+            firma TEXT PRIMARY KEY,         -- COUNT:MAX(id):TOTAL(elo_despues) de historial_elo
+            creado TEXT NOT NULL,
+            datos BLOB NOT NULL             -- arrays NumPy (npz)
+        )
+    """)
+
+def _m012_player_stats(cur):
+    # agregados W/E/L por jugador y período (player_stats); se cargan con el historial existente
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS player_stats (
+            periodo TEXT NOT NULL,          -- '*', 'YYYY' o 'temporada:<label>'
+            jugador_id INTEGER NOT NULL,
+            pj INTEGER NOT NULL DEFAULT 0,
+            w INTEGER NOT NULL DEFAULT 0,
+            e INTEGER NOT NULL DEFAULT 0,
+            l INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (periodo, jugador_id)
+        ) WITHOUT ROWID
+    """)
+    import player_stats
+    player_stats.reconstruir(cur)
+
+def _m013_k_elo(cur):
+    # K con que se calculó el ELO de cada partido oficial (elo_service); NULL = K por defecto
+    _add_column(cur, "partidos", "k_elo", "REAL")
+
+# Índices de las consultas calientes (ver tools/check_query_plans.py).
+# lista_espera ya tiene PK (partido_id, jugador_id); el índice extra cubre el orden por llegada.
+INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_partidos_fecha_dia ON partidos(fecha_dia);
+CREATE INDEX IF NOT EXISTS idx_partido_jugadores_partido ON partido_jugadores(partido_id);
+CREATE INDEX IF NOT EXISTS idx_partido_jugadores_jugador ON partido_jugadores(jugador_id, partido_id);
+CREATE INDEX IF NOT EXISTS idx_historial_elo_jugador ON historial_elo(jugador_id, partido_id);
+CREATE INDEX IF NOT EXISTS idx_historial_elo_partido ON historial_elo(partido_id);
+CREATE INDEX IF NOT EXISTS idx_login_tokens_hash ON login_tokens(token_hash);
+CREATE INDEX IF NOT EXISTS idx_lista_espera_llegada ON lista_espera(partido_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_partido_grupos_partido ON partido_grupos(partido_id);
+CREATE INDEX IF NOT EXISTS idx_jugador_grupos_grupo ON jugador_grupos(grupo_id)
+"""
+
+# Orden de aplicación: nunca renumerar ni borrar una migración ya publicada,
+# siempre agregar al final con la versión siguiente.
+MIGRATIONS = [
+    (1, "esquema base", _m001_base),
+    (2, "columnas agregadas", _m002_columnas),
+    (3, "tablas auxiliares", _m003_tablas_aux),
+    (4, "temporadas y premios", _m004_temporadas),
+    (5, "numero publico de canchas", _m005_canchas_numero_publico),
+    (6, "indices y fecha_dia", _m006_indices),
+    (7, "jugadores por equipo", _m007_jugadores_por_equipo),
+    (8, "equipos generados por", _m008_equipos_generados_por),
+    (9, "resultado cargado por", _m009_resultado_cargado_por),
+    (10, "motores de rating", _m010_motores_rating),
+    (11, "snapshot de elo", _m011_elo_snapshot),
+    (12, "agregados por jugador", _m012_player_stats),
+    (13, "k del elo por partido", _m013_k_elo),
+]
+
+# -------------------------
+# Runner
+# -------------------------
+def current_version(cur) -> int:
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    """)
+    cur.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    return int(cur.fetchone()[0] or 0)
+
+def run_migrations() -> int:
+    """Aplica las migraciones pendientes, cada una en su propia transacción.
+    Devuelve cuántas se aplicaron."""
+    applied = 0
+    with get_connection() as conn:
+        cur = conn.cursor()
+        version = current_version(cur)
+        conn.commit()
+        for num, name, fn in MIGRATIONS:
+            if num <= version:
+                continue
+            try:
+                fn(cur)
+                cur.execute(
+                    "INSERT OR IGNORE INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)",
+                    (num, name, datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            applied += 1
+    return applied
+
+_LOCK = threading.Lock()
+_DONE = False
+
+def ensure_migrated():
+    """Corre run_migrations() una sola vez por proceso (las reruns siguientes no tocan la base)."""
+    global _DONE
+    if _DONE:
+        return
+    with _LOCK:
+        if not _DONE:
+            run_migrations()
+            _DONE = True
+
+
+if __name__ == "__main__":
+    n = run_migrations()
+    print(f"Migraciones aplicadas: {n}")
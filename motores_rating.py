@@ -0,0 +1,475 @@
+# motores_rating.py
+# Motores de rating intercambiables (sin UI), todos en la escala del ELO (~1000).
+# - Interfaz común (MotorRating): iniciar(base), predict(ids1, ids2), apply_match(...),
+#   replay(partidos, base) y rating(ids). Estado en arrays NumPy indexados por jugador.
+# - MotorElo: el ELO actual (elo_service.elos_despues: promedio de equipo, K por
+#   diferencia de gol, boost de novatos). Es el default y el único que escribe historial_elo.
+# - MotorGlicko2: Glicko-2 por jugador contra el equipo rival como oponente compuesto.
+# - MotorTrueSkill: modelo gaussiano de equipos (performance = suma de jugadores) estilo TrueSkill.
+# - El motor de la instalación se elige con RATING_ENGINE (env o st.secrets): elo | glicko2 | trueskill.
+#   Los que no son Elo guardan su historial en historial_rating y el rating vigente en
+#   ratings_jugador; equipos balancea con ese rating.
+#
+# Uso:
+#   python motores_rating.py evaluar [--desde YYYY-MM-DD]   -> log-loss / Brier / favorito por motor
+#   python motores_rating.py replay <motor> [--dry-run]
+
+import math
+import sys
+import time
+from statistics import NormalDist
+
+import numpy as np
+
+import elo_service
+from db import _get_secret, get_connection, sync_now
+
+# -------------------------
+# Parámetros
+# -------------------------
+# Glicko-2: rd_inicial en puntos de rating (el ELO previo del jugador se toma como punto de partida)
+PARAMS_GLICKO2 = {"rd_inicial": 200.0, "rd_minimo": 30.0, "volatilidad": 0.06, "tau": 0.5}
+# TrueSkill: sigma / beta / tau en puntos de rating; p_empate fija el margen de empate
+PARAMS_TRUESKILL = {"sigma_inicial": 150.0, "beta": 200.0, "tau": 4.0, "p_empate": 0.10}
+
+MOTOR_DEFAULT = "elo"
+_ESCALA_GLICKO = 400.0 / math.log(10)  # 173.7178
+_N = NormalDist()
+
+
+# -------------------------
+# Interfaz
+# -------------------------
+class MotorRating:
+    """
+    Estado por jugador en arrays indexados (self.idx: jugador_id -> posición).
+    predict: probabilidad (puntos esperados) de que gane el equipo 1.
+    apply_match: actualiza el estado y devuelve (antes, después) en escala de rating
+    para ids1 + ids2, en ese orden.
+    """
+    nombre = ""
+
+    def __init__(self, **params):
+        self.params = params
+        self.ids = []
+        self.idx = {}
+
+    def iniciar(self, base: dict):
+        """base: {jugador_id: elo_inicial}."""
+        self.ids = list(base)
+        self.idx = {jid: i for i, jid in enumerate(self.ids)}
+        self._crear(np.array([float(base[j]) for j in self.ids]))
+        return self
+
+    def _posiciones(self, ids):
+        nuevos = [j for j in dict.fromkeys(ids) if j not in self.idx]
+        if nuevos:  # jugador sin fila en jugadores: arranca en 1000
+            for j in nuevos:
+                self.idx[j] = len(self.ids)
+                self.ids.append(j)
+            self._crear(np.full(len(nuevos), 1000.0), agregar=True)
+        return np.array([self.idx[j] for j in ids], dtype=np.int64)
+
+    def rating(self, ids) -> np.ndarray:
+        return self._rating(self._posiciones(ids))
+
+    def incertidumbre(self, ids) -> np.ndarray:
+        return self._incertidumbre(self._posiciones(ids))
+
+    def predict(self, ids1, ids2) -> float:
+        return float(self._predict(self._posiciones(ids1), self._posiciones(ids2)))
+
+    def apply_match(self, ids1, ids2, ganador, dif_goles=0):
+        i1, i2 = self._posiciones(ids1), self._posiciones(ids2)
+        todos = np.concatenate([i1, i2])
+        antes = self._rating(todos)
+        self._apply(i1, i2, ganador, int(dif_goles or 0))
+        return antes, self._rating(todos)
+
+    def replay(self, partidos, base: dict):
+        """
+        Reproduce el historial (partidos como elo_service._partidos_oficiales) desde base.
+        Devuelve (filas [(jugador_id, partido_id, antes, después, fecha)],
+                  predicciones [(fecha, p1, ganador)]).
+        """
+        self.iniciar(base)
+        filas, predicciones = [], []
+        for pid, fecha, ganador, dif, ids1, ids2 in partidos:
+            predicciones.append((fecha, self.predict(ids1, ids2), ganador))
+            antes, despues = self.apply_match(ids1, ids2, ganador, dif)
+            filas.extend(zip(ids1 + ids2, [pid] * len(antes), antes.tolist(), despues.tolist(),
+                             [fecha] * len(antes)))
+        return filas, predicciones
+
+    # a implementar por cada motor
+    def _crear(self, elos, agregar=False):
+        raise NotImplementedError
+
+    def _rating(self, pos):
+        raise NotImplementedError
+
+    def _incertidumbre(self, pos):
+        return np.zeros(len(pos))
+
+    def _predict(self, i1, i2):
+        raise NotImplementedError
+
+    def _apply(self, i1, i2, ganador, dif):
+        raise NotImplementedError
+
+
+def _extender(arr, valores, agregar):
+    return np.concatenate([arr, valores]) if agregar else valores
+
+
+# -------------------------
+# Elo (default)
+# -------------------------
+class MotorElo(MotorRating):
+    """ELO de la app: mismo cálculo que elo_service.registrar_resultado (ratings enteros)."""
+    nombre = "elo"
+
+    def __init__(self, regla=None):
+        super().__init__()
+        self.regla = regla or elo_service.REGLAS_DEFAULT
+
+    def _crear(self, elos, agregar=False):
+        self.elo = _extender(getattr(self, "elo", np.zeros(0)), np.round(elos), agregar)
+        self.jugados = _extender(getattr(self, "jugados", np.zeros(0, dtype=np.int64)),
+                                 np.zeros(len(elos), dtype=np.int64), agregar)
+
+    def _rating(self, pos):
+        return self.elo[pos].astype(np.int64)
+
+    def _equipo(self, pos):
+        s = float(self.elo[pos].sum())
+        return s / max(1, len(pos)) if self.regla["promedio"] else s
+
+    def _predict(self, i1, i2):
+        return 1 / (1 + 10 ** ((self._equipo(i2) - self._equipo(i1)) / 400))
+
+    def _apply(self, i1, i2, ganador, dif):
+        post1, post2 = elo_service.elos_despues(
+            self.elo[i1].tolist(), self.elo[i2].tolist(),
+            self.jugados[i1].tolist(), self.jugados[i2].tolist(),
+            ganador, dif, self.regla,
+        )
+        self.elo[i1], self.elo[i2] = post1, post2
+        self.jugados[i1] += 1
+        self.jugados[i2] += 1
+
+
+# -------------------------
+# Glicko-2
+# -------------------------
+def _g(phi):
+    return 1 / np.sqrt(1 + 3 * phi ** 2 / math.pi ** 2)
+
+
+class MotorGlicko2(MotorRating):
+    """
+    Glicko-2 (escala interna mu/phi). Cada partido es un período de rating; cada jugador
+    juega contra el rival compuesto (mu promedio, phi cuadrático medio) y su expectativa
+    usa el mu promedio de su propio equipo. Empate = 0.5; no usa la diferencia de gol.
+    """
+    nombre = "glicko2"
+
+    def __init__(self, **params):
+        super().__init__(**dict(PARAMS_GLICKO2, **params))
+
+    def _crear(self, elos, agregar=False):
+        p = self.params
+        n = len(elos)
+        self.mu = _extender(getattr(self, "mu", np.zeros(0)), (elos - 1500) / _ESCALA_GLICKO, agregar)
+        self.phi = _extender(getattr(self, "phi", np.zeros(0)),
+                             np.full(n, p["rd_inicial"] / _ESCALA_GLICKO), agregar)
+        self.sigma = _extender(getattr(self, "sigma", np.zeros(0)), np.full(n, p["volatilidad"]), agregar)
+
+    def _rating(self, pos):
+        return np.round(self.mu[pos] * _ESCALA_GLICKO + 1500).astype(np.int64)
+
+    def _incertidumbre(self, pos):
+        return self.phi[pos] * _ESCALA_GLICKO
+
+    @staticmethod
+    def _compuesto(mu, phi, pos):
+        return mu[pos].mean(), math.sqrt(float((phi[pos] ** 2).mean()))
+
+    def _predict(self, i1, i2):
+        m1, f1 = self._compuesto(self.mu, self.phi, i1)
+        m2, f2 = self._compuesto(self.mu, self.phi, i2)
+        return float(1 / (1 + np.exp(-_g(math.sqrt(f1 ** 2 + f2 ** 2)) * (m1 - m2))))
+
+    def _volatilidad(self, phi, sigma, delta, v):
+        """Nueva volatilidad (método Illinois del paper), vectorizado por jugador."""
+        tau = self.params["tau"]
+        a = np.log(sigma ** 2)
+
+        def f(x):
+            ex = np.exp(x)
+            return ex * (delta ** 2 - phi ** 2 - v - ex) / (2 * (phi ** 2 + v + ex) ** 2) - (x - a) / tau ** 2
+
+        A = a.copy()
+        grande = delta ** 2 > phi ** 2 + v
+        B = np.where(grande, np.log(np.maximum(delta ** 2 - phi ** 2 - v, 1e-300)), a - tau)
+        pendiente = ~grande
+        k = 1
+        while pendiente.any() and k < 100:
+            pendiente &= f(a - k * tau) < 0
+            k += 1
+            B = np.where(pendiente, a - k * tau, B)
+        fA, fB = f(A), f(B)
+        for _ in range(100):
+            if not (np.abs(B - A) > 1e-6).any():
+                break
+            C = A + (A - B) * fA / (fB - fA)
+            fC = f(C)
+            cambia = fC * fB <= 0
+            A = np.where(cambia, B, A)
+            fA = np.where(cambia, fB, fA / 2)
+            B, fB = C, fC
+        return np.exp(A / 2)
+
+    def _apply(self, i1, i2, ganador, dif):
+        s1, s2 = elo_service.scores(ganador)
+        m1, f1 = self._compuesto(self.mu, self.phi, i1)
+        m2, f2 = self._compuesto(self.mu, self.phi, i2)
+        n1, n2 = len(i1), len(i2)
+        # los dos equipos en un solo paso vectorizado (por jugador: g, E y s de su lado)
+        pos = np.concatenate([i1, i2])
+        g = np.repeat([_g(f2), _g(f1)], [n1, n2])
+        E = np.repeat([1 / (1 + math.exp(-_g(f2) * (m1 - m2))),
+                       1 / (1 + math.exp(-_g(f1) * (m2 - m1)))], [n1, n2])
+        s = np.repeat([s1, s2], [n1, n2])
+        mu, phi, sigma = self.mu[pos], self.phi[pos], self.sigma[pos]
+        v = 1 / (g ** 2 * E * (1 - E))
+        delta = v * g * (s - E)
+        sigma_n = self._volatilidad(phi, sigma, delta, v)
+        phi_pre = np.sqrt(phi ** 2 + sigma_n ** 2)
+        phi_n = 1 / np.sqrt(1 / phi_pre ** 2 + 1 / v)
+        self.mu[pos] = mu + phi_n ** 2 * g * (s - E)
+        self.phi[pos] = np.maximum(phi_n, self.params["rd_minimo"] / _ESCALA_GLICKO)
+        self.sigma[pos] = sigma_n
+
+
+# -------------------------
+# TrueSkill (equipos gaussianos)
+# -------------------------
+class MotorTrueSkill(MotorRating):
+    """
+    Cada jugador es N(mu, sigma²); la performance de un equipo es la suma de las de sus
+    jugadores (+ ruido beta por jugador). Actualización exacta de dos equipos con margen
+    de empate (v/w de TrueSkill). No usa la diferencia de gol.
+    """
+    nombre = "trueskill"
+
+    def __init__(self, **params):
+        super().__init__(**dict(PARAMS_TRUESKILL, **params))
+
+    def _crear(self, elos, agregar=False):
+        n = len(elos)
+        self.mu = _extender(getattr(self, "mu", np.zeros(0)), elos.astype(float), agregar)
+        self.var = _extender(getattr(self, "var", np.zeros(0)),
+                             np.full(n, self.params["sigma_inicial"] ** 2), agregar)
+
+    def _rating(self, pos):
+        return np.round(self.mu[pos]).astype(np.int64)
+
+    def _incertidumbre(self, pos):
+        return np.sqrt(self.var[pos])
+
+    def _partido(self, i1, i2):
+        """(diferencia de medias, c, margen de empate)."""
+        beta2 = self.params["beta"] ** 2
+        n = len(i1) + len(i2)
+        c = math.sqrt(float(self.var[i1].sum() + self.var[i2].sum()) + n * beta2)
+        eps = _N.inv_cdf((self.params["p_empate"] + 1) / 2) * math.sqrt(n * beta2)
+        return float(self.mu[i1].sum() - self.mu[i2].sum()), c, eps
+
+    def _predict(self, i1, i2):
+        d, c, eps = self._partido(i1, i2)
+        gana1 = _N.cdf((d - eps) / c)
+        empate = _N.cdf((eps - d) / c) - _N.cdf((-eps - d) / c)
+        return gana1 + empate / 2
+
+    def _apply(self, i1, i2, ganador, dif):
+        tau2 = self.params["tau"] ** 2
+        self.var[i1] += tau2
+        self.var[i2] += tau2
+        d, c, eps = self._partido(i1, i2)
+        if ganador == 2:  # se resuelve desde el punto de vista del ganador
+            i1, i2, d = i2, i1, -d
+        t, e = d / c, eps / c
+        if ganador in (1, 2):
+            den = max(_N.cdf(t - e), 1e-300)
+            v = _N.pdf(t - e) / den
+            w = v * (v + t - e)
+        else:
+            den = max(_N.cdf(e - t) - _N.cdf(-e - t), 1e-300)
+            v = (_N.pdf(-e - t) - _N.pdf(e - t)) / den
+            w = v ** 2 + ((e - t) * _N.pdf(e - t) + (e + t) * _N.pdf(-e - t)) / den
+        for pos, signo in ((i1, 1.0), (i2, -1.0)):
+            var = self.var[pos]
+            self.mu[pos] += signo * var / c * v
+            self.var[pos] = var * np.maximum(1 - var / c ** 2 * w, 1e-6)
+
+
+MOTORES = {
+    "elo": MotorElo,
+    "glicko2": MotorGlicko2,
+    "trueskill": MotorTrueSkill,
+}
+
+
+def motor_configurado() -> str:
+    """Nombre del motor de la instalación (RATING_ENGINE); desconocido o vacío -> elo."""
+    nombre = (_get_secret("RATING_ENGINE") or MOTOR_DEFAULT).strip().lower()
+    return nombre if nombre in MOTORES else MOTOR_DEFAULT
+
+
+def crear_motor(nombre=None, **params) -> MotorRating:
+    return MOTORES[nombre or motor_configurado()](**params)
+
+
+# -------------------------
+# Métricas
+# -------------------------
+def metricas(predicciones, desde=None) -> dict:
+    """
+    predicciones: [(fecha, p1, ganador)]. log_loss / brier con empate = 0.5 y
+    acierto_favorito (% en partidos con ganador), como elo_service.simular.
+    """
+    sel = [(p, g) for f, p, g in predicciones if desde is None or str(f)[:10] >= desde]
+    if not sel:
+        return {"partidos": 0, "log_loss": None, "brier": None, "acierto_favorito": None}
+    p = np.array([x[0] for x in sel], dtype=float)
+    g = [x[1] for x in sel]
+    s = np.array([elo_service.scores(x)[0] for x in g])
+    q = np.clip(p, 1e-12, 1 - 1e-12)
+    dec = np.array([x in (1, 2) for x in g])
+    acierto = ((p >= 0.5) == (s == 1.0))[dec]
+    return {
+        "partidos": len(sel),
+        "log_loss": float(-(s * np.log(q) + (1 - s) * np.log(1 - q)).mean()),
+        "brier": float(((p - s) ** 2).mean()),
+        "acierto_favorito": round(float(acierto.mean()) * 100.0, 1) if acierto.size else None,
+    }
+
+
+def evaluar(nombres=None, desde=None, partidos=None, base=None) -> list:
+    """Replay de cada motor sobre el historial oficial; métricas por motor (sin escribir)."""
+    if partidos is None:
+        partidos, base = elo_service.cargar_historial()
+    out = []
+    for nombre in nombres or list(MOTORES):
+        t0 = time.perf_counter()
+        _filas, pred = crear_motor(nombre).replay(partidos, base)
+        out.append(dict(metricas(pred, desde), motor=nombre, segundos=time.perf_counter() - t0))
+    return out
+
+
+# -------------------------
+# Persistencia
+# -------------------------
+def replay_motor(nombre=None, escribir: bool = True) -> dict:
+    """
+    Recalcula el historial con el motor dado (default: el configurado).
+    elo -> elo_service.replay (historial_elo + jugadores.elo_actual).
+    otros -> historial_rating y ratings_jugador de ese motor, en una transacción.
+    """
+    nombre = nombre or motor_configurado()
+    if nombre == "elo":
+        return elo_service.replay(escribir=escribir)
+
+    t0 = time.perf_counter()
+    partidos, base = elo_service.cargar_historial()
+    motor = crear_motor(nombre)
+    filas, _pred = motor.replay(partidos, base)
+    jugados = sorted({f[0] for f in filas})
+    actuales = list(zip(
+        [nombre] * len(jugados), jugados,
+        motor.rating(jugados).tolist(), motor.incertidumbre(jugados).tolist(),
+    ))
+    if escribir:
+        conn = get_connection()
+        try:
+            cur = conn.cursor()
+            cur.execute("DELETE FROM historial_rating WHERE motor = ?", (nombre,))
+            cur.executemany("""
+                INSERT INTO historial_rating (motor, jugador_id, partido_id, rating_antes, rating_despues, fecha)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, [(nombre,) + tuple(f) for f in filas])
+            cur.execute("DELETE FROM ratings_jugador WHERE motor = ?", (nombre,))
+            cur.executemany("""
+                INSERT INTO ratings_jugador (motor, jugador_id, rating, incertidumbre)
+                VALUES (?, ?, ?, ?)
+            """, actuales)
+            conn.commit()
+        finally:
+            conn.close()
+        sync_now()
+    return {
+        "partidos": len(partidos),
+        "filas": len(filas),
+        "jugadores": len(actuales),
+        "segundos": time.perf_counter() - t0,
+    }
+
+
+def actualizar_motor_configurado():
+    """Tras cargar / corregir un resultado: rehace el historial del motor configurado si no es Elo."""
+    if motor_configurado() != "elo":
+        replay_motor()
+
+
+def ratings_actuales(jugador_ids, nombre=None) -> dict:
+    """
+    {jugador_id: rating} del motor configurado para balancear equipos.
+    Con Elo devuelve {} (se usa jugadores.elo_actual); sin fila (nunca jugó) tampoco aparece.
+    """
+    nombre = nombre or motor_configurado()
+    ids = [int(j) for j in jugador_ids]
+    if nombre == "elo" or not ids:
+        return {}
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(f"""
+            SELECT jugador_id, rating FROM ratings_jugador
+            WHERE motor = ? AND jugador_id IN ({",".join("?" * len(ids))})
+        """, [nombre] + ids)
+        return {int(r[0]): float(r[1]) for r in cur.fetchall()}
+    finally:
+        conn.close()
+
+
+# -------------------------
+# CLI
+# -------------------------
+def _main(argv) -> int:
+    import argparse
+    ap = argparse.ArgumentParser(prog="motores_rating.py")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    ev = sub.add_parser("evaluar", help="comparar motores sobre el historial")
+    ev.add_argument("--desde", default=None)
+    rp = sub.add_parser("replay", help="recalcular y guardar el historial de un motor")
+    rp.add_argument("motor", choices=list(MOTORES))
+    rp.add_argument("--dry-run", action="store_true")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "evaluar":
+        print(f"{'motor':>10} | {'log-loss':>9} {'Brier':>7} {'fav %':>6} {'seg':>6}")
+        for r in evaluar(desde=args.desde):
+            if not r["partidos"]:
+                print(f"{r['motor']:>10} | sin partidos")
+                continue
+            print(f"{r['motor']:>10} | {r['log_loss']:>9.4f} {r['brier']:>7.4f} "
+                  f"{r['acierto_favorito']:>6} {r['segundos']:>6.2f}")
+    elif args.cmd == "replay":
+        res = replay_motor(args.motor, escribir=not args.dry_run)
+        print(f"{args.motor}: {res}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
@@ -52,15 +52,7 @@ def color_por_partido(pid: int) -> str:
     return COLORES[pid % len(COLORES)]
 
 # ---------- numero_publico ----------
-def ensure_aux_tables(cur):
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS numeros_libres_partidos (
-            n INTEGER PRIMARY KEY
-        )
-    """)
-
 def next_numero_publico(cur):
-    ensure_aux_tables(cur)
     cur.execute("SELECT MIN(n) AS n FROM numeros_libres_partidos")
     row = cur.fetchone()
     if row and row["n"] is not None:
@@ -73,7 +65,6 @@ def consumir_numero_publico(cur, numero_publico: int):
     cur.execute("DELETE FROM numeros_libres_partidos WHERE n = ?", (numero_publico,))
 
 def liberar_numero_publico(cur, numero_publico: int):
-    ensure_aux_tables(cur)
     cur.execute("INSERT OR IGNORE INTO numeros_libres_partidos(n) VALUES (?)", (numero_publico,))
 
 # ---------- GRUPOS (partido_grupos) ----------
@@ -115,36 +106,7 @@ def suggested_group_ids_for_date(fecha_obj: date, grupos_rows):
             sug.append(g["id"])
     return sug
 
-# ---------- Lista de espera: migraciones mínimas ----------
-def ensure_waitlist_schema(cur):
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS lista_espera (
-            partido_id INTEGER NOT NULL,
-            jugador_id INTEGER NOT NULL,
-            created_at TEXT NOT NULL,
-            PRIMARY KEY (partido_id, jugador_id),
-            FOREIGN KEY (partido_id) REFERENCES partidos(id),
-            FOREIGN KEY (jugador_id) REFERENCES jugadores(id)
-        )
-    """)
-    cur.execute("PRAGMA table_info(partido_jugadores)")
-    cols = [row["name"] for row in cur.fetchall()]
-    if "ingreso_desde_espera" not in cols:
-        cur.execute("ALTER TABLE partido_jugadores ADD COLUMN ingreso_desde_espera INTEGER DEFAULT 0")
-
 # ---------- Plantilla de jugadores para programaciones ----------
-def ensure_plantilla_schema(cur):
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS plantilla_jugadores (
-            partido_base_id INTEGER NOT NULL,
-            jugador_id INTEGER NOT NULL,
-            orden INTEGER NOT NULL DEFAULT 0,
-            PRIMARY KEY (partido_base_id, jugador_id),
-            FOREIGN KEY (partido_base_id) REFERENCES partidos(id),
-            FOREIGN KEY (jugador_id) REFERENCES jugadores(id)
-        )
-    """)
-
 def get_plantilla(cur, base_id: int) -> List[int]:
     cur.execute("""
         SELECT pj.jugador_id, j.nombre, pj.orden
@@ -170,15 +132,6 @@ def panel_creacion():
 
     conn = get_connection()
     cur = conn.cursor()
-    ensure_aux_tables(cur)
-    ensure_waitlist_schema(cur)
-    ensure_plantilla_schema(cur)
-    # compat publicar_desde
-    try:
-        cur.execute("ALTER TABLE partidos ADD COLUMN publicar_desde TEXT")
-    except Exception:
-        pass
-    conn.commit()
 
     # --- CREAR / PROGRAMAR PARTIDO ---
     st.write("### Crear nuevo partido")
@@ -194,6 +147,9 @@ def panel_creacion():
     cancha_sel = st.selectbox("Seleccionar cancha (opcional)", opciones_canchas, key="crear_cancha_sel")
     cancha_id = int(cancha_sel.split(" - ")[0]) if cancha_sel != "Sin asignar" else None
 
+    # Tamaño de equipo (5v5 por defecto; canchas grandes 6v6..8v8)
+    jpe = st.selectbox("Jugadores por equipo", [5, 6, 7, 8, 9, 10, 11], index=0, key="crear_jpe")
+
     # Grupos (multiselect) con preselección automática por día
     cur.execute("SELECT id, nombre FROM grupos ORDER BY nombre ASC")
     grupos_rows = cur.fetchall()
@@ -266,9 +222,9 @@ def panel_creacion():
             hhmm = hora_juego.hour * 100 + hora_juego.minute
 
             cur.execute(
-                "INSERT INTO partidos (fecha, cancha_id, es_oficial, tipo, hora, numero_publico, publicar_desde) "
-                "VALUES (?, ?, 0, 'abierto', ?, ?, NULL)",
-                (fecha.strftime("%Y-%m-%d"), cancha_id, hhmm, numero_publico)
+                "INSERT INTO partidos (fecha, cancha_id, es_oficial, tipo, hora, numero_publico, publicar_desde, jugadores_por_equipo) "
+                "VALUES (?, ?, 0, 'abierto', ?, ?, NULL, ?)",
+                (fecha.strftime("%Y-%m-%d"), cancha_id, hhmm, numero_publico, jpe)
             )
             nuevo_id = cur.lastrowid
             consumir_numero_publico(cur, numero_publico)
@@ -288,24 +244,6 @@ def panel_creacion():
             if not programar or not (fecha_pub and hora_pub):
                 st.warning("Elegí fecha y hora de publicación, o desmarcá la opción de programar.")
             else:
-                # schema mínimos
-                try:
-                    cur.execute("""
-                        CREATE TABLE IF NOT EXISTS programaciones (
-                          id INTEGER PRIMARY KEY AUTOINCREMENT,
-                          partido_base_id INTEGER NOT NULL,
-                          repeat_semanal INTEGER NOT NULL DEFAULT 0,
-                          next_publicar_desde TEXT NOT NULL,
-                          hora_juego INTEGER,
-                          cancha_id INTEGER,
-                          enabled INTEGER NOT NULL DEFAULT 1,
-                          FOREIGN KEY (partido_base_id) REFERENCES partidos(id)
-                        )
-                    """)
-                except Exception:
-                    pass
-                ensure_plantilla_schema(cur)
-
                 # 1) crear PARTIDO BASE tipo 'cerrado'
                 try:
                     numero_publico_base, _origen = next_numero_publico(cur)
@@ -316,9 +254,9 @@ def panel_creacion():
 
                 hhmm = hora_juego.hour * 100 + hora_juego.minute
                 cur.execute(
-                    "INSERT INTO partidos (fecha, cancha_id, es_oficial, tipo, hora, numero_publico, publicar_desde) "
-                    "VALUES (?, ?, 0, 'cerrado', ?, ?, NULL)",
-                    (fecha.strftime("%Y-%m-%d"), cancha_id, hhmm, numero_publico_base)
+                    "INSERT INTO partidos (fecha, cancha_id, es_oficial, tipo, hora, numero_publico, publicar_desde, jugadores_por_equipo) "
+                    "VALUES (?, ?, 0, 'cerrado', ?, ?, NULL, ?)",
+                    (fecha.strftime("%Y-%m-%d"), cancha_id, hhmm, numero_publico_base, jpe)
                 )
                 base_id = cur.lastrowid
                 consumir_numero_publico(cur, numero_publico_base)
@@ -353,7 +291,7 @@ def panel_creacion():
     # --- PARTIDOS EXISTENTES (pendientes) ---
     st.write("### Partidos existentes (pendientes)")
     cur.execute("""
-        SELECT id, fecha, cancha_id, hora, numero_publico
+        SELECT id, fecha, cancha_id, hora, numero_publico, jugadores_por_equipo
         FROM partidos
         WHERE tipo = 'abierto'
           AND ganador IS NULL
@@ -415,7 +353,7 @@ def panel_creacion():
             ids_asignados = [j["jugador_id"] for j in jugadores_partido]
 
             total_actual = len(jugadores_partido)
-            cupo_total = 10
+            cupo_total = 2 * int(p["jugadores_por_equipo"] or 5)
             cupo_restante = max(0, cupo_total - total_actual)
 
             st.write("### Jugadores asignados")
@@ -480,7 +418,7 @@ def panel_creacion():
             )
 
             if len(seleccionados) > cupo_restante:
-                st.warning(f"Solo podés agregar {cupo_restante} jugador(es) más para no superar {cupo_total}/10.")
+                st.warning(f"Solo podés agregar {cupo_restante} jugador(es) más para no superar {cupo_total}.")
                 seleccionados = seleccionados[:cupo_restante]
 
             if st.button(
@@ -586,6 +524,8 @@ def panel_creacion():
                     )
                     set_groups_for_partido(cur, pid, grupos_edit_ids)
                     conn.commit()
+                    import snapshot_elo
+                    snapshot_elo.persistir()  # la fecha de un partido jugado mueve la firma
                     st.success(f"Partido N° {p['numero_publico']} actualizado ✅")
                     st.rerun()
             with c2:
@@ -607,21 +547,6 @@ def panel_creacion():
 
     # --- PROGRAMACIONES ACTIVAS ---
     st.write("### Programaciones activas")
-    # schema seguro
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS programaciones (
-          id INTEGER PRIMARY KEY AUTOINCREMENT,
-          partido_base_id INTEGER NOT NULL,
-          repeat_semanal INTEGER NOT NULL DEFAULT 0,
-          next_publicar_desde TEXT NOT NULL,
-          hora_juego INTEGER,
-          cancha_id INTEGER,
-          enabled INTEGER NOT NULL DEFAULT 1,
-          FOREIGN KEY (partido_base_id) REFERENCES partidos(id)
-        )
-    """)
-    ensure_plantilla_schema(cur)
-
     cur.execute("""
         SELECT pr.id, pr.partido_base_id, pr.repeat_semanal, pr.next_publicar_desde, pr.hora_juego, pr.cancha_id,
                pb.numero_publico AS np_base, pb.fecha AS fecha_base
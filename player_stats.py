@@ -0,0 +1,159 @@
+# player_stats.py
+# Agregados W/E/L por jugador y período (tabla player_stats), sin UI.
+# - periodo: '*' (todo), 'YYYY' (año calendario) o 'temporada:<label>' (rango de seasons;
+#   una temporada abierta va desde start_date en adelante).
+# - Cuenta los partidos con resultado cargado (ganador o diferencia_gol no nulos), para
+#   los jugadores con equipo: W si ganó su equipo, L si ganó el otro, E si no hay ganador
+#   (NULL, o 0 = "Empate" editado desde historial).
+# - aplicar_partido(cur, partido_id, signo) suma (+1) o resta (-1) un partido dentro de la
+#   transacción de quien escribe el resultado (elo_service: registrar / editar / deshacer /
+#   eliminar). reconstruir() rehace la tabla completa:
+#     python player_stats.py reconstruir
+
+import sys
+
+from db import get_connection, sync_now
+
+PERIODO_TODO = "*"
+
+# partido con resultado cargado
+CON_RESULTADO = "({a}.ganador IS NOT NULL OR {a}.diferencia_gol IS NOT NULL)"
+
+_W = "CASE WHEN p.ganador = pj.equipo THEN 1 ELSE 0 END"
+_E = "CASE WHEN p.ganador IS NULL OR p.ganador NOT IN (1, 2) THEN 1 ELSE 0 END"
+_L = "CASE WHEN p.ganador IN (1, 2) AND p.ganador <> pj.equipo THEN 1 ELSE 0 END"
+
+
+def periodo_temporada(label: str) -> str:
+    return f"temporada:{label}"
+
+
+def periodo_de(temporada, cur=None) -> str:
+    """
+    Período de un selector de temporada: 'Todas'/None -> '*'; label de seasons -> su
+    temporada; 'YYYY' -> ese año; cualquier otra cosa -> '*'.
+    """
+    if not temporada or temporada == "Todas":
+        return PERIODO_TODO
+    conn = None
+    if cur is None:
+        conn = get_connection()
+        cur = conn.cursor()
+    try:
+        cur.execute("SELECT 1 FROM seasons WHERE label = ? LIMIT 1", (temporada,))
+        if cur.fetchone() is not None:
+            return periodo_temporada(temporada)
+    finally:
+        if conn is not None:
+            conn.close()
+    s = str(temporada)
+    return s if len(s) == 4 and s.isdigit() else PERIODO_TODO
+
+
+# -------------------------
+# Mantenimiento incremental
+# -------------------------
+def aplicar_partido(cur, partido_id: int, signo: int = 1):
+    """
+    Suma (signo=+1) o resta (signo=-1) el resultado actual del partido en todos sus
+    períodos. Sin resultado cargado no hace nada. No hace commit.
+    """
+    cur.execute(
+        "SELECT fecha_dia, ganador, diferencia_gol FROM partidos WHERE id = ?", (partido_id,)
+    )
+    row = cur.fetchone()
+    if row is None or (row[1] is None and row[2] is None):
+        return
+    dia, ganador = str(row[0]), row[1]
+    cur.execute("""
+        SELECT label FROM seasons
+        WHERE start_date <= ? AND (end_date IS NULL OR end_date >= ?)
+    """, (dia, dia))
+    periodos = [PERIODO_TODO, dia[:4]] + [periodo_temporada(r[0]) for r in cur.fetchall()]
+    cur.execute(
+        "SELECT jugador_id, equipo FROM partido_jugadores WHERE partido_id = ? AND equipo IN (1, 2)",
+        (partido_id,),
+    )
+    filas = []
+    for jid, equipo in cur.fetchall():
+        w = 1 if ganador == equipo else 0
+        l = 1 if ganador in (1, 2) and ganador != equipo else 0
+        e = 1 - w - l
+        filas.extend((per, int(jid), signo, signo * w, signo * e, signo * l) for per in periodos)
+    if not filas:
+        return
+    cur.executemany("""
+        INSERT INTO player_stats (periodo, jugador_id, pj, w, e, l)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (periodo, jugador_id) DO UPDATE
+           SET pj = pj + excluded.pj,
+               w = w + excluded.w,
+               e = e + excluded.e,
+               l = l + excluded.l
+    """, filas)
+    if signo < 0:
+        cur.execute("DELETE FROM player_stats WHERE pj <= 0")
+
+
+# -------------------------
+# Reconstrucción
+# -------------------------
+def _insertar(cur, periodo_sql: str, join: str = "", where: str = "", params=()):
+    cur.execute(f"""
+        INSERT INTO player_stats (periodo, jugador_id, pj, w, e, l)
+        SELECT {periodo_sql}, pj.jugador_id, COUNT(*), SUM({_W}), SUM({_E}), SUM({_L})
+        FROM partidos p
+        JOIN partido_jugadores pj ON pj.partido_id = p.id
+        {join}
+        WHERE {CON_RESULTADO.format(a="p")}
+          AND pj.equipo IN (1, 2)
+          {where}
+        GROUP BY 1, pj.jugador_id
+    """, params)
+
+
+def reconstruir_temporada(cur, label: str, start_date, end_date=None) -> str:
+    """Rehace el período de una temporada con ese rango (end_date None = abierta). No hace commit."""
+    periodo = periodo_temporada(label)
+    cur.execute("DELETE FROM player_stats WHERE periodo = ?", (periodo,))
+    where = "AND p.fecha_dia >= ?"
+    params = [periodo, str(start_date)[:10]]
+    if end_date:
+        where += " AND p.fecha_dia <= ?"
+        params.append(str(end_date)[:10])
+    _insertar(cur, "?", where=where, params=params)
+    return periodo
+
+
+def reconstruir(cur=None) -> int:
+    """Rehace player_stats completa (todo, años y temporadas). Devuelve la cantidad de filas."""
+    conn = None
+    if cur is None:
+        conn = get_connection()
+        cur = conn.cursor()
+    try:
+        cur.execute("DELETE FROM player_stats")
+        _insertar(cur, "'" + PERIODO_TODO + "'")
+        _insertar(cur, "substr(p.fecha_dia, 1, 4)")
+        _insertar(
+            cur, "'temporada:' || s.label",
+            join="JOIN seasons s ON p.fecha_dia >= s.start_date "
+                 "AND (s.end_date IS NULL OR p.fecha_dia <= s.end_date)",
+        )
+        cur.execute("SELECT COUNT(*) FROM player_stats")
+        n = int(cur.fetchone()[0])
+        if conn is not None:
+            conn.commit()
+    finally:
+        if conn is not None:
+            conn.close()
+    if conn is not None:
+        sync_now()
+    return n
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["reconstruir"]:
+        print("Uso: python player_stats.py reconstruir")
+        sys.exit(2)
+    print(f"player_stats: {reconstruir()} filas")
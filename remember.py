@@ -12,22 +12,6 @@ def _conn():
     return _gc()
 
 
-def ensure_tables():
-    with _conn() as conn:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS login_tokens (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                token_hash TEXT NOT NULL,
-                expires_at TEXT NOT NULL
-            )
-            """
-        )
-        conn.commit()
-
-
 def _hash(token: str) -> str:
     return hashlib.sha256(token.encode("utf-8")).hexdigest()
 
@@ -9,7 +9,8 @@ import sqlite3
 from datetime import datetime, timedelta
 
 DB_NAME = "elo_futbol.db"
-CUPO_PARTIDO = 10
+JUGADORES_POR_EQUIPO = 5                  # por defecto (partidos.jugadores_por_equipo)
+CUPO_PARTIDO = 2 * JUGADORES_POR_EQUIPO   # cupo por defecto; por partido usar cupo_partido()
 
 def get_connection():
     from db import get_connection as _gc
@@ -18,17 +19,24 @@ def get_connection():
     return conn
 
 # -------------------------
-# Helpers de número público
+# Tamaño de equipo / cupo por partido
 # -------------------------
-def ensure_aux_tables(cur):
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS numeros_libres_partidos (
-            n INTEGER PRIMARY KEY
-        )
-    """)
+def jugadores_por_equipo(cur, partido_id: int) -> int:
+    cur.execute("SELECT jugadores_por_equipo FROM partidos WHERE id = ?", (partido_id,))
+    row = cur.fetchone()
+    try:
+        k = int(row[0]) if row and row[0] is not None else 0
+    except (TypeError, ValueError):
+        k = 0
+    return k if k > 0 else JUGADORES_POR_EQUIPO
 
+def cupo_partido(cur, partido_id: int) -> int:
+    return 2 * jugadores_por_equipo(cur, partido_id)
+
+# -------------------------
+# Helpers de número público
+# -------------------------
 def next_numero_publico(cur):
-    ensure_aux_tables(cur)
     cur.execute("SELECT MIN(n) AS n FROM numeros_libres_partidos")
     row = cur.fetchone()
     if row and row["n"] is not None:
@@ -40,40 +48,6 @@ def next_numero_publico(cur):
 def consumir_numero_publico(cur, numero_publico: int):
     cur.execute("DELETE FROM numeros_libres_partidos WHERE n = ?", (numero_publico,))
 
-# -------------------------
-# Migrations mínimas
-# -------------------------
-def _ensure_schema(cur):
-    # programaciones
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS programaciones (
-          id INTEGER PRIMARY KEY AUTOINCREMENT,
-          partido_base_id INTEGER NOT NULL,
-          repeat_semanal INTEGER NOT NULL DEFAULT 0,
-          next_publicar_desde TEXT NOT NULL,
-          hora_juego INTEGER,
-          cancha_id INTEGER,
-          enabled INTEGER NOT NULL DEFAULT 1,
-          FOREIGN KEY (partido_base_id) REFERENCES partidos(id)
-        )
-    """)
-    # columna publicar_desde (por compatibilidad; la instancia materializada no la usa)
-    try:
-        cur.execute("ALTER TABLE partidos ADD COLUMN publicar_desde TEXT")
-    except Exception:
-        pass
-    # plantilla_jugadores: jugadores que deben arrancar confirmados al materializar
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS plantilla_jugadores (
-            partido_base_id INTEGER NOT NULL,
-            jugador_id INTEGER NOT NULL,
-            orden INTEGER NOT NULL DEFAULT 0,
-            PRIMARY KEY (partido_base_id, jugador_id),
-            FOREIGN KEY (partido_base_id) REFERENCES partidos(id),
-            FOREIGN KEY (jugador_id) REFERENCES jugadores(id)
-        )
-    """)
-
 # -------------------------
 # Lazy trigger
 # -------------------------
@@ -89,16 +63,17 @@ def run_programaciones_vencidas() -> int:
     """
     now = datetime.now()
     created = 0
+    bases_movidos = False
 
     with get_connection() as conn:
         cur = conn.cursor()
-        _ensure_schema(cur)
 
         # Traer programaciones vencidas (enabled=1)
         cur.execute("""
             SELECT pr.id, pr.partido_base_id, pr.repeat_semanal, pr.next_publicar_desde,
                    pr.hora_juego, pr.cancha_id, pr.enabled,
-                   pb.fecha AS base_fecha, pb.numero_publico AS base_np
+                   pb.fecha AS base_fecha, pb.numero_publico AS base_np,
+                   pb.jugadores_por_equipo AS base_jpe
             FROM programaciones pr
             JOIN partidos pb ON pb.id = pr.partido_base_id
             WHERE pr.enabled = 1
@@ -126,12 +101,13 @@ def run_programaciones_vencidas() -> int:
             fecha_juego_str = pr["base_fecha"]  # 'YYYY-MM-DD'
             hora_juego = pr["hora_juego"] or 1900  # HHMM
             cancha_id = pr["cancha_id"]
+            jpe = int(pr["base_jpe"] or JUGADORES_POR_EQUIPO)
 
             # #3 crear partido visible (abierto, sin ganador)
             cur.execute("""
-                INSERT INTO partidos (fecha, cancha_id, es_oficial, tipo, hora, numero_publico, ganador, diferencia_gol, publicar_desde)
-                VALUES (?, ?, 0, 'abierto', ?, ?, NULL, NULL, NULL)
-            """, (fecha_juego_str, cancha_id, hora_juego, numero_publico))
+                INSERT INTO partidos (fecha, cancha_id, es_oficial, tipo, hora, numero_publico, ganador, diferencia_gol, publicar_desde, jugadores_por_equipo)
+                VALUES (?, ?, 0, 'abierto', ?, ?, NULL, NULL, NULL, ?)
+            """, (fecha_juego_str, cancha_id, hora_juego, numero_publico, jpe))
             partido_id = cur.lastrowid
             consumir_numero_publico(cur, numero_publico)
 
@@ -155,8 +131,8 @@ def run_programaciones_vencidas() -> int:
             plantilla = [r["jugador_id"] for r in cur.fetchall() if (r["estado"] == "activo")]
 
             if plantilla:
-                # no exceder CUPO_PARTIDO
-                plantilla = plantilla[:CUPO_PARTIDO]
+                # no exceder el cupo del partido
+                plantilla = plantilla[:2 * jpe]
                 to_insert = [(partido_id, jid, 1, 'clara', 0) for jid in plantilla]
                 cur.executemany("""
                     INSERT OR IGNORE INTO partido_jugadores (partido_id, jugador_id, confirmado_por_jugador, camiseta, ingreso_desde_espera)
@@ -173,6 +149,7 @@ def run_programaciones_vencidas() -> int:
                     base_dt2 = base_dt + timedelta(days=7)
                     cur.execute("UPDATE partidos SET fecha = ? WHERE id = ?",
                                 (base_dt2.strftime("%Y-%m-%d"), pr["partido_base_id"]))
+                    bases_movidos = True
                 except Exception:
                     pass
                 pub_dt2 = pub_dt + timedelta(days=7)
@@ -184,4 +161,8 @@ def run_programaciones_vencidas() -> int:
 
         conn.commit()
 
+    if bases_movidos:
+        # si el base ya tiene historial_elo, su nueva fecha mueve la firma del snapshot
+        import snapshot_elo
+        snapshot_elo.persistir()
     return created
\ No newline at end of file
@@ -0,0 +1,254 @@
+# snapshot_elo.py
+# Snapshot del historial de ELO para consultas "ELO a la fecha X" sin joins ni sort.
+# - Un solo array por columna (jugador, fecha, partido, elo_antes, elo_despues, equipo),
+#   ordenado por (jugador, fecha, partido); cada jugador es un tramo [inicio, fin) y las
+#   búsquedas por fecha son bisect dentro de su tramo.
+# - Firma: (COUNT, MAX(id), TOTAL(elo_despues)) de historial_elo más una suma ponderada
+#   de partidos.fecha y partido_jugadores.equipo de los partidos con historial (entradas
+#   del snapshot). La mueve todo cambio de elo_service (registro, replay, correcciones) y
+#   toda edición de fecha o equipo de un partido ya jugado; armar equipos de un partido
+#   abierto no la toca. Quien edita esas filas llama a persistir() después de su commit.
+# - Cache en proceso (por firma) + checkpoint persistido en elo_snapshot (una fila con
+#   los arrays serializados): un proceso nuevo carga el checkpoint en vez de rearmarlo.
+# - La firma se revisa cada SNAPSHOT_TTL segundos. snapshot() sólo lee; elo_service
+#   llama a persistir() después de su commit (rearma y guarda el checkpoint), así en el
+#   mismo proceso no hay espera. Rearmar a mano: python snapshot_elo.py reconstruir
+#
+# API: snapshot().elo_at(jugador_id, fecha), .team_elo_at(partido_id), .serie(...), .rango(...)
+#      y los atajos elo_at / team_elo_at a nivel módulo.
+
+import io
+import sys
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime
+
+import numpy as np
+
+from db import get_connection, sync_now
+
+_FIN_DEL_DIA = "\uffff"  # 'YYYY-MM-DD' + esto queda después de cualquier hora de ese día
+
+
+def _clave(fecha) -> str:
+    """Fecha/hora como string comparable con partidos.fecha; una fecha sola incluye todo el día."""
+    if isinstance(fecha, datetime):
+        return fecha.strftime("%Y-%m-%d %H:%M:%S")
+    s = str(fecha)
+    return s + _FIN_DEL_DIA if len(s) == 10 else s
+
+
+class SnapshotElo:
+    __slots__ = ("firma", "jugador", "fecha", "partido", "antes", "despues", "equipo",
+                 "_tramo", "_equipos")
+
+    def __init__(self, firma, jugador, fecha, partido, antes, despues, equipo):
+        self.firma = firma
+        self.jugador = jugador
+        self.fecha = list(fecha)  # bisect sobre str nativo
+        self.partido = partido
+        self.antes = antes
+        self.despues = despues
+        self.equipo = equipo
+        # tramo de cada jugador dentro de los arrays
+        ids, inicios = np.unique(jugador, return_index=True)
+        fines = np.append(inicios[1:], len(jugador))
+        self._tramo = {int(j): (int(a), int(b)) for j, a, b in zip(ids, inicios, fines)}
+        # suma de elo_antes por (partido, equipo)
+        eq = defaultdict(dict)
+        for pid, e, a in zip(partido.tolist(), equipo.tolist(), antes.tolist()):
+            if e in (1, 2):
+                eq[pid][e] = eq[pid].get(e, 0.0) + a
+        self._equipos = dict(eq)
+
+    # ---------- construcción / serialización ----------
+    @classmethod
+    def construir(cls, cur, firma):
+        cur.execute("""
+            SELECT h.jugador_id, p.fecha, p.id, h.elo_antes, h.elo_despues, COALESCE(pj.equipo, 0)
+            FROM historial_elo h
+            JOIN partidos p ON p.id = h.partido_id
+            LEFT JOIN partido_jugadores pj
+                   ON pj.partido_id = h.partido_id AND pj.jugador_id = h.jugador_id
+            ORDER BY h.jugador_id, p.fecha, p.id
+        """)
+        rows = [tuple(r) for r in cur.fetchall()]
+        col = list(zip(*rows)) if rows else [()] * 6
+        return cls(
+            firma,
+            np.array(col[0], dtype=np.int64),
+            [str(f) for f in col[1]],
+            np.array(col[2], dtype=np.int64),
+            np.array(col[3], dtype=np.float64),
+            np.array(col[4], dtype=np.float64),
+            np.array(col[5], dtype=np.int8),
+        )
+
+    def a_bytes(self) -> bytes:
+        buf = io.BytesIO()
+        np.savez_compressed(
+            buf, jugador=self.jugador, fecha=np.array(self.fecha, dtype=str), partido=self.partido,
+            antes=self.antes, despues=self.despues, equipo=self.equipo,
+        )
+        return buf.getvalue()
+
+    @classmethod
+    def desde_bytes(cls, datos, firma):
+        z = np.load(io.BytesIO(bytes(datos)))
+        return cls(firma, z["jugador"], z["fecha"].tolist(), z["partido"],
+                   z["antes"], z["despues"], z["equipo"])
+
+    # ---------- consultas ----------
+    def elo_at(self, jugador_id: int, fecha):
+        """
+        ELO del jugador después de sus oficiales hasta `fecha` (inclusive; una fecha
+        'YYYY-MM-DD' incluye todo ese día). Antes de su primer oficial: su ELO inicial.
+        Sin historial: None (usar jugadores.elo_actual).
+        """
+        tramo = self._tramo.get(int(jugador_id))
+        if tramo is None:
+            return None
+        a, b = tramo
+        i = bisect_right(self.fecha, _clave(fecha), a, b)
+        return float(self.antes[a]) if i == a else float(self.despues[i - 1])
+
+    def team_elo_at(self, partido_id: int) -> dict:
+        """{equipo: suma de elo_antes} del partido; {} si no tiene historial (amistoso / sin cargar)."""
+        return dict(self._equipos.get(int(partido_id), {}))
+
+    def _indices(self, jugador_id, desde=None, hasta=None):
+        tramo = self._tramo.get(int(jugador_id))
+        if tramo is None:
+            return 0, 0
+        a, b = tramo
+        lo = a if desde is None else bisect_left(self.fecha, str(desde)[:10], a, b)
+        hi = b if hasta is None else bisect_right(self.fecha, str(hasta)[:10] + _FIN_DEL_DIA, a, b)
+        return lo, hi
+
+    def serie(self, jugador_id: int, desde=None, hasta=None):
+        """(fechas, elo_despues) de los oficiales del jugador con fecha_dia entre desde y hasta."""
+        lo, hi = self._indices(jugador_id, desde, hasta)
+        return self.fecha[lo:hi], self.despues[lo:hi].tolist()
+
+    def rango(self, jugador_id: int, desde=None, hasta=None):
+        """(elo_antes del primero, elo_despues del último) en el rango, o None si no jugó."""
+        lo, hi = self._indices(jugador_id, desde, hasta)
+        if lo >= hi:
+            return None
+        return float(self.antes[lo]), float(self.despues[hi - 1])
+
+
+# -------------------------
+# Cache en proceso + checkpoint persistido
+# -------------------------
+SNAPSHOT_TTL = 30.0  # seg. sin volver a mirar la firma (cambios de otros procesos)
+
+_LOCK = threading.Lock()
+_CACHE = None
+_VERIFICADO = 0.0
+
+
+def _firma(cur) -> str:
+    # sólo lo que lee construir(): historial_elo más fecha y equipo de los partidos que
+    # tienen historial (un partido abierto no la mueve), ponderados por id para que un
+    # intercambio entre dos partidos / dos jugadores también la mueva
+    cur.execute("""
+        WITH con_historial AS (SELECT DISTINCT partido_id FROM historial_elo)
+        SELECT h.n, h.max_id, h.total,
+               (SELECT TOTAL(julianday(p.fecha) * p.id)
+                  FROM partidos p WHERE p.id IN con_historial),
+               (SELECT TOTAL(COALESCE(pj.equipo, 0) * pj.jugador_id)
+                  FROM partido_jugadores pj WHERE pj.partido_id IN con_historial)
+        FROM (SELECT COUNT(*) AS n, COALESCE(MAX(id), 0) AS max_id, TOTAL(elo_despues) AS total
+                FROM historial_elo) h
+    """)
+    n, max_id, total, fechas, equipos = cur.fetchone()
+    return f"{int(n)}:{int(max_id)}:{float(total):.0f}:{float(fechas)!r}:{int(equipos)}"
+
+
+def invalidar():
+    """Fuerza a revisar la firma en el próximo snapshot() (tras escribir historial_elo)."""
+    global _VERIFICADO
+    _VERIFICADO = 0.0
+
+
+def snapshot() -> SnapshotElo:
+    """
+    Snapshot vigente: cache del proceso, si no el checkpoint de la base, si no se rearma
+    en memoria. Sólo lee; el checkpoint lo guarda persistir().
+    """
+    global _CACHE, _VERIFICADO
+    snap = _CACHE
+    if snap is not None and time.monotonic() - _VERIFICADO < SNAPSHOT_TTL:
+        return snap
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        firma = _firma(cur)
+        with _LOCK:
+            if _CACHE is None or _CACHE.firma != firma:
+                cur.execute("SELECT datos FROM elo_snapshot WHERE firma = ?", (firma,))
+                row = cur.fetchone()
+                if row is not None:
+                    _CACHE = SnapshotElo.desde_bytes(row[0], firma)
+                else:
+                    _CACHE = SnapshotElo.construir(cur, firma)
+            _VERIFICADO = time.monotonic()
+            return _CACHE
+    finally:
+        conn.close()
+
+
+def persistir():
+    """
+    Rearma el snapshot y guarda el checkpoint si cambió la firma. Lo llaman los que
+    escriben historial_elo (elo_service) después de su commit, y `python snapshot_elo.py
+    reconstruir`. Sin checkpoint igual sirve la cache: ante un error sólo invalida.
+    """
+    global _CACHE, _VERIFICADO
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        firma = _firma(cur)
+        cur.execute("SELECT 1 FROM elo_snapshot WHERE firma = ?", (firma,))
+        if cur.fetchone() is None:
+            snap = SnapshotElo.construir(cur, firma)
+            cur.execute("DELETE FROM elo_snapshot")
+            cur.execute(
+                "INSERT INTO elo_snapshot (firma, creado, datos) VALUES (?, ?, ?)",
+                (firma, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), snap.a_bytes()),
+            )
+            conn.commit()
+            with _LOCK:
+                _CACHE, _VERIFICADO = snap, time.monotonic()
+        else:
+            invalidar()
+    except Exception:
+        invalidar()
+    finally:
+        conn.close()
+
+
+def elo_at(jugador_id: int, fecha):
+    return snapshot().elo_at(jugador_id, fecha)
+
+
+def team_elo_at(partido_id: int) -> dict:
+    return snapshot().team_elo_at(partido_id)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["reconstruir"]:
+        print("Uso: python snapshot_elo.py reconstruir")
+        sys.exit(2)
+    conn = get_connection()
+    try:
+        conn.execute("DELETE FROM elo_snapshot")
+        conn.commit()
+    finally:
+        conn.close()
+    persistir()
+    sync_now()
+    print(f"snapshot de elo: firma {snapshot().firma}")
@@ -0,0 +1,87 @@
+# tools/bench_equipos.py
+# Benchmark del generador de opciones (equipos.generar_opciones_unicas) contra la
+# implementación anterior en Python puro. Verifica además que ambas devuelvan
+# exactamente las mismas opciones y ΔELO para planteles al azar (con empates).
+#
+# Uso: python tools/bench_equipos.py [cantidad_planteles]
+
+from pathlib import Path
+import itertools
+import random
+import sys
+import time
+
+# === HACK de ruta para que se vea equipos.py (que está en el directorio padre) ===
+REPO_ROOT = Path(__file__).resolve().parent.parent  # sube de /tools a raíz del repo
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+import equipos  # noqa: E402
+
+
+# ----------------- implementación anterior (referencia) -----------------
+def _legacy_singles(bloques, n_opciones=12, diff_max=350):
+    name2elo = {p["nombre"]: int(p["elo"]) for b in bloques for p in b}
+    names = [b[0]["nombre"] for b in bloques]
+    anchor = names[0]
+    others = names[1:]
+
+    candidatos = []
+    for comb in itertools.combinations(others, 4):
+        team1 = [anchor] + list(comb)
+        team2 = [n for n in names if n not in team1]
+        team1 = sorted(team1)
+        team2 = sorted(team2)
+        elo1 = int(sum(name2elo.get(n, 0) for n in team1))
+        elo2 = int(sum(name2elo.get(n, 0) for n in team2))
+        candidatos.append((abs(elo1 - elo2), elo1, elo2, team1 + team2))
+
+    candidatos.sort(key=lambda x: x[0])
+    dentro = [c for c in candidatos if c[0] <= diff_max]
+    base = dentro if len(dentro) >= n_opciones else candidatos
+    base = base[:min(n_opciones, len(base))]
+    return [c[3] for c in base], [c[0] for c in base]
+
+
+# ----------------- planteles de prueba -----------------
+def _plantel_random(rng):
+    # ELOs redondeados a 25 para forzar empates de ΔELO
+    jugadores = [{"jugador_id": i + 1, "nombre": f"J{i:02d}", "elo": 25 * rng.randint(32, 56)} for i in range(10)]
+    rng.shuffle(jugadores)
+    return equipos.construir_bloques(jugadores)
+
+
+def _medir(fn, casos, repeticiones=3):
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        for bloques, n, dmax in casos:
+            fn(bloques, n_opciones=n, diff_max=dmax)
+        mejor = min(mejor, time.perf_counter() - t0)
+    return mejor
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    cantidad = int(argv[0]) if argv else 500
+    rng = random.Random(1234)
+    casos = [(_plantel_random(rng), rng.choice([0, 1, 5, 12, 40, 126, 200]), rng.choice([0, 50, 350, 10_000]))
+             for _ in range(cantidad)]
+
+    distintos = 0
+    for bloques, n, dmax in casos:
+        if equipos.generar_opciones_unicas(bloques, n_opciones=n, diff_max=dmax) != _legacy_singles(bloques, n, dmax):
+            distintos += 1
+    print(f"Planteles: {cantidad} | resultados distintos: {distintos}")
+
+    t_old = _medir(_legacy_singles, casos)
+    t_new = _medir(equipos.generar_opciones_unicas, casos)
+    t_ids = _medir(equipos.generar_opciones_ids, casos)
+    print(f"anterior : {1000 * t_old / cantidad:.3f} ms/plantel")
+    print(f"NumPy    : {1000 * t_new / cantidad:.3f} ms/plantel  (x{t_old / t_new:.1f})")
+    print(f"por ids  : {1000 * t_ids / cantidad:.3f} ms/plantel  (x{t_old / t_ids:.1f}, sin nombres)")
+    return 1 if distintos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
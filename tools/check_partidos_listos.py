@@ -0,0 +1,113 @@
+# tools/check_partidos_listos.py
+# Compara cargaresultados._get_partidos_listos (una consulta agregada) contra la
+# implementación anterior (roster + camisetas por partido, 3+ consultas cada uno).
+#
+# Uso:
+#   python tools/check_partidos_listos.py          -> contra la base configurada (db.get_connection)
+#   python tools/check_partidos_listos.py --fresh  -> base temporal con partidos al azar
+# Sale con código 1 si las dos versiones no devuelven lo mismo.
+
+from pathlib import Path
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+
+# === HACK de ruta para que se vea cargaresultados.py (que está en el directorio padre) ===
+REPO_ROOT = Path(__file__).resolve().parent.parent  # sube de /tools a raíz del repo
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+
+# ----------------- implementación anterior (referencia) -----------------
+def _legacy_partidos_listos():
+    import equipos
+    from db import get_connection
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT DISTINCT p.id,
+                        p.fecha,
+                        IFNULL(c.nombre,'Sin asignar') AS cancha,
+                        p.ganador,
+                        p.diferencia_gol
+          FROM partidos p
+          JOIN partido_jugadores pj ON pj.partido_id = p.id
+     LEFT JOIN canchas c ON c.id = p.cancha_id
+         WHERE p.tipo = 'abierto'
+      ORDER BY p.fecha DESC, p.id DESC
+    """
+    )
+    rows = cur.fetchall()
+    conn.close()
+
+    opciones = []
+    for p in rows:
+        conf, _, _, _, _ = equipos.equipos_ya_confirmados(p["id"])
+        cam1 = equipos.obtener_camiseta_equipo(p["id"], 1)
+        cam2 = equipos.obtener_camiseta_equipo(p["id"], 2)
+        sin_resultado = (p["ganador"] is None) and (p["diferencia_gol"] is None)
+        if conf and cam1 and cam2 and sin_resultado:
+            etiqueta = "ID %s - %s - %s" % (p["id"], p["fecha"], p["cancha"])
+            opciones.append((p["id"], etiqueta))
+    return opciones
+
+
+# ----------------- base de prueba -----------------
+def _fresh_db(path, seed=1234, partidos=300):
+    """Partidos en todos los estados: roster incompleto, sin camisetas, con resultado, 6v6..."""
+    from migrations import MIGRATIONS
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    cur = conn.cursor()
+    for _num, _name, fn in MIGRATIONS:
+        fn(cur)
+    cur.execute("INSERT INTO canchas (id, nombre) VALUES (1, 'Cancha 1')")
+    for j in range(1, 41):
+        cur.execute("INSERT INTO jugadores (id, nombre, elo_actual) VALUES (?, ?, 1000)", (j, f"J{j:02d}"))
+    for pid in range(1, partidos + 1):
+        jpe = rng.choice([5, 5, 5, 6, 7])
+        cur.execute(
+            "INSERT INTO partidos (id, fecha, cancha_id, tipo, ganador, diferencia_gol, jugadores_por_equipo) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (pid, f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 00:00:00",
+             rng.choice([1, None]), rng.choice(["abierto", "abierto", "cerrado"]),
+             rng.choice([None, None, None, 1]), rng.choice([None, None, None, 2]), jpe),
+        )
+        cupo = 2 * jpe + rng.choice([0, 0, 0, -1, -3])
+        cam = rng.choice([("clara", "oscura"), ("clara", "oscura"), ("clara", None), (None, None)])
+        for i, jid in enumerate(rng.sample(range(1, 41), max(0, cupo))):
+            eq = None if rng.random() < 0.02 else (1 if i % 2 == 0 else 2)
+            c = None if eq is None else cam[eq - 1]
+            cur.execute(
+                "INSERT INTO partido_jugadores (partido_id, jugador_id, equipo, camiseta) VALUES (?, ?, ?, ?)",
+                (pid, jid, eq, c),
+            )
+    conn.commit()
+    conn.close()
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if "--fresh" in argv:
+        tmp = tempfile.mkdtemp()
+        _fresh_db(os.path.join(tmp, "elo_futbol.db"))
+        os.chdir(tmp)  # db._sqlite_factory busca la base en el directorio actual
+
+    import cargaresultados
+    nuevo = cargaresultados._get_partidos_listos()
+    anterior = _legacy_partidos_listos()
+    print(f"Listos: anterior={len(anterior)} | agregado={len(nuevo)}")
+    if nuevo != anterior:
+        solo_a = [o for o in anterior if o not in nuevo]
+        solo_n = [o for o in nuevo if o not in anterior]
+        print(f"DISTINTOS. sólo anterior: {solo_a[:10]} | sólo agregado: {solo_n[:10]}")
+        return 1
+    print("Mismo resultado (y mismo orden).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+# tools/check_puntaje_diff_max.py
+# Verifica que el re-orden por puntaje (equipos.puntuar_opciones + _recortar_por_diff)
+# respete diff_max como el generador por ΔELO: con n_opciones o más dentro de diff_max
+# no aparece ninguna de afuera, y si faltan, las de afuera van al final por menor ΔELO.
+# Usa pools sintéticos con pesos extremos (ΔELO sin peso, repetidos/parejas pesadísimos).
+#
+# Uso:
+#   python tools/check_puntaje_diff_max.py [--rondas N]
+# Sale con código 1 si algún pool rompe el orden.
+
+from pathlib import Path
+import random
+import sys
+
+import numpy as np
+
+# === HACK de ruta para que se vea equipos.py (que está en el directorio padre) ===
+REPO_ROOT = Path(__file__).resolve().parent.parent  # sube de /tools a raíz del repo
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+PESOS_EXTREMOS = [
+    {"elo": 0.0, "repetido": 10_000.0, "pareja": 500.0, "camiseta": 200.0},
+    {"elo": -1.0, "repetido": 0.0, "pareja": 0.0, "camiseta": 0.0},  # premia el ΔELO grande
+    {"elo": 0.01, "repetido": -5_000.0, "pareja": -300.0, "camiseta": 0.0},
+]
+
+
+def _pool(rng, n_jug=10, tam=80):
+    """Opciones al azar (listas de jugador_id, mitad = Equipo 1) con su ΔELO y un contexto."""
+    ids = list(range(1, n_jug + 1))
+    opciones, diffs = [], []
+    for _ in range(tam):
+        lista = ids[:]
+        rng.shuffle(lista)
+        opciones.append(lista)
+        diffs.append(float(rng.choice([rng.uniform(0, 350), rng.uniform(350.01, 900)])))
+    juntos = np.zeros((n_jug, n_jug), dtype=np.int64)
+    for i in range(n_jug):
+        for j in range(i + 1, n_jug):
+            juntos[i, j] = juntos[j, i] = rng.randint(0, 20)
+    repetidos = set()
+    for lista in rng.sample(opciones, 10):
+        mask = sum(1 << (j - 1) for j in lista[:n_jug // 2])
+        repetidos.add(min(mask, ((1 << n_jug) - 1) ^ mask))
+    ctx = {
+        "ids": ids,
+        "juntos": juntos,
+        "repetidos": repetidos,
+        "racha": np.array([rng.randint(-5, 5) for _ in ids], dtype=np.int64),
+    }
+    return opciones, diffs, ctx
+
+
+def _chequear(diffs_out, n_opciones, diff_max, n_dentro, total):
+    """None si el recorte es correcto; si no, la descripción del problema."""
+    if len(diffs_out) != min(n_opciones, total):
+        return f"{len(diffs_out)} opciones en vez de {min(n_opciones, total)}"
+    afuera = [i for i, d in enumerate(diffs_out) if d > diff_max]
+    if n_dentro >= n_opciones:
+        if afuera:
+            return f"{len(afuera)} opciones fuera de diff_max con {n_dentro} adentro"
+        return None
+    if afuera and min(afuera) < n_dentro:
+        return "una opción fuera de diff_max quedó antes que una de adentro"
+    cola = [diffs_out[i] for i in afuera]
+    if cola != sorted(cola):
+        return "las opciones de afuera no van por menor ΔELO"
+    return None
+
+
+def main(argv=None) -> int:
+    import equipos
+    argv = sys.argv[1:] if argv is None else argv
+    rondas = int(argv[argv.index("--rondas") + 1]) if "--rondas" in argv else 200
+    rng = random.Random(20251)
+    diff_max = 350
+    fallas = 0
+    for r in range(rondas):
+        opciones, diffs, ctx = _pool(rng)
+        n_opciones = rng.choice([5, 12, 12, 30, 60])
+        n_dentro = sum(d <= diff_max for d in diffs)
+        for pesos in PESOS_EXTREMOS:
+            opts, ds, det = equipos.puntuar_opciones(opciones, diffs, ctx, pesos)
+            _, ds_out, _ = equipos._recortar_por_diff(opts, ds, det, n_opciones, diff_max)
+            error = _chequear(ds_out, n_opciones, diff_max, n_dentro, len(diffs))
+            if error:
+                fallas += 1
+                print(f"ronda {r} n_opciones={n_opciones} pesos={pesos}: {error}")
+    print(f"Pools: {rondas * len(PESOS_EXTREMOS)} | fallas: {fallas}")
+    return 1 if fallas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+# tools/check_query_plans.py
+# Corre EXPLAIN QUERY PLAN sobre las consultas calientes de la app y marca los
+# full scans (SCAN <tabla> sin índice) sobre tablas que crecen con el uso.
+#
+# Uso:
+#   python tools/check_query_plans.py          -> contra la base configurada (db.get_connection)
+#   python tools/check_query_plans.py --fresh  -> base en memoria con todas las migraciones
+# Sale con código 1 si encuentra algún full scan no permitido.
+
+from pathlib import Path
+import re
+import sqlite3
+import sys
+
+# === HACK de ruta para que se vea db.py (que está en el directorio padre) ===
+REPO_ROOT = Path(__file__).resolve().parent.parent  # sube de /tools a raíz del repo
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+# Tablas chicas (catálogos): recorrerlas completas es aceptable.
+SMALL_TABLES = {"jugadores", "canchas", "grupos", "usuarios", "seasons",
+                "programaciones", "numeros_libres_partidos", "schema_version"}
+
+# (nombre, sql) — mismas formas que usan los módulos; los '?' se completan con NULL.
+QUERIES = [
+    ("roster del partido (equipos/cargaresultados)", """
+        SELECT j.id, j.nombre, j.elo_actual, pj.equipo, pj.camiseta, pj.bloque
+        FROM partido_jugadores pj
+        JOIN jugadores j ON j.id = pj.jugador_id
+        WHERE pj.partido_id = ?
+    """),
+    ("partidos del jugador (jugador_stats/admin_stats)", """
+        SELECT p.id AS partido_id, p.fecha, p.ganador, p.diferencia_gol, pj.equipo, pj.camiseta
+        FROM partidos p
+        JOIN partido_jugadores pj ON pj.partido_id = p.id
+        WHERE pj.jugador_id = ?
+        ORDER BY p.fecha_dia ASC, p.id ASC
+    """),
+    ("serie ELO del jugador (jugador_stats)", """
+        SELECT p.fecha AS fecha, COALESCE(h.elo_despues, h.elo_antes) AS elo
+        FROM historial_elo h
+        JOIN partidos p ON p.id = h.partido_id
+        WHERE h.jugador_id = ?
+        ORDER BY p.fecha_dia, p.id
+    """),
+    ("historial_elo del partido (deshacer/historial)", """
+        SELECT jugador_id, elo_antes, elo_despues FROM historial_elo WHERE partido_id = ?
+    """),
+    ("login por token (remember)", """
+        SELECT user_id, expires_at FROM login_tokens WHERE token_hash = ?
+    """),
+    ("primero en lista de espera (jugador_panel/partidos)", """
+        SELECT le.jugador_id FROM lista_espera le
+        WHERE le.partido_id = ?
+        ORDER BY le.created_at ASC LIMIT 1
+    """),
+    ("grupos del partido (partidos)", """
+        SELECT g.id, g.nombre
+        FROM partido_grupos pg
+        JOIN grupos g ON g.id = pg.grupo_id
+        WHERE pg.partido_id = ?
+    """),
+    ("partidos visibles desde hoy (jugador_panel)", """
+        SELECT p.id, p.fecha, p.hora, p.tipo
+        FROM partidos p
+        WHERE p.fecha_dia >= ?
+          AND (p.tipo IS NULL OR p.tipo = 'abierto')
+          AND p.ganador IS NULL
+    """),
+    ("partidos de un día (historial)", """
+        SELECT p.id FROM partidos p
+        WHERE p.fecha_dia = ?
+          AND EXISTS (SELECT 1 FROM partido_jugadores pj WHERE pj.partido_id = p.id)
+    """),
+    ("partidos del año (historial/calendario)", """
+        SELECT p.id, p.fecha FROM partidos p
+        WHERE p.fecha_dia BETWEEN ? AND ?
+          AND EXISTS (SELECT 1 FROM partido_jugadores pj WHERE pj.partido_id = p.id)
+        ORDER BY p.fecha ASC, p.id ASC
+    """),
+    ("podio por rango de temporada (admin_temporadas)", """
+        SELECT pj.jugador_id, COUNT(*) AS pj
+        FROM partidos p
+        JOIN partido_jugadores pj ON pj.partido_id = p.id
+        WHERE p.fecha_dia BETWEEN date(?) AND date(?)
+        GROUP BY pj.jugador_id
+    """),
+]
+
+_SCAN_RE = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS (\w+))?(.*)$")
+
+
+def _fresh_conn():
+    """Base en memoria con el esquema completo (todas las migraciones)."""
+    from migrations import MIGRATIONS
+    conn = sqlite3.connect(":memory:")
+    cur = conn.cursor()
+    for _num, _name, fn in MIGRATIONS:
+        fn(cur)
+    conn.commit()
+    return conn
+
+
+def _plan(cur, sql: str):
+    cur.execute("EXPLAIN QUERY PLAN " + sql, (None,) * sql.count("?"))
+    return [str(r[3]) for r in cur.fetchall()]  # (id, parent, notused, detail)
+
+
+def _full_scans(plan_lines, aliases):
+    out = []
+    for line in plan_lines:
+        m = _SCAN_RE.match(line.strip())
+        if not m or "USING" in (m.group(3) or ""):
+            continue
+        name = m.group(1)
+        table = aliases.get(name, name)
+        if table not in SMALL_TABLES:
+            out.append(line.strip())
+    return out
+
+
+def _aliases(sql: str) -> dict:
+    # 'FROM partidos p' / 'JOIN partido_jugadores pj' -> {'p': 'partidos', 'pj': 'partido_jugadores'}
+    return {a: t for t, a in re.findall(r"(?:FROM|JOIN)\s+(\w+)\s+(?:AS\s+)?(\w+)", sql, re.I)}
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if "--fresh" in argv:
+        conn = _fresh_conn()
+    else:
+        from db import get_connection
+        conn = get_connection()
+    cur = conn.cursor()
+    flagged = 0
+    for name, sql in QUERIES:
+        try:
+            plan = _plan(cur, sql)
+        except Exception as e:
+            print(f"[ERROR] {name}: {e}")
+            flagged += 1
+            continue
+        scans = _full_scans(plan, _aliases(sql))
+        print(f"[{'SCAN' if scans else 'ok'}] {name}")
+        for line in (plan if scans else []):
+            print(f"        {line}")
+        flagged += bool(scans)
+    conn.close()
+    print(f"\n{flagged} consulta(s) con full scan sobre tablas grandes.")
+    return 1 if flagged else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
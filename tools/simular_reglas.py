@@ -0,0 +1,90 @@
+# tools/simular_reglas.py
+# Simulador "what-if" de reglas de ELO sobre el historial oficial: reproduce todos
+# los partidos con una grilla de reglas (K, tramos por diferencia de gol, boost de
+# novatos, promedio vs suma) en un solo lote (elo_service.simular) y lista
+# log-loss, Brier y acierto del favorito por configuración. No escribe en la base.
+#
+# Uso:
+#   python tools/simular_reglas.py
+#   python tools/simular_reglas.py --k 40,60,80,100 --boost 1,1.25,1.5 --tramos actual,sin
+#   python tools/simular_reglas.py --desde 2025-01-01 --orden brier --top 10
+
+from pathlib import Path
+import argparse
+import sys
+import time
+
+# === HACK de ruta para que se vea elo_service.py (que está en el directorio padre) ===
+REPO_ROOT = Path(__file__).resolve().parent.parent  # sube de /tools a raíz del repo
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+import elo_service  # noqa: E402
+
+# tramos de diferencia de gol con nombre (para la línea de comandos)
+TRAMOS = {
+    "actual": elo_service.REGLAS_DEFAULT["tramos"],
+    "sin": (),
+    "suave": ((6, 1.4), (3, 1.15)),
+    "fuerte": ((6, 2.2), (3, 1.5)),
+    "lineal": ((8, 2.0), (6, 1.75), (4, 1.5), (2, 1.25)),
+}
+
+
+def _lista(texto, tipo):
+    return tuple(tipo(x) for x in texto.split(",") if x.strip())
+
+
+def _nombre_tramos(tramos):
+    for nombre, t in TRAMOS.items():
+        if tuple(t) == tuple(tramos):
+            return nombre
+    return str(tramos)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="simular_reglas.py")
+    ap.add_argument("--k", default="40,60,80,100,120")
+    ap.add_argument("--tramos", default="actual,sin,suave,fuerte", help=",".join(TRAMOS))
+    ap.add_argument("--boost", default="1,1.25,1.5")
+    ap.add_argument("--provisional", default="5", help="partidos con boost de novato")
+    ap.add_argument("--modo", default="promedio,suma", help="promedio y/o suma")
+    ap.add_argument("--desde", default=None, help="medir sólo partidos desde YYYY-MM-DD")
+    ap.add_argument("--orden", default="log_loss", choices=("log_loss", "brier", "acierto_favorito"))
+    ap.add_argument("--top", type=int, default=20)
+    args = ap.parse_args(sys.argv[1:] if argv is None else argv)
+
+    configs = elo_service.grilla(
+        k=_lista(args.k, float),
+        tramos=tuple(TRAMOS[t] for t in _lista(args.tramos, str)),
+        provisional_boost=_lista(args.boost, float),
+        provisional_partidos=_lista(args.provisional, int),
+        promedio=tuple(m == "promedio" for m in _lista(args.modo, str)),
+    )
+    partidos, base = elo_service.cargar_historial()
+    if not partidos:
+        print("No hay partidos oficiales con resultado.")
+        return 0
+
+    t0 = time.perf_counter()
+    res = elo_service.simular(partidos, base, configs, desde=args.desde)
+    dt = time.perf_counter() - t0
+
+    actual = elo_service.reglas()
+    signo = -1 if args.orden == "acierto_favorito" else 1
+    res.sort(key=lambda r: signo * (r[args.orden] or 0))
+    print(f"{len(partidos)} partidos, {len(configs)} configuraciones en {dt:.2f} s "
+          f"(medidos: {res[0]['partidos']})\n")
+    print(f"{'K':>6} {'tramos':>8} {'boost':>6} {'prov':>5} {'modo':>9} | "
+          f"{'log-loss':>9} {'Brier':>7} {'fav %':>6}")
+    for r in res[:args.top]:
+        marca = "  <- actual" if all(r[c] == actual[c] for c in actual) else ""
+        fav = "—" if r["acierto_favorito"] is None else r["acierto_favorito"]
+        print(f"{r['k']:>6g} {_nombre_tramos(r['tramos']):>8} {r['provisional_boost']:>6g} "
+              f"{r['provisional_partidos']:>5} {'promedio' if r['promedio'] else 'suma':>9} | "
+              f"{r['log_loss']:>9.4f} {r['brier']:>7.4f} {fav:>6}{marca}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -55,8 +55,6 @@ def _render_and_clear_flash_at_bottom():
 def load_groups():
     conn = get_connection()
     cur = conn.cursor()
-    cur.execute("CREATE TABLE IF NOT EXISTS grupos (id INTEGER PRIMARY KEY AUTOINCREMENT, nombre TEXT NOT NULL UNIQUE)")
-    conn.commit()
     cur.execute("SELECT id, nombre FROM grupos ORDER BY nombre ASC")
     rows = cur.fetchall()
     conn.close()
@@ -117,8 +115,6 @@ def panel_gestion():
     def cargar_usuarios():
         conn = get_connection()
         cur = conn.cursor()
-        cur.execute("CREATE TABLE IF NOT EXISTS grupos (id INTEGER PRIMARY KEY AUTOINCREMENT, nombre TEXT NOT NULL UNIQUE)")
-        conn.commit()
         cur.execute("""
             SELECT u.id, u.username, u.rol, u.jugador_id, u.grupos, j.nombre AS jugador_nombre
             FROM usuarios u
@@ -355,8 +351,6 @@ def panel_gestion():
         else:
             conn = get_connection()
             cur = conn.cursor()
-            cur.execute("CREATE TABLE IF NOT EXISTS grupos (id INTEGER PRIMARY KEY AUTOINCREMENT, nombre TEXT NOT NULL UNIQUE)")
-            conn.commit()
             try:
                 cur.execute("INSERT INTO grupos (nombre) VALUES (?)", (nombre,))
                 conn.commit()